@@ -0,0 +1,248 @@
+#pip install numpy sounddevice
+
+# Arranjo de microfones: direção de chegada e beamforming (Projeto Athena)
+#
+# Com CHANNELS = 1, os canais extras de um arranjo USB (ReSpeaker, PS3 Eye,
+# placas de 4 canais) eram jogados fora. Em sala barulhenta, isso custa
+# reconhecimento errado e comandos repetidos. Este módulo abre os N canais e,
+# a cada bloco, antes do reconhecedor:
+#
+#   1. estima a direção de chegada (DOA) por GCC-PHAT vetorizado: uma única
+#      FFT de todos os canais, correlação cruzada normalizada de cada canal
+#      contra o de referência e atraso com resolução de 1/UPSAMPLE amostra;
+#      o ângulo sai de um ajuste por mínimos quadrados sobre as posições
+#   2. aplica delay-and-sum: cada canal é atrasado (deslocamento de fase na
+#      mesma FFT, atraso fracionário) para alinhar a frente de onda da
+#      direção estimada, e os canais são somados
+#   3. devolve PCM 16 bits mono para o reconhecedor
+#
+# A direção só é atualizada em blocos com fala (energia acima do piso de
+# ruído) e é suavizada entre blocos; take_direction() dá a direção média da
+# frase (ponderada pela energia) e zera o acumulado. stats() mostra o custo
+# por bloco e a fração do tempo real gasta (orçamento).
+#
+# Geometria: arranjo LINEAR, posições dos microfones ao longo do eixo (m).
+# Ângulo 0 = de frente (perpendicular ao eixo), positivo para o lado do
+# último microfone. Os parâmetros ficam na seção [ARRANJO] de
+# ~/Athena/config.ini.
+#
+# USO:
+#   python arranjo_microfones.py --simular 30          # fonte sintética a 30°
+#   python arranjo_microfones.py --dispositivo 2 --canais 4
+#   test_vosk_microfone_serial_talkback6.py --canais 4
+
+import os
+import time
+import argparse
+import configparser
+
+import numpy as np
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+SAMPLE_RATE = 16000
+SPEED_OF_SOUND = 343.0
+# Resolução do atraso no GCC-PHAT (fração de amostra)
+UPSAMPLE = 8
+
+# Padrões (sobrescritos pela seção [ARRANJO] do config.ini)
+DEFAULT_ARRAY = {
+    "positions_m": "0,0.032,0.064,0.096",  # posições ao longo do eixo (4 mics, 3,2 cm)
+    "smoothing": 0.5,                        # peso do bloco novo na direção suavizada
+    "margin_db": 6.0,                        # fala = energia acima do piso de ruído + margem
+}
+
+
+def load_array_config():
+    """Lê a seção [ARRANJO] do config.ini, mantendo os padrões para chaves ausentes."""
+    cfg = dict(DEFAULT_ARRAY)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("ARRANJO"):
+        for key, default in DEFAULT_ARRAY.items():
+            if key in config["ARRANJO"]:
+                try:
+                    cfg[key] = type(default)(config["ARRANJO"][key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [ARRANJO], usando {default}")
+    return cfg
+
+
+def parse_positions(text, n_channels=None):
+    positions = np.array([float(x) for x in text.split(",") if x.strip()])
+    if n_channels is not None and positions.size != n_channels:
+        # Mesmo espaçamento do config para outra quantidade de canais
+        step = positions[1] - positions[0] if positions.size > 1 else 0.032
+        positions = np.arange(n_channels) * step
+    return positions
+
+
+class Beamformer:
+    """
+    DOA (GCC-PHAT) e delay-and-sum em blocos de PCM 16 bits intercalado.
+    process(data) -> PCM 16 bits mono do mesmo número de amostras (memoryview
+    do buffer interno, válida até o próximo bloco).
+    """
+
+    def __init__(self, n_channels, sample_rate=SAMPLE_RATE, blocksize=8000, cfg=None):
+        self.cfg = cfg or load_array_config()
+        self.n_channels = n_channels
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.positions = parse_positions(self.cfg["positions_m"], n_channels)
+        self.rel = self.positions - self.positions[0]
+        # Maior atraso possível entre dois microfones
+        span_s = (self.positions.max() - self.positions.min()) / SPEED_OF_SOUND
+        self.max_lag = int(np.ceil(span_s * sample_rate)) + 1
+        # Histórico: cobre o maior atraso aplicado no delay-and-sum
+        self.history = 2 * self.max_lag
+        self.nfft = self.history + blocksize
+        self.nfft += self.nfft % 2
+        self.frame = np.zeros((self.nfft, n_channels), dtype=np.float32)
+        self.freqs = np.fft.rfftfreq(self.nfft, 1.0 / sample_rate)
+        self._out = np.empty(blocksize, dtype=np.int16)
+        self._view = memoryview(self._out).cast("B")
+        self._lags = np.concatenate((np.arange(-self.max_lag * UPSAMPLE, 0),
+                                     np.arange(0, self.max_lag * UPSAMPLE + 1)))
+        # Estado da direção
+        self.sin_theta = 0.0
+        self.noise_db = None
+        self._dir_sum = 0.0
+        self._dir_weight = 0.0
+        # Custo
+        self.blocks = 0
+        self.proc_s = 0.0
+        self.max_proc_s = 0.0
+
+    # ------------------------------------------------------------ DOA
+    def _gcc_phat(self, X):
+        """Atraso (s) de cada canal em relação ao canal 0, todos de uma vez."""
+        R = X[:, 1:] * np.conj(X[:, :1])
+        R /= np.abs(R) + 1e-12
+        cc = np.fft.irfft(R, n=self.nfft * UPSAMPLE, axis=0)
+        m = self.max_lag * UPSAMPLE
+        window = np.concatenate((cc[-m:], cc[:m + 1]), axis=0)
+        return self._lags[np.argmax(window, axis=0)] / (self.sample_rate * UPSAMPLE)
+
+    def _estimate_sin(self, tau):
+        """Ajuste por mínimos quadrados: tau_k = -rel_k * sen(theta) / c."""
+        rel = self.rel[1:]
+        s = -np.dot(rel, tau) * SPEED_OF_SOUND / np.dot(rel, rel)
+        return float(np.clip(s, -1.0, 1.0))
+
+    # ------------------------------------------------------------ bloco
+    def process(self, data):
+        t0 = time.perf_counter()
+        x = np.frombuffer(data, dtype=np.int16).reshape(-1, self.n_channels)
+        n = x.shape[0]
+        # Janela deslizante: histórico + bloco novo
+        self.frame[:-n] = self.frame[n:]
+        self.frame[-n:] = x
+        X = np.fft.rfft(self.frame, axis=0)
+
+        level = x.astype(np.float32)
+        energy = float(np.mean(level * level)) + 1e-9
+        level_db = 10.0 * np.log10(energy / 32768.0 ** 2)
+        if self.noise_db is None or level_db < self.noise_db:
+            self.noise_db = level_db
+        else:
+            self.noise_db += 0.01 * (level_db - self.noise_db)
+        if self.n_channels > 1 and level_db > self.noise_db + self.cfg["margin_db"]:
+            s = self._estimate_sin(self._gcc_phat(X))
+            a = self.cfg["smoothing"]
+            self.sin_theta = (1 - a) * self.sin_theta + a * s
+            self._dir_sum += energy * s
+            self._dir_weight += energy
+
+        # Delay-and-sum: atrasa cada canal para alinhar com o que chega por último
+        tau = -self.rel * self.sin_theta / SPEED_OF_SOUND
+        delays = tau.max() - tau
+        steer = np.exp(-2j * np.pi * self.freqs[:, None] * delays[None, :])
+        y = np.fft.irfft((X * steer).mean(axis=1), n=self.nfft)[-n:]
+        out = self._out[:n]
+        np.clip(y, -32768, 32767, out=y)
+        out[:] = y
+        elapsed = time.perf_counter() - t0
+        self.blocks += 1
+        self.proc_s += elapsed
+        self.max_proc_s = max(self.max_proc_s, elapsed)
+        # Sem cópia: devolve o próprio buffer de saída
+        return self._view if n == self.blocksize else self._view[:2 * n]
+
+    # ------------------------------------------------------------ leitura
+    @property
+    def direction_deg(self):
+        return float(np.degrees(np.arcsin(self.sin_theta)))
+
+    def take_direction(self):
+        """Direção média (graus) desde a última chamada, ponderada pela energia; None sem fala."""
+        if not self._dir_weight:
+            return None
+        s = self._dir_sum / self._dir_weight
+        self._dir_sum = self._dir_weight = 0.0
+        return round(float(np.degrees(np.arcsin(np.clip(s, -1.0, 1.0)))), 1)
+
+    def stats(self):
+        block_s = self.blocksize / self.sample_rate
+        mean = self.proc_s / self.blocks if self.blocks else 0.0
+        return {"canais": self.n_channels, "blocos": self.blocks,
+                "ms_por_bloco": round(mean * 1000, 3), "ms_max": round(self.max_proc_s * 1000, 3),
+                # Fração do tempo real gasta no beamforming (1.0 = não acompanha)
+                "orcamento": round(mean / block_s, 4),
+                "direcao_graus": round(self.direction_deg, 1)}
+
+
+def simulate(angle_deg, n_channels, seconds=3.0, blocksize=8000, cfg=None, snr_db=10.0):
+    """
+    Fonte sintética (ruído colorido) chegando de angle_deg depois de 1 s de
+    silêncio, com ruído independente por canal.
+    """
+    cfg = cfg or load_array_config()
+    rng = np.random.default_rng(0)
+    positions = parse_positions(cfg["positions_m"], n_channels)
+    n = int(seconds * SAMPLE_RATE)
+    src = np.convolve(rng.normal(0, 1, n + 64), np.ones(8) / 8, mode="same")
+    spec = np.fft.rfft(src)
+    f = np.fft.rfftfreq(src.size, 1.0 / SAMPLE_RATE)
+    tau = -(positions - positions[0]) * np.sin(np.radians(angle_deg)) / SPEED_OF_SOUND
+    chans = np.fft.irfft(spec[:, None] * np.exp(-2j * np.pi * f[:, None] * tau[None, :]), n=src.size, axis=0)[:n]
+    chans *= 6000 / chans.std()
+    chans[:SAMPLE_RATE] = 0.0
+    noise = rng.normal(0, 6000 / 10 ** (snr_db / 20), chans.shape)
+    pcm = np.clip(chans + noise, -32768, 32767).astype(np.int16)
+    return [pcm[i:i + blocksize].tobytes() for i in range(0, n - blocksize + 1, blocksize)]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Direção de chegada e beamforming de um arranjo de microfones")
+    p.add_argument("--canais", type=int, default=4)
+    p.add_argument("--dispositivo", default=None)
+    p.add_argument("--simular", type=float, default=None, metavar="GRAUS", help="Fonte sintética nesse ângulo")
+    p.add_argument("--segundos", type=float, default=10.0)
+    args = p.parse_args()
+
+    beam = Beamformer(args.canais)
+    if args.simular is not None:
+        for block in simulate(args.simular, args.canais, seconds=args.segundos):
+            beam.process(block)
+        print(f"Simulado {args.simular:.1f}° -> estimado {beam.take_direction()}°")
+        print("Custo:", beam.stats())
+        return
+
+    import queue
+    import sounddevice as sd
+    q = queue.Queue()
+    device = int(args.dispositivo) if args.dispositivo and args.dispositivo.isdigit() else args.dispositivo
+    with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=beam.blocksize, device=device,
+                           dtype="int16", channels=args.canais, callback=lambda d, f, t, s: q.put(bytes(d))):
+        t_end = time.monotonic() + args.segundos
+        while time.monotonic() < t_end:
+            beam.process(q.get())
+            direction = beam.take_direction()
+            if direction is not None:
+                print(f"Direção: {direction:6.1f}°")
+    print("Custo:", beam.stats())
+
+
+if __name__ == "__main__":
+    main()
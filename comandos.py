@@ -0,0 +1,347 @@
+# Índice de comandos de voz (Projeto Athena)
+#
+# Substitui a busca linear `text in VALID_COMMANDS` (que precisava listar à mão
+# "girar cabeca", "girar cabeça", "gira a cabeça", "gire a cabeça"...) por um
+# índice compilado na inicialização:
+#
+#   1. normalização: minúsculas, sem acentos/pontuação, sem artigos e
+#      preposições, e verbos reduzidos ao infinitivo ("gire" -> "girar")
+#   2. busca exata O(1) num dicionário frase_normalizada -> comando canônico
+#   3. fallback aproximado, palavra a palavra: o verbo tem de bater exato ou
+#      pela chave fonética (calculada antes de tirar os acentos, para "ç" soar
+#      como "s": "avansar" -> avançar); as demais palavras aceitam distância de edição
+#      limitada pelo tamanho da palavra. Confiança entre 0 e 1, com limite
+#      mais alto para frases curtas. Uma frase com "parar" nunca vira
+#      comando de movimento por aproximação ("pare direita" não é "girar
+#      direita")
+#
+# Frases com vários comandos ("ligar led e avançar", "girar esquerda depois
+# parar") são separadas pelos conectivos e enviadas ao Arduino numa única
+# linha de lote ("lote:ligar led;avancar"), com uma única resposta.
+#
+# O comando canônico é o texto enviado ao Arduino. O vocabulário vem do
+# registro único comandos.json, que também gera o cabeçalho do firmware
+# (gerar_comandos_firmware.py), para Python e Arduino não divergirem.
+
+import os
+import re
+import json
+import unicodedata
+from collections import namedtuple
+
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "comandos.json")
+
+
+def load_registry(path=REGISTRY_FILE):
+    """Lê o registro de comandos (lista de dicts com command, id, variants, reply, local)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["commands"]
+
+
+REGISTRY = load_registry()
+
+# Comando canônico -> variantes faladas (as variantes também formam a gramática do Vosk)
+COMMANDS = {entry["command"]: entry["variants"] for entry in REGISTRY}
+
+# Comandos respondidos pelo próprio Python (não vão para o Arduino)
+LOCAL_COMMANDS = tuple(entry["command"] for entry in REGISTRY if entry.get("local"))
+
+# Linhas de protocolo aceitas pelo firmware que não são comandos de voz
+PROTOCOL_COMMANDS = ("teste_comunicacao", "ping", "estado_movimento", "estado_laco", "telemetria")
+
+# Comandos que aceitam um valor numérico ("avancar 200"): comando -> {"unit", "max"}
+PARAMETERS = {entry["command"]: entry["param"] for entry in REGISTRY if entry.get("param")}
+
+# Palavras descartadas na normalização
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas",
+    "ao", "aos", "de", "do", "da", "dos", "das",
+    "para", "pra", "pro", "por", "favor", "no", "na", "e",
+}
+
+# Formas verbais -> infinitivo
+VERB_FORMS = {
+    "liga": "ligar", "ligue": "ligar", "ligando": "ligar",
+    "desliga": "desligar", "desligue": "desligar", "desligando": "desligar",
+    "acende": "acender", "acenda": "acender",
+    "apaga": "apagar", "apague": "apagar",
+    "avanca": "avancar", "avance": "avancar", "avancando": "avancar",
+    "anda": "andar", "ande": "andar",
+    "gira": "girar", "gire": "girar", "girando": "girar",
+    "vira": "virar", "vire": "virar",
+    "pare": "parar", "parando": "parar",
+    "ajude": "ajudar",
+}
+
+# Confiança mínima para aceitar uma correspondência aproximada
+MIN_CONFIDENCE = 0.75
+# Frases normalizadas até SHORT_KEY_LEN letras exigem SHORT_MIN_CONFIDENCE
+SHORT_KEY_LEN = 8
+SHORT_MIN_CONFIDENCE = 0.85
+# Distância de edição máxima por palavra no fallback (palavras de até 3 letras: nenhuma)
+MAX_EDIT_DISTANCE = 2
+# Comando de parada: por aproximação, nunca vira outro comando
+STOP_COMMAND = "parar"
+
+# Conectivos que separam comandos numa mesma frase
+CONNECTIVES = {"e", "depois", "entao", "ai", "seguida", "em", "tambem"}
+
+# Prefixo do lote no protocolo serial: "lote:cmd1;cmd2;..."
+BATCH_PREFIX = "lote:"
+BATCH_SEPARATOR = ";"
+
+CommandMatch = namedtuple("CommandMatch", "command confidence method normalized")
+
+_PUNCT = re.compile(r"[^\w\s]")
+
+
+def strip_accents(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+def normalize_text(s: str) -> str:
+    """Minúsculas, sem acentos/pontuação, verbos no infinitivo e sem artigos/preposições."""
+    words = _PUNCT.sub(" ", strip_accents(s.strip().lower())).split()
+    out = []
+    for i, w in enumerate(words):
+        # "para" no início é o verbo (parar); no meio é preposição ("girar para a esquerda")
+        if i == 0 and w == "para":
+            out.append("parar")
+            continue
+        w = VERB_FORMS.get(w, w)
+        if w not in STOPWORDS:
+            out.append(w)
+    return " ".join(out)
+
+
+# "ç" e "c" antes de e/i soam como "s"; precisa ser visto antes de tirar os acentos
+_SOFT_C = re.compile(r"ç|c(?=[eiéêí])")
+
+
+def phonetic_key(s: str) -> str:
+    """Chave fonética simples para português (agrupa grafias que soam igual)."""
+    s = strip_accents(_SOFT_C.sub("s", s.lower()))
+    for a, b in (("ch", "x"), ("lh", "li"), ("nh", "ni"), ("ss", "s"), ("rr", "r"),
+                 ("qu", "k"), ("gu", "g"), ("sc", "s"), ("h", "")):
+        s = s.replace(a, b)
+    s = s.replace("c", "k").replace("z", "s").replace("y", "i").replace("w", "v")
+    s = re.sub(r"(\w)\1+", r"\1", s)  # letras repetidas
+    return s
+
+
+def phonetic_words(s: str) -> list:
+    """
+    Chave fonética de cada palavra normalizada de s, alinhada com
+    normalize_text(s).split(): o "ç" é lido antes de normalize_text tirá-lo.
+    """
+    return [phonetic_key(w) for w in normalize_text(_SOFT_C.sub("s", s.lower())).split()]
+
+
+def word_edit_limit(word: str, max_dist: int = MAX_EDIT_DISTANCE) -> int:
+    """Distância de edição aceita numa palavra: 0 até 3 letras, 1 até 7, depois max_dist."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 7:
+        return min(1, max_dist)
+    return max_dist
+
+
+def bounded_edit_distance(a: str, b: str, max_dist: int):
+    """Levenshtein limitado a max_dist (retorna None se passar do limite)."""
+    if abs(len(a) - len(b)) > max_dist:
+        return None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            row_min = min(row_min, cur[j])
+        if row_min > max_dist:
+            return None
+        prev = cur
+    return prev[-1] if prev[-1] <= max_dist else None
+
+
+class CommandIndex:
+    """Índice compilado: frase normalizada -> comando canônico."""
+
+    def __init__(self, commands=COMMANDS, min_confidence=MIN_CONFIDENCE, max_distance=MAX_EDIT_DISTANCE):
+        self.commands = commands
+        self.min_confidence = min_confidence
+        self.max_distance = max_distance
+        self.exact = {}
+        self.phonetic = {}
+        # (palavras, chaves fonéticas das palavras, comando) de cada grafia, para o casamento aproximado
+        self._fuzzy = []
+        for canonical, variants in commands.items():
+            for phrase in [canonical] + list(variants):
+                key = normalize_text(phrase)
+                if not key:
+                    continue
+                previous = self.exact.setdefault(key, canonical)
+                if previous != canonical:
+                    raise ValueError(f"frase ambígua '{phrase}' ({key}): {previous} x {canonical}")
+                words = key.split()
+                pwords = self._phonetic_words(phrase, words)
+                self.phonetic.setdefault(" ".join(pwords), canonical)
+                if (words, pwords, canonical) not in self._fuzzy:
+                    self._fuzzy.append((words, pwords, canonical))
+
+    @staticmethod
+    def _phonetic_words(text, words):
+        pwords = phonetic_words(text)
+        return pwords if len(pwords) == len(words) else [phonetic_key(w) for w in words]
+
+    @property
+    def canonical(self):
+        return list(self.commands)
+
+    @property
+    def phrases(self):
+        """Variantes faladas (com acentos), para a gramática do reconhecedor."""
+        seen = []
+        for variants in self.commands.values():
+            for phrase in variants:
+                if phrase not in seen:
+                    seen.append(phrase)
+        return seen
+
+    def match(self, text: str):
+        """Retorna CommandMatch ou None se nada passar da confiança mínima."""
+        key = normalize_text(text)
+        if not key:
+            return None
+        command = self.exact.get(key)
+        if command is not None:
+            return CommandMatch(command, 1.0, "exact", key)
+
+        words = key.split()
+        stop = self.exact.get(words[0]) == STOP_COMMAND or STOP_COMMAND in words
+        pwords = self._phonetic_words(text, words)
+        command = self.phonetic.get(" ".join(pwords))
+        if command is not None and (not stop or command == STOP_COMMAND):
+            return CommandMatch(command, 0.9, "phonetic", key)
+
+        best = None
+        for candidate, cand_pwords, command in self._fuzzy:
+            if stop and command != STOP_COMMAND:
+                continue
+            confidence = self._word_confidence(words, pwords, candidate, cand_pwords)
+            if confidence is not None and (best is None or confidence > best.confidence):
+                best = CommandMatch(command, round(confidence, 2), "fuzzy", key)
+        if best is None:
+            return None
+        threshold = self.min_confidence
+        if len(key.replace(" ", "")) <= SHORT_KEY_LEN:
+            threshold = max(threshold, SHORT_MIN_CONFIDENCE)
+        return best if best.confidence >= threshold else None
+
+    def _word_confidence(self, words, pwords, candidate, cand_pwords):
+        """
+        Confiança do casamento palavra a palavra, ou None. O verbo (primeira
+        palavra) só casa exato ou pela chave fonética.
+        """
+        if len(words) != len(candidate):
+            return None
+        if words[0] != candidate[0] and pwords[0] != cand_pwords[0]:
+            return None
+        errors = 0
+        letters = 0
+        for i, (w, c) in enumerate(zip(words, candidate)):
+            letters += max(len(w), len(c))
+            if w == c or pwords[i] == cand_pwords[i]:
+                # Verbo pela fonética conta como meio erro
+                errors += 0.5 if i == 0 and w != c else 0
+                continue
+            dist = bounded_edit_distance(w, c, word_edit_limit(c, self.max_distance))
+            if dist is None:
+                return None
+            errors += dist
+        return 1.0 - errors / letters
+
+    def _segment_exact(self, words):
+        """Segmenta palavras normalizadas em comandos pelo casamento exato mais longo."""
+        out = []
+        i = 0
+        while i < len(words):
+            for j in range(len(words), i, -1):
+                command = self.exact.get(" ".join(words[i:j]))
+                if command is not None:
+                    out.append(CommandMatch(command, 1.0, "exact", " ".join(words[i:j])))
+                    i = j
+                    break
+            else:
+                return None
+        return out
+
+    def match_sequence(self, text: str):
+        """
+        Reconhece um ou mais comandos numa frase ("ligar led e avançar").
+        Retorna a lista de CommandMatch em ordem, ou None se algum trecho não for comando.
+        """
+        match = self.match(text)
+        if match is not None:
+            return [match]
+
+        words = _PUNCT.sub(" ", strip_accents(text.strip().lower())).split()
+        segments, current = [], []
+        for w in words:
+            if w in CONNECTIVES:
+                if current:
+                    segments.append(current)
+                current = []
+            else:
+                current.append(w)
+        if current:
+            segments.append(current)
+        if not segments:
+            return None
+
+        result = []
+        for seg in segments:
+            match = self.match(" ".join(seg))
+            if match is not None:
+                result.append(match)
+                continue
+            # Sem conectivo entre comandos ("ligar led avançar"): casamento exato mais longo
+            parts = self._segment_exact(normalize_text(" ".join(seg)).split())
+            if not parts:
+                return None
+            result.extend(parts)
+        return result
+
+
+def firmware_phrases(commands=COMMANDS, local=LOCAL_COMMANDS):
+    """Frases aceitas pelo firmware: o comando canônico e cada variante falada."""
+    phrases = []
+    for canonical, variants in commands.items():
+        if canonical in local:
+            continue
+        for phrase in [canonical] + list(variants):
+            if phrase not in phrases:
+                phrases.append(phrase)
+    return phrases
+
+
+def split_commands(commands, local=LOCAL_COMMANDS):
+    """
+    Separa os comandos de uma frase em (locais, linha serial): os locais são
+    tratados no próprio enviador; a linha é o comando restante, um lote
+    "lote:cmd1;cmd2" com os restantes, ou None se todos forem locais.
+    """
+    local_commands = [c for c in commands if c in local]
+    remote = [c for c in commands if c not in local]
+    if not remote:
+        return local_commands, None
+    if len(remote) == 1:
+        return local_commands, remote[0]
+    return local_commands, BATCH_PREFIX + BATCH_SEPARATOR.join(remote)
+
+
+def valid_phrases():
+    """Lista plana de frases válidas (para scripts que ainda comparam `text in VALID_COMMANDS`)."""
+    return firmware_phrases() + [v for c in LOCAL_COMMANDS for v in COMMANDS[c]]
+
+
+COMMAND_INDEX = CommandIndex()
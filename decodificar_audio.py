@@ -0,0 +1,187 @@
+#pip install vosk
+#sudo apt install ffmpeg
+
+# Decodificação de áudio em fluxo para transcrição offline (Projeto Athena)
+#
+# O reconhecedor só aceita PCM 16 bits mono; antes, toda gravação em outro
+# formato (mp3, ogg, m4a, WAV estéreo ou a 44,1/48 kHz) precisava virar um
+# WAV temporário. Aqui cada arquivo passa por UM processo ffmpeg que vive
+# enquanto o arquivo é lido e entrega PCM 16 kHz mono pela saída padrão
+# (downmix e reamostragem feitos pelo próprio ffmpeg):
+#
+#   - sem arquivos intermediários
+#   - memória constante: um único buffer pré-alocado é preenchido com
+#     readinto() e reaproveitado a cada bloco, seja o arquivo de 10 s ou de 3 h
+#   - blocos grandes (4 s por padrão) entregues ao AcceptWaveform sem cópia
+#     (as_waveform() aponta o reconhecedor direto para o buffer)
+#
+# WAV mono 16 bits a 8 ou 16 kHz continua sendo lido direto, sem ffmpeg.
+#
+# API:
+#   rate, blocks = open_audio("gravacao.mp3")
+#   for view in blocks:                 # memoryview: válido só até o próximo bloco
+#       rec.AcceptWaveform(as_waveform(view))
+#
+# USO (só decodifica e mede):
+#   python decodificar_audio.py gravacao.m4a
+
+import os
+import sys
+import time
+import wave
+import shutil
+import argparse
+import subprocess
+
+try:
+    from vosk import _ffi as _vosk_ffi
+except ImportError:
+    _vosk_ffi = None
+
+SAMPLE_RATE = 16000
+# Segundos de áudio por bloco entregue ao reconhecedor
+CHUNK_S = 4.0
+# Taxas que o WAV pode ter para ser lido sem ffmpeg
+NATIVE_RATES = (16000, 8000)
+
+FFMPEG = shutil.which("ffmpeg")
+# Extensões aceitas na busca de arquivos (as comprimidas só com ffmpeg instalado)
+AUDIO_EXTENSIONS = (".wav",) + ((".mp3", ".ogg", ".oga", ".opus", ".m4a", ".aac", ".flac", ".webm")
+                                if FFMPEG else ())
+
+
+def as_waveform(view):
+    """
+    Bloco para o KaldiRecognizer sem copiar: o vosk recebe um ponteiro para o
+    buffer (cffi). Sem o módulo interno do vosk, cai para bytes (uma cópia).
+    """
+    if _vosk_ffi is not None:
+        return _vosk_ffi.from_buffer(view)
+    return bytes(view)
+
+
+def waveform_feeder(rec):
+    """
+    Função bloco -> argumento do rec.AcceptWaveform. O KaldiRecognizer local
+    só aceita bytes ou buffer cffi (as_waveform, sem cópia); o serviço
+    residente (RemoteRecognizer) aceita qualquer buffer.
+    """
+    from servico_vosk import RemoteRecognizer
+    if isinstance(rec, RemoteRecognizer):
+        return lambda data: data
+    return as_waveform
+
+
+class DecoderPipe:
+    """
+    ffmpeg decodificando um arquivo para PCM 16 bits mono em `sample_rate`.
+    Iterar devolve memoryviews de um único buffer reaproveitado.
+    """
+
+    def __init__(self, path, sample_rate=SAMPLE_RATE, chunk_s=CHUNK_S, ffmpeg=None):
+        ffmpeg = ffmpeg or FFMPEG
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg não encontrado (sudo apt install ffmpeg)")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.chunk_bytes = int(chunk_s * sample_rate) * 2
+        self.bytes_out = 0
+        self.proc = subprocess.Popen(
+            [ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error",
+             "-i", path, "-map", "0:a:0", "-ac", "1", "-ar", str(sample_rate),
+             "-f", "s16le", "-acodec", "pcm_s16le", "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+
+    def __iter__(self):
+        buf = bytearray(self.chunk_bytes)
+        view = memoryview(buf)
+        stdout = self.proc.stdout
+        while True:
+            filled = 0
+            while filled < self.chunk_bytes:
+                n = stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            if filled:
+                self.bytes_out += filled
+                yield view[:filled]
+            if filled < self.chunk_bytes:
+                break
+        err = self.proc.stderr.read().decode("utf-8", errors="replace").strip()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg falhou em {self.path}: {err or self.proc.returncode}")
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdout.close()
+        self.proc.stderr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _wav_blocks(wf, chunk_frames):
+    try:
+        while True:
+            data = wf.readframes(chunk_frames)
+            if not data:
+                break
+            yield memoryview(data)
+    finally:
+        wf.close()
+
+
+def _pipe_blocks(pipe):
+    with pipe:
+        yield from pipe
+
+
+def open_audio(path, sample_rate=SAMPLE_RATE, chunk_s=CHUNK_S):
+    """
+    Abre qualquer arquivo de áudio e retorna (taxa, gerador de blocos PCM 16
+    bits mono). WAV mono 16 bits a 8/16 kHz é lido direto; o resto passa
+    pelo ffmpeg e sai em `sample_rate`.
+    """
+    try:
+        wf = wave.open(path, "rb")
+    except (wave.Error, EOFError):
+        wf = None
+    if wf is not None:
+        if (wf.getnchannels() == 1 and wf.getsampwidth() == 2 and wf.getcomptype() == "NONE"
+                and wf.getframerate() in NATIVE_RATES):
+            rate = wf.getframerate()
+            return rate, _wav_blocks(wf, int(chunk_s * rate))
+        wf.close()
+    return sample_rate, _pipe_blocks(DecoderPipe(path, sample_rate, chunk_s))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Decodifica um arquivo para PCM 16 kHz mono e mede a vazão")
+    p.add_argument("arquivo")
+    p.add_argument("--bloco", type=float, default=CHUNK_S, help="Segundos por bloco")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    try:
+        rate, blocks = open_audio(args.arquivo, chunk_s=args.bloco)
+        n_bytes = n_blocks = 0
+        for view in blocks:
+            n_bytes += len(view)
+            n_blocks += 1
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - t0
+    audio_s = n_bytes / (2.0 * rate)
+    print(f"{os.path.basename(args.arquivo)}: {audio_s:.1f} s de áudio a {rate} Hz em {n_blocks} blocos, "
+          f"decodificado em {elapsed:.2f} s ({audio_s / elapsed if elapsed else 0:.0f}x tempo real)")
+
+
+if __name__ == "__main__":
+    main()
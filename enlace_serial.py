@@ -0,0 +1,153 @@
+#pip install pyserial
+
+# Enlace serial compartilhado com o Arduino (Projeto Athena)
+#
+# Antes, cada envio lia a resposta direto da porta (readline com espera),
+# o que só funciona se nada mais chegar pela serial. Com telemetria e
+# outros quadros assíncronos, uma única thread leitora passa a ser a dona
+# da leitura e separa o que chega:
+#
+#   - quadros binários (primeiro byte conhecido, tamanho fixo) vão para o
+#     tratador registrado (ex: telemetria.py), que só os enfileira
+#   - linhas com prefixo registrado vão para o seu tratador
+#   - as demais linhas são respostas de comandos, entregues a request()
+#
+# Quadros binários só começam no início de uma linha: o firmware nunca os
+# envia no meio de uma resposta, e o primeiro byte (0xA5..0xAF) nunca inicia
+# uma linha UTF-8.
+#
+# O monitor de saúde (saude_serial.py) usa uma linha registrada ("pong").
+#
+# A escrita passa por um único lock, compartilhado com o canal de setpoints
+# (movimento_continuo.py aceita o enlace no lugar da porta).
+
+import time
+import queue
+import threading
+
+
+class SerialLink:
+    """Dona da porta serial: thread leitora, lock de escrita e fila de respostas."""
+
+    def __init__(self, ser):
+        self.ser = ser
+        self.lock = threading.Lock()
+        self.replies = queue.Queue()
+        self._frames = {}   # primeiro byte -> (tamanho, callback(quadro, t))
+        self._lines = {}    # prefixo -> callback(linha, t)
+        self._stop = threading.Event()
+        self._thread = None
+        self.bytes_in = 0
+        self.handler_errors = 0
+
+    # ------------------------------------------------------------ registro
+    def add_frame_handler(self, start_byte, size, callback):
+        """Quadros de tamanho fixo que começam com start_byte. O callback roda na thread leitora: deve ser rápido."""
+        self._frames[start_byte] = (size, callback)
+
+    def add_line_handler(self, prefix, callback):
+        """Linhas que começam com prefix (ex: "pong") não são tratadas como respostas."""
+        self._lines[prefix] = callback
+
+    # ------------------------------------------------------------ escrita
+    @property
+    def out_waiting(self):
+        return getattr(self.ser, "out_waiting", 0)
+
+    def write(self, data):
+        with self.lock:
+            self.ser.write(data)
+
+    def send_line(self, text):
+        with self.lock:
+            self.ser.write((text + "\n").encode("utf-8"))
+            self.ser.flush()
+
+    def request(self, text, timeout, alive=None):
+        """
+        Envia uma linha e espera a próxima resposta. Retorna o texto ou None no
+        timeout. Com `alive` (ex: LinkMonitor.is_up), desiste assim que ele
+        retornar False, sem esperar o timeout inteiro.
+        """
+        while True:
+            try:
+                self.replies.get_nowait()  # descarta respostas atrasadas
+            except queue.Empty:
+                break
+        self.send_line(text)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                _, line = self.replies.get(timeout=min(remaining, 0.1) if alive else remaining)
+                return line
+            except queue.Empty:
+                if alive is not None and not alive():
+                    return None
+
+    # ------------------------------------------------------------ leitura
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True, name="serial-leitor")
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _emit_line(self, raw, t):
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line:
+            return
+        for prefix, callback in self._lines.items():
+            if line.startswith(prefix):
+                try:
+                    callback(line, t)
+                except Exception:
+                    self.handler_errors += 1
+                return
+        self.replies.put((t, line))
+
+    def _read_loop(self):
+        pending = bytearray()   # bytes recebidos ainda não separados
+        line = bytearray()      # linha em montagem
+        while not self._stop.is_set():
+            try:
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
+            except Exception:
+                if self._stop.wait(0.5):
+                    break
+                continue
+            if not chunk:
+                continue
+            t = time.monotonic()
+            self.bytes_in += len(chunk)
+            pending += chunk
+            i = 0
+            n = len(pending)
+            while i < n:
+                if not line and pending[i] in self._frames:
+                    size, callback = self._frames[pending[i]]
+                    if n - i < size:
+                        break  # quadro incompleto: espera o resto
+                    try:
+                        callback(bytes(pending[i:i + size]), t)
+                    except Exception:
+                        self.handler_errors += 1
+                    i += size
+                    continue
+                j = pending.find(b"\n", i)
+                if j < 0:
+                    line += pending[i:]
+                    i = n
+                    break
+                line += pending[i:j]
+                self._emit_line(bytes(line), t)
+                line.clear()
+                i = j + 1
+            del pending[:i]
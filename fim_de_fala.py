@@ -0,0 +1,366 @@
+#pip install vosk numpy
+
+# Detecção de fim de fala para comandos curtos (Projeto Athena)
+#
+# Os comandos têm 1 a 3 palavras, mas o resultado final só sai quando o
+# endpointer genérico do Vosk decide que a frase acabou, e com blocksize=8000
+# o laço só olha o áudio a cada 500 ms. No modo comando:
+#
+#   - blocos de captura menores (padrão 1600 amostras = 100 ms)
+#   - um VAD de energia próprio (piso de ruído adaptativo) mede o silêncio
+#     depois da fala; passado "trailing_silence_ms", o laço chama
+#     FinalResult() na hora, sem esperar o endpointer do Vosk
+#   - se a versão do Vosk tiver SetEndpointerMode/SetEndpointerDelays, o
+#     endpointer interno também é ajustado para frases curtas
+#
+# Os limites ficam na seção [FIM_DE_FALA] de ~/Athena/config.ini. O
+# relatório compara latência de finalização x acerto de comandos num
+# corpus de gravações (cada nome.wav com a frase esperada em nome.txt).
+#
+# USO:
+#   python fim_de_fala.py --gravar ~/Athena/corpus          # grava o corpus (uma frase por comando)
+#   python fim_de_fala.py --relatorio ~/Athena/corpus [--modelo DIR]
+
+import os
+import sys
+import json
+import time
+import wave
+import glob
+import argparse
+import statistics
+import configparser
+
+import numpy as np
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+REPORT_FILE = os.path.expanduser("~/Athena/fim_de_fala_relatorio.json")
+CORPUS_DIR = os.path.expanduser("~/Athena/corpus")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+SAMPLE_RATE = 16000
+
+# Padrões do modo comando (sobrescritos pela seção [FIM_DE_FALA] do config.ini)
+DEFAULT_ENDPOINT = {
+    "blocksize": 1600,            # amostras por bloco (100 ms)
+    "trailing_silence_ms": 300,   # silêncio depois da fala para finalizar
+    "min_speech_ms": 150,         # fala mais curta que isso é ruído
+    "max_utterance_s": 4.0,       # força o final numa frase longa demais
+    "margin_db": 12.0,            # fala = energia acima do piso de ruído + margem
+    "noise_floor_db": -60.0,      # piso de ruído inicial (dBFS)
+    "vosk_mode": 1,               # EndpointerMode do Vosk (0 padrão, 1 curto), se suportado
+    "vosk_end_s": 0.3,            # SetEndpointerDelays: silêncio final do endpointer do Vosk
+}
+
+# Grade do relatório: blocos x silêncio final
+REPORT_BLOCKSIZES = (8000, 4000, 1600, 800)
+REPORT_SILENCES_MS = (200, 300, 500, 800)
+# Silêncio acrescentado ao fim de cada gravação na reprodução
+REPLAY_PAD_S = 1.5
+
+
+def load_endpoint_config():
+    """Lê a seção [FIM_DE_FALA] do config.ini, mantendo os padrões para chaves ausentes."""
+    cfg = dict(DEFAULT_ENDPOINT)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("FIM_DE_FALA"):
+        for key, default in DEFAULT_ENDPOINT.items():
+            if key in config["FIM_DE_FALA"]:
+                try:
+                    cfg[key] = type(default)(config["FIM_DE_FALA"][key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [FIM_DE_FALA], usando {default}")
+    return cfg
+
+
+def apply_vosk_endpointer(rec, cfg):
+    """Ajusta o endpointer interno do Vosk, se a versão instalada permitir. Retorna True se ajustou."""
+    if not hasattr(rec, "SetEndpointerMode"):
+        return False
+    rec.SetEndpointerMode(cfg["vosk_mode"])
+    if hasattr(rec, "SetEndpointerDelays"):
+        rec.SetEndpointerDelays(5.0, cfg["vosk_end_s"], cfg["max_utterance_s"])
+    return True
+
+
+class EnergyVAD:
+    """VAD de energia por bloco com piso de ruído adaptativo (int16 mono)."""
+
+    # Blocos iniciais usados só para medir o ruído de fundo
+    CALIBRATION_BLOCKS = 3
+
+    def __init__(self, sample_rate=SAMPLE_RATE, margin_db=12.0, noise_floor_db=-60.0):
+        self.sample_rate = sample_rate
+        self.margin_db = margin_db
+        self.noise_floor_db = noise_floor_db
+        self._calibration = []
+
+    def level_db(self, data):
+        x = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        if not x.size:
+            return -100.0
+        rms = np.sqrt(np.mean(x * x)) / 32768.0
+        return 20.0 * np.log10(rms + 1e-9)
+
+    def is_speech(self, data):
+        level = self.level_db(data)
+        if len(self._calibration) < self.CALIBRATION_BLOCKS:
+            self._calibration.append(level)
+            self.noise_floor_db = min(self._calibration)
+            return False
+        speech = level > self.noise_floor_db + self.margin_db
+        # Acompanha o ruído de fundo: rápido nos blocos sem fala, bem devagar
+        # na fala (um ruído que subiu e ficou não é tomado por fala para sempre)
+        self.noise_floor_db += (0.002 if speech else 0.05) * (level - self.noise_floor_db)
+        return speech
+
+
+class Endpointer:
+    """
+    Envolve um reconhecedor (KaldiRecognizer, RemoteRecognizer ou
+    SwappableRecognizer) e finaliza a frase assim que o áudio para.
+
+    accept(data) retorna o texto final (possivelmente vazio) quando a frase
+    termina, ou None enquanto ela continua. last_reason diz quem finalizou:
+    "vosk" (endpointer do reconhecedor), "silencio" (VAD) ou "limite";
+    last_result guarda o JSON cru do resultado (com as palavras, se SetWords).
+    """
+
+    def __init__(self, rec, cfg=None, sample_rate=SAMPLE_RATE, feed=None):
+        self.rec = rec
+        # Converte o bloco para o AcceptWaveform (ex: memoryview -> buffer cffi)
+        self.feed = feed or (lambda data: data)
+        self.cfg = cfg or load_endpoint_config()
+        self.sample_rate = sample_rate
+        self.vad = EnergyVAD(sample_rate, self.cfg["margin_db"], self.cfg["noise_floor_db"])
+        self.vosk_tuned = apply_vosk_endpointer(rec, self.cfg)
+        self.last_reason = None
+        self.last_result = None
+        self._reset_state()
+
+    def _reset_state(self):
+        self.speech_ms = 0.0
+        self.silence_ms = 0.0
+        self.utterance_ms = 0.0
+
+    def _final(self, raw, reason):
+        self._reset_state()
+        self.last_reason = reason
+        self.last_result = raw
+        return json.loads(raw).get("text", "").strip()
+
+    def accept(self, data):
+        block_ms = len(data) / 2.0 / self.sample_rate * 1000.0
+        speech = self.vad.is_speech(data)
+        if self.rec.AcceptWaveform(self.feed(data)):
+            return self._final(self.rec.Result(), "vosk")
+
+        if speech:
+            self.speech_ms += block_ms
+            self.silence_ms = 0.0
+        elif self.speech_ms:
+            self.silence_ms += block_ms
+        if self.speech_ms:
+            self.utterance_ms += block_ms
+
+        if self.speech_ms >= self.cfg["min_speech_ms"] and self.silence_ms >= self.cfg["trailing_silence_ms"]:
+            return self._final(self.rec.FinalResult(), "silencio")
+        if self.utterance_ms >= self.cfg["max_utterance_s"] * 1000.0:
+            return self._final(self.rec.FinalResult(), "limite")
+        if self.speech_ms and not speech and self.silence_ms >= self.cfg["trailing_silence_ms"]:
+            # Estalo curto (abaixo de min_speech_ms): descarta sem finalizar
+            self._reset_state()
+        return None
+
+    def PartialResult(self):
+        return self.rec.PartialResult()
+
+    def FinalResult(self):
+        self._reset_state()
+        return self.rec.FinalResult()
+
+
+# ---------------------------------------------------------------- corpus e relatório
+
+def read_wav_pcm(path):
+    """Lê um WAV mono int16 16 kHz (reamostra com interpolação linear se preciso)."""
+    with wave.open(path, "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: esperado WAV mono int16")
+        rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if rate != SAMPLE_RATE and pcm.size:
+        n_out = int(pcm.size * SAMPLE_RATE / rate)
+        pcm = np.interp(np.arange(n_out) * (rate / SAMPLE_RATE), np.arange(pcm.size), pcm).astype(np.int16)
+    return pcm
+
+
+def load_corpus(corpus_dir):
+    """Lista de (caminho, pcm, frase esperada ou None)."""
+    items = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.wav"))):
+        expected = None
+        txt = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(txt):
+            with open(txt, encoding="utf-8") as f:
+                expected = f.read().strip()
+        items.append((path, read_wav_pcm(path), expected))
+    return items
+
+
+def speech_end_s(pcm, cfg):
+    """Fim da fala (s) pelo VAD, em janelas de 10 ms, para medir a latência de finalização."""
+    win = SAMPLE_RATE // 100
+    n = pcm.size // win
+    if not n:
+        return 0.0
+    frames = pcm[:n * win].astype(np.float32).reshape(n, win)
+    level = 20.0 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0 + 1e-9)
+    floor = np.percentile(level, 10)
+    speech = np.nonzero(level > floor + cfg["margin_db"])[0]
+    return (speech[-1] + 1) * win / SAMPLE_RATE if speech.size else 0.0
+
+
+def replay(model, pcm, cfg, use_vad=True, grammar=None):
+    """
+    Reproduz uma gravação como se viesse do microfone, em blocos de cfg["blocksize"].
+    Retorna (texto final, latência em ms entre o fim da fala e o resultado final, motivo).
+    A latência soma o áudio que ainda precisou chegar e o tempo de decodificação.
+    """
+    from vosk import KaldiRecognizer
+    rec = KaldiRecognizer(model, SAMPLE_RATE, json.dumps(grammar)) if grammar else KaldiRecognizer(model, SAMPLE_RATE)
+    ep = Endpointer(rec, cfg) if use_vad else None
+    audio = np.concatenate([pcm, np.zeros(int(REPLAY_PAD_S * SAMPLE_RATE), dtype=np.int16)]).tobytes()
+    end_s = speech_end_s(pcm, cfg)
+    step = cfg["blocksize"] * 2
+    parts = []
+    for i in range(0, len(audio), step):
+        block = audio[i:i + step]
+        block_end_s = (i + len(block)) / 2.0 / SAMPLE_RATE
+        t0 = time.perf_counter()
+        if ep is not None:
+            text = ep.accept(block)
+            reason = ep.last_reason
+        elif rec.AcceptWaveform(block):
+            text, reason = json.loads(rec.Result()).get("text", "").strip(), "vosk"
+        else:
+            text = None
+        decode_ms = (time.perf_counter() - t0) * 1000.0
+        if text:
+            parts.append(text)
+            if block_end_s >= end_s:
+                return " ".join(parts), round((block_end_s - end_s) * 1000.0 + decode_ms, 1), reason
+    # Não finalizou nem com o silêncio acrescentado
+    parts.append(json.loads(rec.FinalResult()).get("text", "").strip())
+    return " ".join(p for p in parts if p), round((len(audio) / 2.0 / SAMPLE_RATE - end_s) * 1000.0, 1), "fim_do_audio"
+
+
+def _commands(text):
+    from intencoes import parse_sequence
+    intents = parse_sequence(text) if text else None
+    return [i.serial for i in intents] if intents else None
+
+
+def trade_off_report(model, corpus, base_cfg=None, grammar=None):
+    """Latência (mediana/p90) e acerto de comandos para cada blocksize x silêncio final, e a linha de base do Vosk."""
+    base_cfg = dict(base_cfg or load_endpoint_config())
+    configs = [("vosk 8000", dict(base_cfg, blocksize=8000), False)]
+    for bs in REPORT_BLOCKSIZES:
+        for sil in REPORT_SILENCES_MS:
+            configs.append((f"vad {bs}/{sil}ms", dict(base_cfg, blocksize=bs, trailing_silence_ms=sil), True))
+
+    rows = []
+    for name, cfg, use_vad in configs:
+        latencies, hits, scored = [], 0, 0
+        reasons = {}
+        for path, pcm, expected in corpus:
+            text, latency_ms, reason = replay(model, pcm, cfg, use_vad, grammar)
+            latencies.append(latency_ms)
+            reasons[reason] = reasons.get(reason, 0) + 1
+            if expected:
+                scored += 1
+                hits += _commands(text) == _commands(expected) and _commands(expected) is not None
+        latencies.sort()
+        rows.append({
+            "config": name,
+            "blocksize": cfg["blocksize"],
+            "trailing_silence_ms": cfg["trailing_silence_ms"] if use_vad else None,
+            "latency_median_ms": round(statistics.median(latencies), 1) if latencies else None,
+            "latency_p90_ms": latencies[min(len(latencies) - 1, int(0.9 * len(latencies)))] if latencies else None,
+            "accuracy": round(hits / scored, 3) if scored else None,
+            "reasons": reasons,
+        })
+    return rows
+
+
+def print_report(rows):
+    print(f"{'configuração':<18} {'mediana':>9} {'p90':>9} {'acerto':>7}  finalizado por")
+    for r in rows:
+        acc = f"{100 * r['accuracy']:.0f}%" if r["accuracy"] is not None else "-"
+        print(f"{r['config']:<18} {r['latency_median_ms']:>7} ms {r['latency_p90_ms']:>6} ms {acc:>7}  {r['reasons']}")
+
+
+def record_corpus(corpus_dir, seconds=3.0, repeats=1):
+    """Grava uma frase por comando (e variante canônica) do registro, com a frase esperada ao lado."""
+    import sounddevice as sd
+    from comandos import COMMANDS, LOCAL_COMMANDS
+    os.makedirs(corpus_dir, exist_ok=True)
+    phrases = [variants[0] for cmd, variants in COMMANDS.items() if cmd not in LOCAL_COMMANDS]
+    phrases += ["avançar dois metros", "girar noventa graus à direita", "ligar led e avançar"]
+    for rep in range(repeats):
+        for k, phrase in enumerate(phrases):
+            input(f"Enter e diga: \"{phrase}\" ({seconds:.0f} s)")
+            pcm = sd.rec(int(seconds * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype="int16")
+            sd.wait()
+            base = os.path.join(corpus_dir, f"{time.strftime('%Y%m%d_%H%M%S')}_{rep}_{k}")
+            with wave.open(base + ".wav", "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(pcm.tobytes())
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(phrase + "\n")
+    print(f"Corpus em {corpus_dir}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Fim de fala para comandos curtos: corpus e relatório latência x acerto")
+    p.add_argument("--gravar", metavar="DIR", help="Grava um corpus de comandos no diretório")
+    p.add_argument("--repeticoes", type=int, default=1, help="Repetições de cada frase ao gravar")
+    p.add_argument("--relatorio", metavar="DIR", nargs="?", const=CORPUS_DIR, help="Gera o relatório a partir do corpus")
+    p.add_argument("--modelo", default=SMALL_MODEL_DIR, help="Diretório do modelo Vosk")
+    p.add_argument("--gramatica", action="store_true", help="Restringe o reconhecedor aos comandos (como o tier 'grammar')")
+    args = p.parse_args()
+
+    if args.gravar:
+        record_corpus(args.gravar, repeats=max(1, args.repeticoes))
+        return
+    if not args.relatorio:
+        p.print_help()
+        return
+
+    corpus = load_corpus(args.relatorio)
+    if not corpus:
+        print(f"Erro: nenhum .wav em {args.relatorio} (grave com --gravar)")
+        sys.exit(1)
+    from vosk import Model, SetLogLevel
+    SetLogLevel(-1)
+    model = Model(args.modelo)
+    grammar = None
+    if args.gramatica:
+        from comandos import COMMAND_INDEX
+        from intencoes import grammar_words
+        grammar = COMMAND_INDEX.phrases + grammar_words() + ["[unk]"]
+    print(f"Corpus: {len(corpus)} gravações, modelo {args.modelo}")
+    rows = trade_off_report(model, corpus, grammar=grammar)
+    print_report(rows)
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, "w") as f:
+        json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "corpus": args.relatorio,
+                   "model": args.modelo, "rows": rows}, f, indent=2, ensure_ascii=False)
+    print(f"Relatório salvo em {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
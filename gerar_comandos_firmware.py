@@ -0,0 +1,191 @@
+# Gera o cabeçalho de comandos do firmware a partir de comandos.json (Projeto Athena)
+#
+# O vocabulário de comandos fica num único registro (comandos.json), usado pelo
+# índice Python (comandos.py), pela gramática do Vosk e por este gerador, que
+# escreve reconhecimento_de_voz_1/comandos.h (tabela de frases em PROGMEM,
+# ids, respostas e unidade/máximo dos comandos com parâmetro). O sketch só
+# trata os ids.
+#
+# USO:
+#   python gerar_comandos_firmware.py           # gera/atualiza o cabeçalho
+#   python gerar_comandos_firmware.py --check   # valida que Python e firmware concordam (sai com 1 se não)
+
+import os
+import re
+import sys
+import argparse
+
+from comandos import REGISTRY, COMMAND_INDEX, LOCAL_COMMANDS, PROTOCOL_COMMANDS, BATCH_PREFIX, firmware_phrases
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKETCH_DIR = os.path.join(BASE_DIR, "reconhecimento_de_voz_1")
+HEADER_FILE = os.path.join(SKETCH_DIR, "comandos.h")
+SKETCH_FILE = os.path.join(SKETCH_DIR, "reconhecimento_de_voz_1.ino")
+
+
+def _c_string(s):
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def firmware_entries():
+    return [e for e in REGISTRY if not e.get("local")]
+
+
+def help_text():
+    return "Comandos disponíveis: " + ", ".join(e["command"] for e in firmware_entries())
+
+
+def render_header():
+    entries = firmware_entries()
+    lines = [
+        "// GERADO AUTOMATICAMENTE por gerar_comandos_firmware.py a partir de comandos.json",
+        "// NÃO EDITE: altere comandos.json e rode  python gerar_comandos_firmware.py",
+        "#ifndef COMANDOS_H",
+        "#define COMANDOS_H",
+        "",
+        "#include <Arduino.h>",
+        "",
+        "enum CommandId : uint8_t {",
+        "  CMD_NONE = 0,",
+    ]
+    lines += [f"  CMD_{e['id']}," for e in entries]
+    lines += ["  CMD_COUNT", "};", ""]
+
+    # Frases aceitas (canônica + variantes), cada uma em flash
+    table = []
+    for e in entries:
+        seen = []
+        for phrase in [e["command"]] + e["variants"]:
+            if phrase not in seen:
+                seen.append(phrase)
+                table.append((phrase, e["id"]))
+    for i, (phrase, _) in enumerate(table):
+        lines.append(f"const char CMD_PHRASE_{i}[] PROGMEM = {_c_string(phrase)};")
+    lines += [
+        "",
+        "struct CommandEntry {",
+        "  const char* phrase;",
+        "  uint8_t id;",
+        "};",
+        "",
+        "const CommandEntry COMMAND_TABLE[] PROGMEM = {",
+    ]
+    lines += [f"  {{CMD_PHRASE_{i}, CMD_{cid}}}," for i, (_, cid) in enumerate(table)]
+    lines += ["};", f"const uint8_t COMMAND_TABLE_SIZE = {len(table)};", ""]
+
+    # Respostas por id (vazia = resposta tratada no sketch, ex: ajuda)
+    lines.append('const char CMD_REPLY_NONE[] PROGMEM = "";')
+    for e in entries:
+        lines.append(f"const char CMD_REPLY_{e['id']}[] PROGMEM = {_c_string(e.get('reply') or '')};")
+    lines.append("const char* const COMMAND_REPLIES[] PROGMEM = {")
+    lines.append("  CMD_REPLY_NONE,")
+    lines += [f"  CMD_REPLY_{e['id']}," for e in entries]
+    lines += ["};", ""]
+
+    # Parâmetro numérico por id ("avancar 200"): unidade e máximo (0 = não aceita)
+    lines.append('const char CMD_UNIT_NONE[] PROGMEM = "";')
+    for e in entries:
+        if e.get("param"):
+            lines.append(f"const char CMD_UNIT_{e['id']}[] PROGMEM = {_c_string(e['param']['unit'])};")
+    lines.append("const char* const COMMAND_UNITS[] PROGMEM = {")
+    lines.append("  CMD_UNIT_NONE,")
+    lines += [f"  CMD_UNIT_{e['id'] if e.get('param') else 'NONE'}," for e in entries]
+    lines += ["};", "const uint16_t COMMAND_PARAM_MAX[] PROGMEM = {", "  0,"]
+    lines += [f"  {e['param']['max'] if e.get('param') else 0}," for e in entries]
+    lines += ["};", ""]
+    lines.append(f"const char HELP_TEXT[] PROGMEM = {_c_string(help_text())};")
+    lines += [
+        "",
+        "// Procura a frase recebida na tabela (comparação direto da flash)",
+        "inline uint8_t lookupCommand(const char* s) {",
+        "  for (uint8_t i = 0; i < COMMAND_TABLE_SIZE; i++) {",
+        "    const char* p = (const char*)pgm_read_ptr(&COMMAND_TABLE[i].phrase);",
+        "    if (strcmp_P(s, p) == 0) {",
+        "      return pgm_read_byte(&COMMAND_TABLE[i].id);",
+        "    }",
+        "  }",
+        "  return CMD_NONE;",
+        "}",
+        "",
+        "inline const __FlashStringHelper* commandReply(uint8_t id) {",
+        "  return (const __FlashStringHelper*)pgm_read_ptr(&COMMAND_REPLIES[id]);",
+        "}",
+        "",
+        "inline const __FlashStringHelper* commandUnit(uint8_t id) {",
+        "  return (const __FlashStringHelper*)pgm_read_ptr(&COMMAND_UNITS[id]);",
+        "}",
+        "",
+        "inline uint16_t commandParamMax(uint8_t id) {",
+        "  return pgm_read_word(&COMMAND_PARAM_MAX[id]);",
+        "}",
+        "",
+        "#endif",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def check():
+    """Compara registro, cabeçalho gerado, sketch e índice Python. Retorna lista de problemas."""
+    problems = []
+    expected = render_header()
+    try:
+        with open(HEADER_FILE, encoding="utf-8") as f:
+            if f.read() != expected:
+                problems.append(f"{HEADER_FILE} desatualizado (rode: python gerar_comandos_firmware.py)")
+    except OSError:
+        problems.append(f"{HEADER_FILE} não existe (rode: python gerar_comandos_firmware.py)")
+
+    try:
+        with open(SKETCH_FILE, encoding="utf-8") as f:
+            sketch = f.read()
+    except OSError:
+        sketch = ""
+        problems.append(f"{SKETCH_FILE} não encontrado")
+    if sketch:
+        if '#include "comandos.h"' not in sketch:
+            problems.append("sketch não inclui comandos.h")
+        handled = set(re.findall(r"case\s+CMD_(\w+)\s*:", sketch))
+        for e in firmware_entries():
+            if e["id"] not in handled:
+                problems.append(f"firmware não trata CMD_{e['id']} ('{e['command']}')")
+        for cid in handled - {e["id"] for e in firmware_entries()} - {"NONE"}:
+            problems.append(f"firmware trata CMD_{cid}, que não está no registro")
+        # Comparações de texto à mão no sketch driblariam o registro
+        literals = re.findall(r'comando\s*==\s*"([^"]*)"', sketch)
+        literals += re.findall(r'strn?cmp\(\s*comando\s*,\s*"([^"]*)"', sketch)
+        for literal in literals:
+            if literal.strip() not in PROTOCOL_COMMANDS and literal != BATCH_PREFIX:
+                problems.append(f"sketch compara texto fixo \"{literal}\" fora do registro")
+
+    # Tudo o que o índice Python pode enviar precisa existir na tabela do firmware
+    accepted = set(firmware_phrases())
+    for command in COMMAND_INDEX.canonical:
+        if command not in LOCAL_COMMANDS and command not in accepted:
+            problems.append(f"Python envia '{command}', que o firmware não aceita")
+    return problems
+
+
+def main():
+    p = argparse.ArgumentParser(description="Gera reconhecimento_de_voz_1/comandos.h a partir de comandos.json")
+    p.add_argument("--check", action="store_true", help="Só valida se Python e firmware concordam")
+    args = p.parse_args()
+
+    if args.check:
+        problems = check()
+        if problems:
+            print("Python e firmware NÃO concordam:")
+            for msg in problems:
+                print(f"  - {msg}")
+            sys.exit(1)
+        print(f"Python e firmware concordam: {len(firmware_entries())} comandos, "
+              f"{len(firmware_phrases())} frases, {len(LOCAL_COMMANDS)} comando(s) local(is).")
+        return
+
+    with open(HEADER_FILE, "w", encoding="utf-8") as f:
+        f.write(render_header())
+    print(f"Gerado {HEADER_FILE}")
+
+
+if __name__ == "__main__":
+    main()
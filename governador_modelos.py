@@ -0,0 +1,227 @@
+# Governador de tiers de modelo (Projeto Athena)
+#
+# Substitui o limite estático MODEL_RAM_THRESHOLD_MB (verificado uma vez, com
+# perguntas ao usuário) por uma política contínua em tempo de execução:
+#
+#   - real-time factor (RTF) do reconhecedor: tempo de decodificação / tempo de áudio
+#   - atraso da fila de áudio (segundos de áudio esperando para decodificar)
+#   - MemAvailable (/proc/meminfo)
+#   - temperatura da CPU e throttling térmico (/sys/class/thermal, vcgencmd no Raspberry Pi)
+#
+# Quando o tier atual não acompanha (ou a memória/temperatura apertam) por
+# "hold_s" segundos, desce um tier (full -> small -> grammar). Quando tudo volta
+# ao normal por "recover_s" segundos, sobe um tier. Os limites ficam na seção
+# [GOVERNADOR] de ~/Athena/config.ini e cada decisão é exportada como evento
+# (lista em memória, callback e arquivo JSONL).
+
+import os
+import glob
+import json
+import time
+import shutil
+import threading
+import subprocess
+import configparser
+
+from modelos_vosk import TIERS, get_available_memory_mb
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+EVENTS_FILE = os.path.expanduser("~/Athena/governador_eventos.jsonl")
+
+# Limites padrão da política (sobrescritos pela seção [GOVERNADOR] do config.ini)
+DEFAULT_POLICY = {
+    "interval_s": 1.0,          # período de amostragem
+    "rtf_high": 0.9,            # RTF acima disso: o tier não acompanha
+    "rtf_low": 0.5,             # RTF abaixo disso: há folga para subir
+    "backlog_high_s": 1.5,      # segundos de áudio acumulados na fila
+    "backlog_low_s": 0.5,
+    "mem_low_mb": 300,          # MemAvailable abaixo disso: pressão de memória
+    "mem_high_mb": 900,         # MemAvailable acima disso: pode subir para o completo
+    "temp_high_c": 80.0,        # temperatura da CPU
+    "temp_low_c": 70.0,
+    "hold_s": 3.0,              # tempo em pressão antes de descer
+    "recover_s": 20.0,          # tempo em condições boas antes de subir
+    "unload_full_on_memory": 1, # libera o modelo completo ao descer por memória
+}
+
+
+def load_governor_config():
+    """Lê a seção [GOVERNADOR] do config.ini, mantendo os padrões para chaves ausentes."""
+    policy = dict(DEFAULT_POLICY)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("GOVERNADOR"):
+        for key, default in DEFAULT_POLICY.items():
+            if key in config["GOVERNADOR"]:
+                try:
+                    policy[key] = type(default)(config["GOVERNADOR"][key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [GOVERNADOR], usando {default}")
+    return policy
+
+
+def read_cpu_temperature_c():
+    """Maior temperatura entre as zonas térmicas (°C), ou None."""
+    temps = []
+    for path in glob.glob("/sys/class/thermal/thermal_zone*/temp"):
+        try:
+            with open(path) as f:
+                temps.append(int(f.read().strip()) / 1000.0)
+        except (OSError, ValueError):
+            pass
+    return max(temps) if temps else None
+
+
+_VCGENCMD = shutil.which("vcgencmd")
+
+
+def read_throttled():
+    """True se o firmware do Raspberry Pi reporta throttling térmico agora (bit 2), None se indisponível."""
+    if not _VCGENCMD:
+        return None
+    try:
+        out = subprocess.run([_VCGENCMD, "get_throttled"], capture_output=True, text=True, timeout=1).stdout
+        # saída: throttled=0x50005
+        value = int(out.strip().split("=")[1], 16)
+        return bool(value & 0x4)
+    except Exception:
+        return None
+
+
+class ModelGovernor:
+    """
+    Observa as métricas e troca o tier do ProgressiveModel.
+
+    backlog_fn: função que retorna os segundos de áudio esperando na fila (opcional).
+    on_event:   callback chamado com cada evento (dict).
+    """
+
+    def __init__(self, models, backlog_fn=None, policy=None, on_event=None, events_file=EVENTS_FILE):
+        self.models = models
+        self.backlog_fn = backlog_fn
+        self.policy = policy or load_governor_config()
+        self.on_event = on_event
+        self.events_file = events_file
+        self.events = []
+        self.last_sample = {}
+        self._pressure_since = None
+        self._good_since = None
+        self._stop = threading.Event()
+        self._thread = None
+        # O governador decide quando subir para o completo
+        self.models.auto_upgrade = False
+
+    def sample(self):
+        """Coleta as métricas de um período."""
+        audio_s, decode_s = self.models.take_decode_stats()
+        return {
+            "tier": self.models.tier,
+            "rtf": round(decode_s / audio_s, 3) if audio_s > 0 else None,
+            "backlog_s": round(self.backlog_fn(), 2) if self.backlog_fn else None,
+            "avail_mb": get_available_memory_mb(),
+            "temp_c": read_cpu_temperature_c(),
+            "throttled": read_throttled(),
+        }
+
+    def _pressure(self, m):
+        """Retorna o motivo de pressão (str) ou None."""
+        p = self.policy
+        if m["avail_mb"] is not None and m["avail_mb"] < p["mem_low_mb"]:
+            return "memory"
+        if m["throttled"] or (m["temp_c"] is not None and m["temp_c"] > p["temp_high_c"]):
+            return "thermal"
+        if m["rtf"] is not None and m["rtf"] > p["rtf_high"]:
+            return "rtf"
+        if m["backlog_s"] is not None and m["backlog_s"] > p["backlog_high_s"]:
+            return "backlog"
+        return None
+
+    def _healthy(self, m, target):
+        """True se há folga para subir para o tier 'target'."""
+        p = self.policy
+        if m["rtf"] is not None and m["rtf"] > p["rtf_low"]:
+            return False
+        if m["backlog_s"] is not None and m["backlog_s"] > p["backlog_low_s"]:
+            return False
+        if m["throttled"] or (m["temp_c"] is not None and m["temp_c"] > p["temp_low_c"]):
+            return False
+        if target == "full" and m["avail_mb"] is not None and m["avail_mb"] < p["mem_high_mb"]:
+            # O completo ainda não carregado precisa de memória livre
+            if "full" not in self.models.models:
+                return False
+        return True
+
+    def _emit(self, action, reason, m, **extra):
+        event = {"ts": round(time.time(), 3), "action": action, "reason": reason,
+                 "from": m["tier"], **extra, "metrics": m}
+        self.events.append(event)
+        if self.events_file:
+            try:
+                os.makedirs(os.path.dirname(self.events_file), exist_ok=True)
+                with open(self.events_file, "a") as f:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+        if self.on_event:
+            self.on_event(event)
+
+    def step(self, now=None):
+        """Uma iteração da política. Retorna o evento gerado ou None."""
+        now = time.monotonic() if now is None else now
+        m = self.sample()
+        self.last_sample = m
+        tier = m["tier"]
+        idx = TIERS.index(tier)
+        reason = self._pressure(m)
+
+        if reason:
+            self._good_since = None
+            if self._pressure_since is None:
+                self._pressure_since = now
+            if now - self._pressure_since < self.policy["hold_s"]:
+                return None
+            for lower in TIERS[idx + 1:]:
+                if self.models.switch_to(lower, reason=f"governador: {reason}"):
+                    self._pressure_since = None
+                    if reason == "memory" and self.policy["unload_full_on_memory"]:
+                        self.models.unload_full()
+                    self._emit("downgrade", reason, m, to=lower)
+                    return self.events[-1]
+            return None
+
+        self._pressure_since = None
+        if idx == 0:
+            return None
+        target = TIERS[idx - 1]
+        if not self._healthy(m, target):
+            self._good_since = None
+            return None
+        if self._good_since is None:
+            self._good_since = now
+        if now - self._good_since < self.policy["recover_s"]:
+            return None
+        if target == "full" and "full" not in self.models.models:
+            # Carrega em segundo plano; sobe no próximo passo em que estiver pronto
+            self.models.load_full_async()
+            return None
+        if self.models.switch_to(target, reason="governador: recuperado"):
+            self._good_since = None
+            self._emit("upgrade", "recovered", m, to=target)
+            return self.events[-1]
+        return None
+
+    def _run(self):
+        while not self._stop.wait(self.policy["interval_s"]):
+            try:
+                self.step()
+            except Exception as e:
+                print(f"Erro no governador de modelos: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="governador-modelos", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,225 @@
+# Intenções com parâmetros (Projeto Athena)
+#
+# "avancar" e "girar esquerda" no firmware são ações fixas: andar 2 metros
+# exigia vários comandos falados, cada um pagando reconhecimento, ida e volta
+# na serial e TTS. Este módulo lê a saída do reconhecedor e extrai o valor
+# numérico e a unidade da frase, inclusive números por extenso:
+#
+#   "avançar dois metros"              -> "avancar 200"        (cm)
+#   "girar noventa graus à direita"    -> "girar direita 90"   (graus)
+#   "gire meia volta para a esquerda"  -> "girar esquerda 180"
+#   "avançar um metro e meio e parar"  -> "lote:avancar 150;parar"
+#
+# O valor vai no fim da linha serial, na unidade base do comando (comandos.json,
+# campo "param"), e o firmware o executa como um único comando parametrizado.
+
+import re
+from collections import namedtuple
+
+from comandos import (COMMAND_INDEX, CONNECTIVES, PARAMETERS, strip_accents)
+
+# Números por extenso
+NUMBER_WORDS = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4,
+    "cinco": 5, "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10,
+    "onze": 11, "doze": 12, "treze": 13, "quatorze": 14, "catorze": 14, "quinze": 15,
+    "dezesseis": 16, "dezasseis": 16, "dezessete": 17, "dezassete": 17,
+    "dezoito": 18, "dezenove": 19, "dezanove": 19,
+    "vinte": 20, "trinta": 30, "quarenta": 40, "cinquenta": 50, "cincoenta": 50,
+    "sessenta": 60, "setenta": 70, "oitenta": 80, "noventa": 90,
+    "cem": 100, "cento": 100, "duzentos": 200, "duzentas": 200,
+    "trezentos": 300, "trezentas": 300, "quatrocentos": 400, "quatrocentas": 400,
+    "quinhentos": 500, "quinhentas": 500, "seiscentos": 600, "seiscentas": 600,
+    "setecentos": 700, "setecentas": 700, "oitocentos": 800, "oitocentas": 800,
+    "novecentos": 900, "novecentas": 900,
+}
+# Grafia com acento das palavras de NUMBER_WORDS que têm acento
+NUMBER_SPELLING = {"tres": "três"}
+THOUSAND = "mil"
+HALF_WORDS = {"meio", "meia"}
+
+# Palavra de unidade -> (unidade base, fator)
+UNIT_WORDS = {
+    "cm": ("cm", 1), "centimetro": ("cm", 1), "centimetros": ("cm", 1),
+    "m": ("cm", 100), "metro": ("cm", 100), "metros": ("cm", 100),
+    "grau": ("graus", 1), "graus": ("graus", 1),
+    "volta": ("graus", 360), "voltas": ("graus", 360),
+}
+
+# Unidades base que precisam ser ditas: "avançar dois" seria 2 cm, quase
+# certamente não o que se quis dizer. Ângulos sem unidade são graus
+# ("girar noventa à direita" -> "girar direita 90").
+UNIT_REQUIRED = {"cm"}
+
+Intent = namedtuple("Intent", "command value unit confidence method serial")
+
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)?|[^\W\d_]+")
+
+
+def tokenize(text: str):
+    """Minúsculas, sem acentos; números com dígitos ficam inteiros ("1,5")."""
+    return _TOKEN.findall(strip_accents(text.lower()))
+
+
+def _is_digits(token):
+    return token[0].isdigit()
+
+
+def _is_number_word(token):
+    return token in NUMBER_WORDS or token == THOUSAND or token in HALF_WORDS or _is_digits(token)
+
+
+def read_number(tokens, i):
+    """
+    Lê um número a partir de tokens[i] ("vinte e cinco", "mil e duzentos",
+    "dois e meio", "90", "1,5"). Retorna (valor, índice seguinte) ou None.
+    """
+    n = len(tokens)
+    if i >= n:
+        return None
+    if _is_digits(tokens[i]):
+        return float(tokens[i].replace(",", ".")), i + 1
+    if tokens[i] in HALF_WORDS:
+        return 0.5, i + 1
+    total = current = 0
+    found = False
+    j = i
+    while j < n:
+        w = tokens[j]
+        if w in NUMBER_WORDS:
+            current += NUMBER_WORDS[w]
+        elif w == THOUSAND:
+            total += max(current, 1) * 1000
+            current = 0
+        elif w == "e" and found and j + 1 < n and tokens[j + 1] in HALF_WORDS:
+            # "dois e meio"
+            return total + current + 0.5, j + 2
+        elif w == "e" and found and j + 1 < n and tokens[j + 1] in NUMBER_WORDS:
+            # "vinte e cinco": o "e" liga partes do número
+            pass
+        else:
+            break
+        found = True
+        j += 1
+    if not found:
+        return None
+    return total + current, j
+
+
+def find_quantity(tokens):
+    """
+    Procura o primeiro número (com unidade opcional) na frase.
+    Retorna (valor, unidade base ou None, fator, início, fim) ou None.
+    """
+    for i in range(len(tokens)):
+        if not _is_number_word(tokens[i]):
+            continue
+        number = read_number(tokens, i)
+        if number is None:
+            continue
+        value, j = number
+        unit, factor = None, 1
+        if j < len(tokens) and tokens[j] in UNIT_WORDS:
+            unit, factor = UNIT_WORDS[tokens[j]]
+            j += 1
+            # "um metro e meio", "uma volta e meia"
+            if j + 1 < len(tokens) and tokens[j] == "e" and tokens[j + 1] in HALF_WORDS:
+                value += 0.5
+                j += 2
+        elif tokens[i] in ("um", "uma") and j == i + 1:
+            continue  # "um"/"uma" sozinho, sem unidade, é artigo
+        return value, unit, factor, i, j
+    return None
+
+
+def _plain(match):
+    return Intent(match.command, None, None, match.confidence, match.method, match.command)
+
+
+def parse_intent(text, index=COMMAND_INDEX, parameters=PARAMETERS):
+    """
+    Reconhece um comando com valor opcional. Retorna Intent ou None
+    (comando desconhecido, unidade errada ou ausente numa distância, ou
+    valor fora do limite do comando).
+    """
+    tokens = tokenize(text)
+    quantity = find_quantity(tokens)
+    if quantity is None:
+        match = index.match(text)
+        return _plain(match) if match is not None else None
+
+    value, unit, factor, start, end = quantity
+    match = index.match(" ".join(tokens[:start] + tokens[end:]))
+    if match is None:
+        return None
+    param = parameters.get(match.command)
+    if param is None:
+        return None  # comando sem parâmetro ("ligar led dois")
+    if unit is not None and unit != param["unit"]:
+        return None  # "avançar noventa graus"
+    if unit is None and param["unit"] in UNIT_REQUIRED:
+        return None  # "avançar dois": distância sem unidade
+    amount = int(round(value * factor))
+    if not 1 <= amount <= param["max"]:
+        return None
+    return Intent(match.command, amount, param["unit"], match.confidence, match.method,
+                  f"{match.command} {amount}")
+
+
+def split_segments(tokens):
+    """Separa a frase nos conectivos, sem quebrar números ("vinte e cinco", "metro e meio")."""
+    segments, current = [], []
+    for k, w in enumerate(tokens):
+        if w in CONNECTIVES:
+            prev = tokens[k - 1] if k > 0 else ""
+            nxt = tokens[k + 1] if k + 1 < len(tokens) else ""
+            joins_number = (w == "e" and (_is_number_word(prev) or prev in UNIT_WORDS)
+                            and (nxt in NUMBER_WORDS or nxt in HALF_WORDS))
+            if not joins_number:
+                if current:
+                    segments.append(current)
+                current = []
+                continue
+        current.append(w)
+    if current:
+        segments.append(current)
+    return segments
+
+
+def parse_sequence(text, index=COMMAND_INDEX, parameters=PARAMETERS):
+    """
+    Um ou mais comandos, cada um com valor opcional ("avançar dois metros e
+    girar noventa graus à direita"). Retorna a lista de Intent em ordem, ou None.
+    """
+    tokens = tokenize(text)
+    if find_quantity(tokens) is None:
+        matches = index.match_sequence(text)
+        return [_plain(m) for m in matches] if matches else None
+
+    intent = parse_intent(text, index, parameters)
+    if intent is not None:
+        return [intent]
+
+    result = []
+    for seg in split_segments(tokens):
+        seg_text = " ".join(seg)
+        intent = parse_intent(seg_text, index, parameters)
+        if intent is not None:
+            result.append(intent)
+            continue
+        matches = index.match_sequence(seg_text)
+        if not matches:
+            return None
+        result.extend(_plain(m) for m in matches)
+    return result or None
+
+
+def grammar_words():
+    """
+    Palavras de número e unidade, para somar à gramática do reconhecedor.
+    Na grafia do vocabulário do modelo ("três"): sem acento a palavra fica
+    fora do vocabulário e o Vosk a descarta da gramática.
+    """
+    numbers = [NUMBER_SPELLING.get(w, w) for w in NUMBER_WORDS]
+    return numbers + [THOUSAND] + sorted(HALF_WORDS) + [
+        "centímetro", "centímetros", "metro", "metros", "grau", "graus", "volta", "voltas", "e"]
@@ -0,0 +1,322 @@
+#pip install vosk
+
+# Carregamento progressivo dos modelos Vosk (Projeto Athena)
+#
+# O modelo leve (~31MB) carrega em menos de 1 segundo, enquanto o completo
+# (~1.6GB) leva muitos segundos. No modo progressivo o robô começa a ouvir
+# com o modelo leve e o completo é carregado numa thread em segundo plano;
+# quando fica pronto, os reconhecedores são trocados na fronteira de uma
+# frase (após um resultado final ou em silêncio), sem perder áudio.
+#
+# Tiers, do mais preciso ao mais leve:
+#   "full"    -> modelo completo
+#   "small"   -> modelo leve
+#   "grammar" -> modelo leve restrito à lista de comandos (gramática)
+# O governador (governador_modelos.py) pode trocar de tier em tempo de execução.
+
+import os
+import sys
+import json
+import time
+import threading
+
+from vosk import Model, KaldiRecognizer
+
+import prewarm_modelo
+
+# Ajuste conforme seu ambiente
+FULL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+
+# Memória mínima disponível (MB) para tentar carregar o modelo completo em segundo plano
+MODEL_RAM_THRESHOLD_MB = 700
+
+TIERS = ("full", "small", "grammar")
+
+
+def get_available_memory_mb():
+    """Retorna memória disponível em MB (usa /proc/meminfo)"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except Exception:
+        pass
+    return None
+
+
+def warm_up(rec, sample_rate=16000, blocksize=8000, pcm=None):
+    """
+    Passa uma amostra embutida pelo reconhecedor duas vezes e o reinicia.
+
+    A primeira frase paga a inicialização preguiçosa e os caches frios do
+    decodificador; a segunda mostra a latência já aquecida. Retorna
+    {"cold_ms": ..., "warm_ms": ...} (tempo para decodificar a frase inteira).
+    """
+    if pcm is None:
+        from perfil_hardware import sample_audio
+        pcm = sample_audio()
+    if isinstance(rec, SwappableRecognizer):
+        # Direto no KaldiRecognizer: a decodificação fria não entra no RTF do governador
+        rec = rec.rec
+    step = blocksize * 2
+    times = []
+    for _ in range(2):
+        t0 = time.perf_counter()
+        for i in range(0, len(pcm), step):
+            rec.AcceptWaveform(pcm[i:i + step])
+        rec.FinalResult()
+        times.append((time.perf_counter() - t0) * 1000)
+        rec.Reset()
+    return {"cold_ms": round(times[0], 1), "warm_ms": round(times[1], 1),
+            "audio_ms": round(len(pcm) / (2.0 * sample_rate) * 1000, 1)}
+
+
+def log_tier(msg):
+    """Log das trocas de modelo com horário."""
+    print(f"[modelo {time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+
+class ProgressiveModel:
+    """
+    Mantém o modelo em uso (tier) e carrega o modelo completo em segundo plano.
+
+    tier: "small" ou "full". generation aumenta a cada troca, para que os
+    reconhecedores percebam que existe um modelo mais novo.
+    """
+
+    def __init__(self, small_dir=SMALL_MODEL_DIR, full_dir=FULL_MODEL_DIR,
+                 ram_threshold_mb=MODEL_RAM_THRESHOLD_MB):
+        self.small_dir = small_dir
+        self.full_dir = full_dir
+        self.ram_threshold_mb = ram_threshold_mb
+        self.models = {}
+        self.load_times = {}
+        self.tier = None
+        self.generation = 0
+        self.events = []
+        self.full_ready = threading.Event()
+        # Frases aceitas no tier "grammar" (normalmente COMMAND_INDEX.phrases)
+        self.grammar = None
+        # Com governador, o carregamento do completo não troca o tier sozinho
+        self.auto_upgrade = True
+        # Tempo de decodificação acumulado (para o real-time factor)
+        self.audio_s = 0.0
+        self.decode_s = 0.0
+        self._lock = threading.Lock()
+        self._t_start = None
+        self._thread = None
+
+    def _load(self, tier, path):
+        t0 = time.perf_counter()
+        model = Model(path)
+        self.load_times[tier] = time.perf_counter() - t0
+        self.models[tier] = model
+        return model
+
+    def _set_tier(self, tier, reason=None):
+        with self._lock:
+            previous = self.tier
+            self.tier = tier
+            self.generation += 1
+        since = time.perf_counter() - self._t_start
+        event = {
+            "from": previous,
+            "to": tier,
+            "load_s": round(self.load_times.get(tier, 0.0), 2),
+            "since_start_s": round(since, 2),
+        }
+        if reason:
+            event["reason"] = reason
+        self.events.append(event)
+        log_tier(f"{previous or '-'} -> {tier} (carregado em {event['load_s']} s, "
+                 f"{event['since_start_s']} s após o início)" + (f" motivo: {reason}" if reason else ""))
+
+    def start(self):
+        """Carrega o modelo leve (bloqueante) e dispara o completo em segundo plano."""
+        self._t_start = time.perf_counter()
+        small_exists = os.path.isdir(self.small_dir)
+        full_exists = os.path.isdir(self.full_dir)
+
+        if small_exists:
+            self._load("small", self.small_dir)
+            self._set_tier("small")
+        elif full_exists:
+            # Sem modelo leve não há o que servir antes: carrega o completo direto
+            self._load("full", self.full_dir)
+            self._set_tier("full")
+            self.full_ready.set()
+            return self
+        else:
+            raise FileNotFoundError(f"nenhum modelo Vosk encontrado em {self.small_dir} ou {self.full_dir}")
+
+        if full_exists:
+            avail_mb = get_available_memory_mb()
+            if avail_mb is not None and avail_mb < self.ram_threshold_mb:
+                log_tier(f"memória disponível ~{avail_mb}MB < {self.ram_threshold_mb}MB: "
+                         "modelo completo não será carregado")
+            else:
+                self.load_full_async()
+        return self
+
+    def load_full_async(self):
+        """Carrega o modelo completo numa thread (sem efeito se já estiver carregando/carregado)."""
+        if "full" in self.models or (self._thread is not None and self._thread.is_alive()):
+            return
+        if not os.path.isdir(self.full_dir):
+            return
+        self.full_ready.clear()
+        self._thread = threading.Thread(target=self._load_full, name="carrega-modelo-completo",
+                                        daemon=True)
+        self._thread.start()
+
+    def _load_full(self):
+        # Lê o modelo para o page cache em paralelo antes do Model() (ou espera a unit de boot)
+        status = prewarm_modelo.wait_ready()
+        if status is None or (status.get("state") != "running" and self.full_dir not in status.get("dirs", {})):
+            try:
+                prewarm_modelo.prewarm([self.full_dir], status_file=None)
+            except OSError as e:
+                log_tier(f"pré-aquecimento falhou: {e}")
+        log_tier(f"carregando modelo completo em segundo plano: {self.full_dir}")
+        try:
+            self._load("full", self.full_dir)
+        except Exception as e:
+            log_tier(f"falha ao carregar modelo completo, mantendo o leve: {e}")
+            return
+        # Aquece o modelo novo fora do laço de áudio, para a 1ª frase após a troca não ser lenta
+        try:
+            w = warm_up(KaldiRecognizer(self.models["full"], 16000))
+            log_tier(f"modelo completo aquecido: frio {w['cold_ms']} ms -> aquecido {w['warm_ms']} ms")
+        except Exception as e:
+            log_tier(f"aquecimento do modelo completo falhou: {e}")
+        self.full_ready.set()
+        if self.auto_upgrade:
+            self._set_tier("full")
+        else:
+            log_tier(f"modelo completo pronto em {self.load_times['full']:.2f} s (aguardando governador)")
+
+    def available_tiers(self):
+        tiers = []
+        if "full" in self.models:
+            tiers.append("full")
+        if "small" in self.models:
+            tiers.append("small")
+            if self.grammar:
+                tiers.append("grammar")
+        return tiers
+
+    def switch_to(self, tier, reason=None):
+        """Troca o tier em uso. Retorna False se o tier não estiver disponível."""
+        if tier == self.tier or tier not in self.available_tiers():
+            return False
+        self._set_tier(tier, reason)
+        return True
+
+    def unload_full(self):
+        """Libera o modelo completo (só quando ele não está em uso)."""
+        if self.tier == "full" or "full" not in self.models:
+            return False
+        # Reconhecedores antigos ainda podem segurar a referência até a próxima troca
+        del self.models["full"]
+        self.full_ready.clear()
+        log_tier("modelo completo liberado da memória")
+        return True
+
+    def record_decode(self, audio_s, decode_s):
+        """Acumula tempo de áudio e de decodificação (lido e zerado pelo governador)."""
+        with self._lock:
+            self.audio_s += audio_s
+            self.decode_s += decode_s
+
+    def take_decode_stats(self):
+        with self._lock:
+            stats = (self.audio_s, self.decode_s)
+            self.audio_s = 0.0
+            self.decode_s = 0.0
+        return stats
+
+    def current(self):
+        """Retorna (tier, generation, Model) em uso."""
+        with self._lock:
+            model = self.models["small" if self.tier == "grammar" else self.tier]
+            return self.tier, self.generation, model
+
+    def recognizer(self, sample_rate):
+        return SwappableRecognizer(self, sample_rate)
+
+
+class SwappableRecognizer:
+    """
+    KaldiRecognizer que troca de modelo na fronteira de frase.
+
+    Mesma interface do KaldiRecognizer. A troca acontece logo após um
+    resultado final ou enquanto não há fala em andamento (parcial vazio),
+    então nenhum trecho de fala é descartado.
+    """
+
+    def __init__(self, source, sample_rate):
+        self.source = source
+        self.sample_rate = sample_rate
+        self._result = None
+        self._words = False
+        self._build()
+
+    def _build(self):
+        self.tier, self.generation, model = self.source.current()
+        if self.tier == "grammar":
+            grammar = list(self.source.grammar) + ["[unk]"]
+            self.rec = KaldiRecognizer(model, self.sample_rate, json.dumps(grammar, ensure_ascii=False))
+        else:
+            self.rec = KaldiRecognizer(model, self.sample_rate)
+        if self._words:
+            self.rec.SetWords(True)
+
+    def _maybe_swap(self):
+        if self.source.generation == self.generation:
+            return
+        old = self.tier
+        t0 = time.perf_counter()
+        self._build()
+        log_tier(f"reconhecedor trocado {old} -> {self.tier} na fronteira de frase "
+                 f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+    def AcceptWaveform(self, data):
+        self._result = None
+        t0 = time.perf_counter()
+        final = self.rec.AcceptWaveform(data)
+        self.source.record_decode(len(data) / (2.0 * self.sample_rate), time.perf_counter() - t0)
+        if self.source.generation != self.generation:
+            if final:
+                # Guarda o resultado antes de trocar, para Result() ainda devolvê-lo
+                self._result = self.rec.Result()
+                self._maybe_swap()
+            elif not json.loads(self.rec.PartialResult()).get("partial"):
+                self._maybe_swap()
+        return final
+
+    def Result(self):
+        return self._result if self._result is not None else self.rec.Result()
+
+    def PartialResult(self):
+        return self.rec.PartialResult()
+
+    def FinalResult(self):
+        return self.rec.FinalResult()
+
+    def Reset(self):
+        self.rec.Reset()
+
+    def SetWords(self, enabled):
+        self._words = bool(enabled)
+        self.rec.SetWords(enabled)
+
+
+def load_progressive(small_dir=SMALL_MODEL_DIR, full_dir=FULL_MODEL_DIR):
+    """Inicia o carregamento progressivo; encerra o programa se não houver modelo."""
+    try:
+        return ProgressiveModel(small_dir, full_dir).start()
+    except Exception as e:
+        print(f"Erro: Não foi possível carregar os modelos: {e}")
+        sys.exit(1)
@@ -0,0 +1,241 @@
+#pip install pyserial numpy
+
+# Canal contínuo de setpoints para o Arduino (Projeto Athena)
+#
+# Os comandos de texto ("avancar", "parar") têm ida e volta bloqueante cada
+# um, o que impede controle em malha fechada ou direção suave. Este canal
+# envia velocidade/rumo numa taxa fixa (padrão 50 Hz) numa thread própria:
+#
+#   - set() só guarda o valor mais recente; vários set() entre dois envios
+#     viram um único quadro (coalescência), e a serial nunca acumula fila
+#   - o quadro é binário, 6 bytes, sem resposta:
+#       [0xA5][seq][velocidade int8 %][rumo int16 LE, décimos de grau][xor de seq..rumo]
+#     a 50 Hz são 300 B/s, cerca de 1/3 da linha a 9600 baud
+#   - o firmware tem um watchdog: sem quadros por 200 ms, para os motores
+#   - stats() expõe jitter do período de envio e quadros descartados (ticks
+#     perdidos pela thread, serial congestionada); firmware_stats() lê os
+#     contadores do Arduino (quadros, perdidos por lacuna no seq, inválidos,
+#     disparos do watchdog)
+#
+# USO (demonstração):
+#   python movimento_continuo.py --porta /dev/ttyUSB0 --hz 50 --segundos 10
+#   python movimento_continuo.py --simular          # sem Arduino, só estatísticas
+
+import time
+import struct
+import argparse
+import threading
+
+import numpy as np
+
+SERIAL_PORT = "/dev/ttyUSB0"
+BAUDRATE = 9600
+
+SETPOINT_START = 0xA5
+SETPOINT_RATE_HZ = 50
+# Bytes pendentes na saída da serial acima dos quais o quadro é descartado
+MAX_OUT_WAITING = 64
+# Intervalos guardados para o cálculo de jitter
+JITTER_HISTORY = 1000
+
+
+def encode_setpoint(seq, velocity, heading):
+    """Quadro de 6 bytes: velocidade em % (-100..100), rumo em graus (-180..180)."""
+    v = int(round(max(-100.0, min(100.0, velocity))))
+    h = int(round(max(-180.0, min(180.0, heading)) * 10))
+    body = struct.pack("<Bbh", seq & 0xFF, v, h)
+    check = 0
+    for b in body:
+        check ^= b
+    return bytes((SETPOINT_START,)) + body + bytes((check,))
+
+
+class SetpointStream:
+    """
+    Envia o setpoint mais recente numa taxa fixa, numa thread própria.
+    `lock` (opcional) é compartilhado com quem mais escreve na mesma serial.
+    """
+
+    def __init__(self, ser, rate_hz=SETPOINT_RATE_HZ, lock=None, max_out_waiting=MAX_OUT_WAITING):
+        self.ser = ser
+        self.period = 1.0 / rate_hz
+        self.lock = lock or threading.Lock()
+        self.max_out_waiting = max_out_waiting
+        self._value = None
+        self._dirty = False
+        self._value_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._seq = 0
+        self._times = np.zeros(JITTER_HISTORY)
+        self._n_times = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped_ticks = 0
+        self.dropped_busy = 0
+        self.write_errors = 0
+
+    def set(self, velocity, heading=0.0):
+        """Novo setpoint; substitui o anterior se ele ainda não foi enviado."""
+        with self._value_lock:
+            if self._dirty:
+                self.coalesced += 1
+            self._value = (velocity, heading)
+            self._dirty = True
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="setpoints")
+        self._thread.start()
+        return self
+
+    def stop(self, send_zero=True):
+        """Para a thread; envia velocidade zero para não depender só do watchdog."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if send_zero and self._value is not None:
+            self._write(encode_setpoint(self._seq, 0, self._value[1]))
+
+    def _write(self, frame):
+        with self.lock:
+            self.ser.write(frame)
+
+    def _run(self):
+        next_t = time.perf_counter()
+        while not self._stop.is_set():
+            next_t += self.period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                if self._stop.wait(delay):
+                    break
+            else:
+                # Atrasou mais que um período: pula os ticks perdidos em vez de enviar em rajada
+                missed = int(-delay // self.period)
+                if missed:
+                    self.dropped_ticks += missed
+                    next_t += missed * self.period
+            self._tick()
+
+    def _tick(self):
+        with self._value_lock:
+            value = self._value
+            self._dirty = False
+        if value is None:
+            return
+        if getattr(self.ser, "out_waiting", 0) > self.max_out_waiting:
+            self.dropped_busy += 1  # serial congestionada: o próximo tick leva o valor novo
+            return
+        try:
+            self._write(encode_setpoint(self._seq, *value))
+        except Exception:
+            self.write_errors += 1
+            return
+        self._seq = (self._seq + 1) & 0xFF
+        self._times[self._n_times % JITTER_HISTORY] = time.perf_counter()
+        self._n_times += 1
+        self.sent += 1
+
+    def stats(self):
+        """Contadores e jitter (ms) dos intervalos reais entre envios, sobre os últimos envios."""
+        n = min(self._n_times, JITTER_HISTORY)
+        out = {
+            "rate_hz": round(1.0 / self.period, 1),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped_ticks": self.dropped_ticks,
+            "dropped_busy": self.dropped_busy,
+            "write_errors": self.write_errors,
+        }
+        if n >= 2:
+            start = self._n_times % JITTER_HISTORY if self._n_times > JITTER_HISTORY else 0
+            times = np.roll(self._times[:n], -start)
+            jitter = (np.diff(times) - self.period) * 1000.0
+            out["jitter_ms"] = {
+                "mean": round(float(jitter.mean()), 3),
+                "std": round(float(jitter.std()), 3),
+                "p99": round(float(np.percentile(np.abs(jitter), 99)), 3),
+                "max": round(float(np.abs(jitter).max()), 3),
+            }
+            out["actual_hz"] = round(float((n - 1) / (times[-1] - times[0])), 1)
+        return out
+
+
+def firmware_stats(ser, lock=None, timeout=1.0):
+    """
+    Contadores do firmware ("estado_movimento"): quadros, perdidos, invalidos,
+    watchdog, ativo. Lê da serial: não usar com outro leitor ativo na mesma porta.
+    """
+    lock = lock or threading.Lock()
+    with lock:
+        ser.write(b"estado_movimento\n")
+        ser.flush()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        line = ser.readline().decode("utf-8", errors="replace").strip()
+        if line.startswith("movimento:"):
+            stats = {}
+            for item in line.split(":", 1)[1].split():
+                key, _, value = item.partition("=")
+                try:
+                    stats[key] = int(value)
+                except ValueError:
+                    stats[key] = value
+            return stats
+    return None
+
+
+class _NullSerial:
+    """Serial simulada: só conta bytes (para medir o jitter sem Arduino)."""
+    out_waiting = 0
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return len(data)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Demonstração do canal contínuo de setpoints")
+    p.add_argument("--porta", default=SERIAL_PORT)
+    p.add_argument("--hz", type=float, default=SETPOINT_RATE_HZ)
+    p.add_argument("--segundos", type=float, default=10.0)
+    p.add_argument("--simular", action="store_true", help="Sem Arduino: só mede o envio")
+    args = p.parse_args()
+
+    if args.simular:
+        ser = _NullSerial()
+    else:
+        import serial
+        ser = serial.Serial(args.porta, BAUDRATE, timeout=0.2)
+        time.sleep(2.0)  # Tempo para Arduino reiniciar
+        ser.reset_input_buffer()
+
+    stream = SetpointStream(ser, rate_hz=args.hz).start()
+    t0 = time.perf_counter()
+    last_print = t0
+    try:
+        # Velocidade constante e rumo oscilando (atualizado mais rápido que o envio: coalescência)
+        while time.perf_counter() - t0 < args.segundos:
+            t = time.perf_counter() - t0
+            stream.set(30.0, 45.0 * np.sin(2 * np.pi * 0.2 * t))
+            time.sleep(0.005)
+            if time.perf_counter() - last_print >= 1.0:
+                last_print = time.perf_counter()
+                print(stream.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
+    print("Envio:", stream.stats())
+    if not args.simular:
+        time.sleep(0.3)  # deixa o watchdog do firmware disparar
+        print("Firmware:", firmware_stats(ser))
+        ser.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+#pip install vosk sounddevice
+
+# Vários microfones num único processo (Projeto Athena)
+#
+# Um robô com microfone na frente e atrás (ou dois robôs no mesmo host)
+# precisava de um processo por microfone, cada um com a sua cópia do Model
+# (até 2 GB cada). Aqui:
+#
+#   - cada dispositivo abre o seu sd.RawInputStream e tem o seu reconhecedor
+#     (KaldiRecognizer), todos sobre o MESMO Model carregado uma vez
+#   - a decodificação roda num pool de threads do tamanho dos núcleos (o vosk
+#     libera o GIL dentro do AcceptWaveform); cada stream é decodificado por
+#     uma tarefa de cada vez, na ordem dos blocos
+#   - métricas por stream: áudio, tempo de decodificação (RTF), fila máxima,
+#     estouros da captura, frases, comandos vencidos e suprimidos
+#   - arbitragem: quando mais de um microfone ouve o mesmo comando, espera
+#     wait_s pelas outras cópias, despacha só a de maior confiança (média das
+#     palavras) e suprime repetições do mesmo comando por dedup_s
+#   - microfone que não abre em 16 kHz é aberto na taxa nativa e reamostrado
+#     (reamostragem.py) antes do reconhecedor
+#
+# Os tempos da arbitragem ficam na seção [MULTI_MICROFONE] de
+# ~/Athena/config.ini.
+#
+# USO (demonstração, só imprime os comandos):
+#   python multi_microfone.py --listar
+#   python multi_microfone.py --dispositivos 2,3 [--modelo DIR]
+#   test_vosk_microfone_serial_talkback6.py --microfones 2,3
+
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import configparser
+from concurrent.futures import ThreadPoolExecutor
+
+from saida_transcricao import enable_words, parse_result
+from reamostragem import Resampler, capture_rate
+from decodificar_audio import waveform_feeder
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+SAMPLE_RATE = 16000
+BLOCKSIZE = 8000
+
+# Padrões (sobrescritos pela seção [MULTI_MICROFONE] do config.ini)
+DEFAULT_MULTI = {
+    "wait_s": 0.15,     # espera pelas cópias do mesmo comando nos outros microfones
+    "dedup_s": 1.0,     # o mesmo comando de novo dentro desse tempo é suprimido
+    "workers": 0,       # threads de decodificação (0 = número de núcleos)
+}
+# Confiança assumida quando o reconhecedor não informa palavras
+DEFAULT_CONFIDENCE = 0.5
+
+
+def load_multi_config():
+    """Lê a seção [MULTI_MICROFONE] do config.ini, mantendo os padrões para chaves ausentes."""
+    cfg = dict(DEFAULT_MULTI)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("MULTI_MICROFONE"):
+        for key, default in DEFAULT_MULTI.items():
+            if key in config["MULTI_MICROFONE"]:
+                try:
+                    cfg[key] = type(default)(config["MULTI_MICROFONE"][key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [MULTI_MICROFONE], usando {default}")
+    return cfg
+
+
+def parse_devices(text):
+    """"2,3" ou "frente=2,tras=hw:1" -> [(nome, dispositivo)]; números viram índices do sounddevice."""
+    devices = []
+    for i, item in enumerate(x.strip() for x in text.split(",") if x.strip()):
+        name, _, dev = item.rpartition("=")
+        dev = int(dev) if dev.isdigit() else dev
+        devices.append((name or f"mic{i}", dev))
+    return devices
+
+
+class MicStream:
+    """Um dispositivo de captura, a sua fila de blocos e o seu reconhecedor."""
+
+    def __init__(self, name, device, rec, sample_rate=SAMPLE_RATE, blocksize=BLOCKSIZE):
+        self.name = name
+        self.device = device
+        self.rec = rec
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.words = enable_words(rec)
+        self.feed = waveform_feeder(rec)
+        if hasattr(rec, "backlog_fn"):
+            # Reconhecedor do serviço: informa a fila deste microfone ao governador
+            rec.backlog_fn = lambda: self.q.qsize() * self.blocksize / self.sample_rate
+        self.q = queue.Queue()
+        self.stream = None
+        self.resampler = None
+        self.on_block = None
+        self.scheduled = False
+        self.lock = threading.Lock()
+        self.stats = {"blocks": 0, "audio_s": 0.0, "decode_s": 0.0, "max_backlog": 0,
+                      "overflows": 0, "finals": 0, "won": 0, "suppressed": 0}
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            self.stats["overflows"] += 1
+        self.q.put(bytes(indata))
+        if self.on_block is not None:
+            self.on_block(self)
+
+    def open(self):
+        import sounddevice as sd
+        rate = capture_rate(self.device, 1, self.sample_rate)
+        blocksize = self.blocksize
+        if rate != self.sample_rate:
+            self.resampler = Resampler(rate, self.sample_rate)
+            blocksize = self.resampler.input_blocksize(self.blocksize)
+        self.stream = sd.RawInputStream(samplerate=rate, blocksize=blocksize,
+                                        device=self.device, dtype="int16", channels=1,
+                                        callback=self._callback)
+        self.stream.start()
+        return self
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def summary(self):
+        s = dict(self.stats)
+        s["rtf"] = round(s["decode_s"] / s["audio_s"], 3) if s["audio_s"] else None
+        s["audio_s"] = round(s["audio_s"], 1)
+        s["decode_s"] = round(s["decode_s"], 2)
+        if self.resampler is not None:
+            s["reamostragem"] = self.resampler.stats()
+        return s
+
+
+class Arbiter:
+    """
+    Junta o mesmo comando ouvido por vários microfones. submit() registra um
+    candidato; depois de wait_s, on_dispatch(chave, texto, vencedor, candidatos)
+    recebe o de maior confiança. Repetições dentro de dedup_s são suprimidas.
+    """
+
+    def __init__(self, on_dispatch, wait_s=DEFAULT_MULTI["wait_s"], dedup_s=DEFAULT_MULTI["dedup_s"]):
+        self.on_dispatch = on_dispatch
+        self.wait_s = wait_s
+        self.dedup_s = dedup_s
+        self._pending = {}   # chave -> (prazo, [(conf, stream, texto)])
+        self._recent = {}    # chave -> instante do último despacho
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="arbitro")
+        self._thread.start()
+
+    def submit(self, key, text, stream, conf):
+        now = time.monotonic()
+        with self._cond:
+            if key in self._pending:
+                self._pending[key][1].append((conf, stream, text))
+                return
+            if now - self._recent.get(key, -1e9) < self.dedup_s:
+                stream.stats["suppressed"] += 1
+                return
+            self._pending[key] = (now + self.wait_s, [(conf, stream, text)])
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                while not self._stop:
+                    now = time.monotonic()
+                    due = [k for k, (deadline, _) in self._pending.items() if deadline <= now]
+                    if due:
+                        break
+                    timeout = min((d for d, _ in self._pending.values()), default=now + 1.0) - now
+                    self._cond.wait(timeout)
+                if self._stop:
+                    # Ao fechar, despacha o que ainda aguardava a janela de espera
+                    if not self._pending:
+                        return
+                    due = list(self._pending)
+                ready = [(k, self._pending.pop(k)[1]) for k in due]
+                for k, _ in ready:
+                    self._recent[k] = now
+            for key, candidates in ready:
+                best = max(candidates, key=lambda c: c[0])
+                conf, winner, text = best
+                winner.stats["won"] += 1
+                for c in candidates:
+                    if c is not best:
+                        c[1].stats["suppressed"] += 1
+                self.on_dispatch(key, text, winner, candidates)
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join()
+
+
+class MultiMic:
+    """
+    Streams sobre um Model compartilhado, decodificados num pool de threads.
+    key_fn(texto) -> chave do comando (ou None: frase sem comando, vai para
+    on_text); comandos passam pela arbitragem e chegam em on_dispatch.
+    on_utterance(u, stream) recebe toda frase (transcrição), uma por vez.
+    close() descarrega o áudio pendente de cada reconhecedor (FinalResult).
+    """
+
+    def __init__(self, streams, key_fn, on_dispatch, on_text=None, cfg=None, on_utterance=None):
+        self.cfg = cfg or load_multi_config()
+        self.streams = streams
+        self.key_fn = key_fn
+        self.on_text = on_text
+        self.on_utterance = on_utterance
+        self._utterance_lock = threading.Lock()
+        workers = self.cfg["workers"] or min(len(streams), os.cpu_count() or 1)
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="decodifica")
+        self.arbiter = Arbiter(on_dispatch, self.cfg["wait_s"], self.cfg["dedup_s"])
+        for s in streams:
+            s.on_block = self._schedule
+
+    def _schedule(self, stream):
+        # Uma tarefa por stream de cada vez: o reconhecedor não é compartilhado entre threads
+        with stream.lock:
+            backlog = stream.q.qsize()
+            if backlog > stream.stats["max_backlog"]:
+                stream.stats["max_backlog"] = backlog
+            if stream.scheduled:
+                return
+            stream.scheduled = True
+        self.pool.submit(self._drain, stream)
+
+    def _drain(self, stream):
+        while True:
+            try:
+                data = stream.q.get_nowait()
+            except queue.Empty:
+                with stream.lock:
+                    if stream.q.empty():
+                        stream.scheduled = False
+                        return
+                continue
+            if stream.resampler is not None:
+                data = stream.resampler.process(data)
+            t0 = time.perf_counter()
+            final = stream.rec.AcceptWaveform(stream.feed(data))
+            stream.stats["decode_s"] += time.perf_counter() - t0
+            stream.stats["audio_s"] += len(data) / (2.0 * stream.sample_rate)
+            stream.stats["blocks"] += 1
+            if final:
+                self._final(stream, stream.rec.Result())
+
+    def _final(self, stream, raw):
+        u = parse_result(raw, source=stream.name)
+        if u is None:
+            return
+        stream.stats["finals"] += 1
+        if self.on_utterance is not None:
+            # Decodificadores em threads diferentes: o escritor recebe uma frase por vez
+            with self._utterance_lock:
+                self.on_utterance(u, stream)
+        try:
+            key = self.key_fn(u.text)
+        except Exception:
+            key = None
+        if key is None:
+            if self.on_text is not None:
+                self.on_text(u.text, stream)
+            return
+        self.arbiter.submit(key, u.text, stream, u.conf if u.conf is not None else DEFAULT_CONFIDENCE)
+
+    def start(self):
+        for s in self.streams:
+            s.open()
+        return self
+
+    def close(self):
+        for s in self.streams:
+            s.close()
+        self.pool.shutdown(wait=True)
+        # Fim da captura: a última frase de cada microfone ainda está no reconhecedor
+        for s in self.streams:
+            try:
+                self._final(s, s.rec.FinalResult())
+            except Exception as e:
+                print(f"Aviso: falha ao finalizar {s.name}: {e}")
+        self.arbiter.close()
+
+    def stats(self):
+        return {s.name: s.summary() for s in self.streams}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Demonstração: vários microfones sobre um único modelo Vosk")
+    p.add_argument("--dispositivos", help='Ex: "2,3" ou "frente=2,tras=3"')
+    p.add_argument("--modelo", default=SMALL_MODEL_DIR)
+    p.add_argument("--listar", action="store_true", help="Lista os dispositivos de entrada")
+    args = p.parse_args()
+
+    import sounddevice as sd
+    if args.listar or not args.dispositivos:
+        print(sd.query_devices())
+        return
+
+    from vosk import Model, KaldiRecognizer
+    from comandos import COMMAND_INDEX, split_commands
+    from intencoes import parse_sequence
+
+    model = Model(args.modelo)
+    streams = [MicStream(name, dev, KaldiRecognizer(model, SAMPLE_RATE)) for name, dev in parse_devices(args.dispositivos)]
+
+    def key_fn(text):
+        intents = parse_sequence(text, COMMAND_INDEX)
+        return tuple(i.serial for i in intents) if intents else None
+
+    def on_dispatch(key, text, winner, candidates):
+        others = ", ".join(f"{s.name} {c:.2f}" for c, s, _ in candidates if s is not winner)
+        local, line = split_commands(list(key))
+        sent = [c for c in [line] + local if c is not None]
+        print(f"Comando(s) {sent} de {winner.name} ('{text}')" + (f" | também ouviram: {others}" if others else ""))
+
+    multi = MultiMic(streams, key_fn, on_dispatch,
+                     on_text=lambda text, s: print(f"[{s.name}] {text} (sem comando)"))
+    multi.start()
+    print(f"Ouvindo {len(streams)} microfones com {multi.workers} thread(s) de decodificação. Ctrl+C para sair.")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(multi.stats(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        multi.close()
+    print(json.dumps(multi.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
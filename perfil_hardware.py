@@ -0,0 +1,293 @@
+#pip install vosk numpy
+
+# Perfil de hardware (Projeto Athena)
+#
+# choose_model(), load_model_and_measure() e prompt_yes_no() esperam input()
+# e travam um robô sem teclado iniciado pelo systemd. Este módulo mede UMA vez
+# o hardware (núcleos, RAM, velocidade de leitura do disco do modelo e
+# real-time factor de cada modelo instalado numa amostra de áudio embutida),
+# salva o resultado em ~/Athena/perfil_hardware.json e, nas inicializações
+# seguintes, escolhe modelo, blocksize e backend de TTS a partir do perfil,
+# sem perguntas e sem refazer os testes.
+#
+# USO:
+#   python perfil_hardware.py            # mostra o perfil (mede se ainda não existir)
+#   python perfil_hardware.py --reprobe  # mede novamente
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import subprocess
+import tempfile
+import wave
+import argparse
+import functools
+
+import numpy as np
+
+# Ajuste conforme seu ambiente
+FULL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+MODEL_DIRS = {
+    "small": SMALL_MODEL_DIR,
+    "full": FULL_MODEL_DIR,
+}
+SAMPLE_RATE = 16000
+
+PROFILE_FILE = os.path.expanduser("~/Athena/perfil_hardware.json")
+PROFILE_VERSION = 1
+
+# Frase usada para gerar a amostra embutida (espeak-ng), se disponível
+SAMPLE_TEXT = "ligar led, avançar, girar cabeça, parar"
+
+# Limite de leitura no teste de disco (MB) para não demorar demais no cartão SD
+DISK_PROBE_MAX_MB = 256
+# Tamanho do arquivo temporário gravado para o teste de disco (MB)
+DISK_PROBE_SCRATCH_MB = 64
+
+# RTF máximo para considerar que o modelo completo acompanha o áudio com folga
+FULL_MODEL_MAX_RTF = 0.5
+# Memória total mínima (MB) para usar o modelo completo
+FULL_MODEL_MIN_TOTAL_MB = 3000
+
+
+def read_meminfo_mb():
+    """Retorna (MemTotal, MemAvailable) em MB."""
+    total = avail = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    total = int(line.split()[1]) // 1024
+                elif line.startswith("MemAvailable:"):
+                    avail = int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return total, avail
+
+
+def cpu_model_name():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.lower().startswith(("model name", "hardware", "model\t")):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+def fingerprint():
+    """Identifica o hardware e os modelos instalados; se mudar, o perfil é refeito."""
+    total_mb, _ = read_meminfo_mb()
+    return {
+        "host": socket.gethostname(),
+        "cpu": cpu_model_name(),
+        "cores": os.cpu_count(),
+        "total_mb": total_mb,
+        "models": sorted(n for n, p in MODEL_DIRS.items() if os.path.isdir(p)),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def sample_audio(seconds=3.0):
+    """
+    Amostra de áudio embutida (int16 mono 16 kHz, bytes).
+    Usa espeak-ng para sintetizar uma frase de comandos; sem espeak, gera um
+    sinal sintético com harmônicos modulados (parecido com voz).
+    """
+    espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+    if espeak:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            subprocess.run([espeak, "-v", "pt-br", "-w", path, SAMPLE_TEXT],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+            with wave.open(path, "rb") as wf:
+                rate = wf.getframerate()
+                pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            if pcm.size:
+                if rate != SAMPLE_RATE:
+                    n_out = int(pcm.size * SAMPLE_RATE / rate)
+                    pcm = np.interp(np.arange(n_out) * (rate / SAMPLE_RATE),
+                                    np.arange(pcm.size), pcm).astype(np.int16)
+                return pcm.tobytes()
+        except Exception:
+            pass
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 140.0 + 30.0 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 1.5 * t), 0, None)  # "sílabas"
+    signal = 0.3 * voiced * envelope + 0.005 * np.random.default_rng(0).standard_normal(t.size)
+    return (signal / np.abs(signal).max() * 12000).astype(np.int16).tobytes()
+
+
+def measure_disk_read(model_dir, max_mb=DISK_PROBE_MAX_MB):
+    """
+    Velocidade de leitura (MB/s) do disco onde está o modelo, com cache descartado antes.
+    Mede num arquivo temporário ao lado do modelo: descartar o cache dos
+    próprios arquivos do modelo desfaria o pré-aquecimento (prewarm_modelo.py).
+    """
+    size = min(max_mb, DISK_PROBE_SCRATCH_MB) * 1024 * 1024
+    chunk = os.urandom(1024 * 1024)
+    try:
+        fd, path = tempfile.mkstemp(prefix=".athena_disco_", dir=os.path.dirname(os.path.abspath(model_dir)))
+    except OSError:
+        return None
+    try:
+        with os.fdopen(fd, "wb", buffering=0) as f:
+            for _ in range(size // len(chunk)):
+                f.write(chunk)
+            os.fsync(f.fileno())
+        fd = os.open(path, os.O_RDONLY)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        total = 0
+        buf = bytearray(len(chunk))
+        t0 = time.perf_counter()
+        with os.fdopen(fd, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                total += n
+        elapsed = time.perf_counter() - t0
+    except OSError:
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    if not total or not elapsed:
+        return None
+    return round(total / (1024 * 1024) / elapsed, 1)
+
+
+def measure_model(model_dir, pcm, blocksize=8000):
+    """Carrega o modelo e mede tempo de carga e RTF na amostra."""
+    from vosk import Model, KaldiRecognizer
+    t0 = time.perf_counter()
+    model = Model(model_dir)
+    load_s = time.perf_counter() - t0
+    rec = KaldiRecognizer(model, SAMPLE_RATE)
+    step = blocksize * 2
+    t0 = time.perf_counter()
+    for i in range(0, len(pcm), step):
+        rec.AcceptWaveform(pcm[i:i + step])
+    rec.FinalResult()
+    decode_s = time.perf_counter() - t0
+    audio_s = len(pcm) / (2.0 * SAMPLE_RATE)
+    return {"load_s": round(load_s, 2), "rtf": round(decode_s / audio_s, 3)}
+
+
+def probe():
+    """Mede o hardware e os modelos instalados. Demora (carrega cada modelo uma vez)."""
+    print("Medindo hardware (uma única vez)...")
+    total_mb, avail_mb = read_meminfo_mb()
+    profile = {
+        "version": PROFILE_VERSION,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "fingerprint": fingerprint(),
+        "avail_mb_at_probe": avail_mb,
+        "tts": {
+            "espeak": bool(shutil.which("espeak-ng") or shutil.which("espeak")),
+        },
+        "models": {},
+    }
+    pcm = sample_audio()
+    for name, path in MODEL_DIRS.items():
+        if not os.path.isdir(path):
+            continue
+        print(f"  modelo '{name}': leitura de disco...")
+        info = {"path": path, "disk_mb_s": measure_disk_read(path)}
+        try:
+            print(f"  modelo '{name}': carregamento e RTF...")
+            info.update(measure_model(path, pcm))
+        except Exception as e:
+            info["error"] = str(e)
+        profile["models"][name] = info
+        print(f"  modelo '{name}': {info}")
+    profile["choice"] = decide(profile)
+    return profile
+
+
+def decide(profile):
+    """Escolhe modelo, blocksize e TTS a partir das medidas."""
+    models = profile["models"]
+    total_mb = profile["fingerprint"]["total_mb"]
+    full = models.get("full", {})
+    small = models.get("small", {})
+
+    model = None
+    if "rtf" in full and full["rtf"] <= FULL_MODEL_MAX_RTF and (total_mb is None or total_mb >= FULL_MODEL_MIN_TOTAL_MB):
+        model = "full"
+    elif "rtf" in small:
+        model = "small"
+    elif "rtf" in full:
+        model = "full"
+
+    # Blocos menores = resposta mais rápida, mas mais chamadas ao decodificador
+    rtf = models.get(model, {}).get("rtf", 1.0) if model else 1.0
+    blocksize = 4000 if rtf < 0.3 else 8000
+
+    # espeak local responde sem rede; sem ele, tenta online com fallback
+    tts = "OFFLINE" if profile["tts"]["espeak"] else "AUTO"
+    return {"model": model, "model_dir": MODEL_DIRS.get(model), "blocksize": blocksize, "tts_mode": tts}
+
+
+def load_profile(path=PROFILE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_profile(profile, path=PROFILE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def get_profile(reprobe=False, path=PROFILE_FILE):
+    """
+    Retorna o perfil salvo; mede e salva apenas se não existir, se o
+    hardware/modelos mudaram ou se reprobe=True.
+    """
+    profile = None if reprobe else load_profile(path)
+    if profile is not None:
+        if profile.get("version") == PROFILE_VERSION and profile.get("fingerprint") == fingerprint():
+            return profile
+        print("Hardware ou modelos mudaram desde o último perfil: medindo novamente.")
+    profile = probe()
+    save_profile(profile, path)
+    print(f"Perfil salvo em {path}")
+    return profile
+
+
+def main():
+    p = argparse.ArgumentParser(description="Perfil de hardware do Projeto Athena")
+    p.add_argument("--reprobe", action="store_true", help="Mede novamente mesmo se já houver perfil salvo")
+    args = p.parse_args()
+    profile = get_profile(reprobe=args.reprobe)
+    if profile["choice"]["model"] is None:
+        print("Erro: nenhum modelo Vosk utilizável encontrado.")
+        sys.exit(1)
+    print(json.dumps(profile, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#pip install numpy vosk
+
+# Pré-processamento do áudio antes do reconhecedor (Projeto Athena)
+#
+# Os blocos int16 do callback() iam direto para o AcceptWaveform: ruído dos
+# motores, offset DC de placas baratas e ganho do microfone variando com a
+# distância viravam reconhecimento errado e comandos repetidos. FrontEnd
+# trata cada bloco, só com operações vetorizadas do NumPy sobre buffers
+# alocados uma vez:
+#
+#   1. remoção de DC: média móvel exponencial das médias dos blocos
+#   2. detecção de clipping: conta amostras no limite do int16 (o ganho do
+#      microfone está alto demais; isso o software não conserta)
+#   3. supressão de ruído estacionário: STFT de 32 ms com 50% de sobreposição
+#      (janela raiz de Hann, todos os quadros do bloco numa FFT só),
+#      subtração espectral contra o ruído estimado nos quadros quietos, com
+#      atenuação máxima limitada (suppress_db) para não criar "ruído musical"
+#   4. AGC: leva a fala ao nível alvo, ataque rápido e liberação lenta, ganho
+#      aplicado em rampa dentro do bloco para não dar degrau
+#
+# A saída tem o mesmo número de amostras da entrada, com atraso fixo de um
+# quadro (32 ms). bypass = True devolve o bloco intacto: serve para comparar
+# A/B com o mesmo áudio. stats() mostra µs por bloco, ganho, ruído e clipping.
+# Os parâmetros ficam na seção [PRE_PROCESSAMENTO] de ~/Athena/config.ini.
+#
+# USO:
+#   python pre_processamento.py gravacao.wav -o tratado.wav
+#   python pre_processamento.py gravacao.wav --ab [--modelo DIR]   # transcreve com e sem
+#   test_vosk_microfone_serial_talkback6.py --pre-processamento
+
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+import configparser
+
+import numpy as np
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+SAMPLE_RATE = 16000
+BLOCKSIZE = 8000
+# Quadro da STFT (amostras) e avanço
+FRAME = 512
+HOP = FRAME // 2
+# Amostras acima disto (em módulo) contam como clipping
+CLIP_LEVEL = 32700
+
+# Padrões (sobrescritos pela seção [PRE_PROCESSAMENTO] do config.ini)
+DEFAULT_FRONTEND = {
+    "bypass": False,          # True = devolve o áudio sem tratamento (comparação A/B)
+    "dc_tau_s": 1.0,          # constante de tempo da estimativa de DC
+    "suppress_db": 12.0,      # atenuação máxima da supressão de ruído (0 = desligada)
+    "oversubtract": 1.5,      # fator da subtração espectral
+    "noise_adapt": 0.1,       # peso dos quadros quietos na estimativa de ruído
+    "target_dbfs": -20.0,     # nível alvo da fala no AGC (0 = AGC desligado)
+    "max_gain_db": 20.0,
+    "min_gain_db": -10.0,
+    "attack": 0.5,            # peso do ganho novo quando ele precisa cair
+    "release": 0.1,           # peso do ganho novo quando ele pode subir
+}
+
+
+def load_frontend_config():
+    """Lê a seção [PRE_PROCESSAMENTO] do config.ini, mantendo os padrões para chaves ausentes."""
+    cfg = dict(DEFAULT_FRONTEND)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("PRE_PROCESSAMENTO"):
+        section = config["PRE_PROCESSAMENTO"]
+        for key, default in DEFAULT_FRONTEND.items():
+            if key in section:
+                try:
+                    cfg[key] = section.getboolean(key) if isinstance(default, bool) else type(default)(section[key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [PRE_PROCESSAMENTO], usando {default}")
+    return cfg
+
+
+def _db(power):
+    return 10.0 * np.log10(power + 1e-12)
+
+
+class FrontEnd:
+    """
+    DC, clipping, supressão de ruído e AGC em blocos de PCM 16 bits mono.
+    process(data) -> PCM com o mesmo número de amostras (memoryview do buffer
+    interno, válida até o próximo bloco; em bypass, o próprio data).
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, blocksize=BLOCKSIZE, cfg=None):
+        self.cfg = cfg or load_frontend_config()
+        self.sample_rate = sample_rate
+        self.bypass = self.cfg["bypass"]
+        self.window = np.sqrt(np.hanning(FRAME + 1)[:FRAME]).astype(np.float32)
+        self.floor = 10.0 ** (-self.cfg["suppress_db"] / 20.0)
+        # Entrada pendente: começa com FRAME - HOP zeros (o primeiro quadro "vê" o passado)
+        self._in_len = FRAME - HOP
+        # Saída pronta: começa com meio quadro de silêncio; com o passado acima,
+        # o atraso fixo fica em um quadro
+        self._out_len = HOP
+        self._in = self._out = None
+        self._alloc(blocksize)
+        self._tail = np.zeros(HOP, dtype=np.float32)
+        # Prepara o plano da FFT agora, para o primeiro bloco não pagar por isso
+        np.fft.irfft(np.fft.rfft(self._in[:FRAME]), n=FRAME)
+        # Estado
+        self.dc = 0.0
+        self.noise = None          # potência do ruído por frequência
+        self.gain = 1.0
+        self.level_floor_db = None
+        # Métricas
+        self.blocks = 0
+        self.proc_s = 0.0
+        self.max_proc_s = 0.0
+        self.clipped_samples = 0
+        self.clipped_blocks = 0
+        self.samples = 0
+
+    def _alloc(self, blocksize):
+        """Buffers de trabalho para blocos de até `blocksize` amostras (só cresce, mantendo o pendente)."""
+        self.blocksize = blocksize
+        self._x = np.zeros(blocksize, dtype=np.float32)
+        self._mask = np.zeros(blocksize, dtype=bool)
+        self._pcm = np.zeros(blocksize, dtype=np.int16)
+        self._view = memoryview(self._pcm).cast("B")
+        self._ramps = {}
+        old_in, old_out = self._in, self._out
+        self._in = np.zeros(FRAME + blocksize, dtype=np.float32)
+        self._out = np.zeros(2 * FRAME + blocksize, dtype=np.float32)
+        if old_in is not None:
+            self._in[:self._in_len] = old_in[:self._in_len]
+            self._out[:self._out_len] = old_out[:self._out_len]
+
+    def _ramp_for(self, n):
+        ramp = self._ramps.get(n)
+        if ramp is None:
+            ramp = self._ramps[n] = np.arange(1, n + 1, dtype=np.float32) / n
+        return ramp
+
+    # ------------------------------------------------------------ etapas
+    def _denoise(self):
+        """Consome os quadros completos da entrada e acrescenta o resultado na saída."""
+        count = (self._in_len - FRAME) // HOP + 1 if self._in_len >= FRAME else 0
+        if count <= 0:
+            return
+        frames = np.lib.stride_tricks.as_strided(
+            self._in, shape=(count, FRAME), strides=(HOP * self._in.itemsize, self._in.itemsize))
+        spec = np.fft.rfft(frames * self.window, axis=1)
+        power = spec.real ** 2 + spec.imag ** 2
+        if self.cfg["suppress_db"] > 0:
+            energy = power.sum(axis=1)
+            if self.noise is None:
+                quiet = energy <= np.sort(energy)[energy.size // 5]
+                self.noise = power[quiet].mean(axis=0)
+            else:
+                quiet = energy <= 2.0 * self.noise.sum()
+                if quiet.any():
+                    self.noise += self.cfg["noise_adapt"] * (power[quiet].mean(axis=0) - self.noise)
+                else:
+                    # Sem quadro quieto: deixa a estimativa subir devagar (ruído que aumentou)
+                    self.noise *= 1.05
+            gain = 1.0 - self.cfg["oversubtract"] * self.noise / (power + 1e-9)
+            np.maximum(gain, self.floor * self.floor, out=gain)
+            np.sqrt(gain, out=gain)
+            spec *= gain
+        frames_out = np.fft.irfft(spec, n=FRAME, axis=1).astype(np.float32, copy=False)
+        frames_out *= self.window
+        # Sobreposição-soma com 50%: primeira metade + segunda metade do quadro anterior
+        hops = frames_out[:, :HOP].copy()
+        hops[0] += self._tail
+        hops[1:] += frames_out[:-1, HOP:]
+        self._tail[:] = frames_out[-1, HOP:]
+        produced = count * HOP
+        self._out[self._out_len:self._out_len + produced] = hops.ravel()
+        self._out_len += produced
+        # Guarda o que sobrou da entrada para o próximo bloco
+        rest = self._in_len - produced
+        self._in[:rest] = self._in[produced:self._in_len]
+        self._in_len = rest
+
+    def _agc(self, y):
+        target = self.cfg["target_dbfs"]
+        if not target:
+            return
+        level_db = _db(float(np.dot(y, y)) / max(y.size, 1) / 32768.0 ** 2)
+        if self.level_floor_db is None or level_db < self.level_floor_db:
+            self.level_floor_db = level_db
+        else:
+            self.level_floor_db += 0.01 * (level_db - self.level_floor_db)
+        previous = self.gain
+        # Só a fala ajusta o ganho; no silêncio o ganho fica onde está
+        if level_db > self.level_floor_db + 6.0:
+            wanted_db = np.clip(target - level_db, self.cfg["min_gain_db"], self.cfg["max_gain_db"])
+            wanted = 10.0 ** (wanted_db / 20.0)
+            rate = self.cfg["attack"] if wanted < self.gain else self.cfg["release"]
+            self.gain += rate * (wanted - self.gain)
+        if self.gain == previous:
+            y *= self.gain
+        else:
+            ramp = self._ramp_for(y.size)
+            y *= previous + (self.gain - previous) * ramp
+
+    # ------------------------------------------------------------ bloco
+    def process(self, data):
+        t0 = time.perf_counter()
+        x = np.frombuffer(data, dtype=np.int16)
+        n = x.size
+        self.blocks += 1
+        self.samples += n
+        if self.bypass:
+            self._account(t0)
+            return data
+        if n > self.blocksize:
+            self._alloc(n)
+
+        # Clipping na entrada
+        mask = self._mask[:n]
+        clipped = np.count_nonzero(np.greater_equal(x, CLIP_LEVEL, out=mask))
+        clipped += np.count_nonzero(np.less_equal(x, -CLIP_LEVEL, out=mask))
+        if clipped:
+            self.clipped_samples += clipped
+            self.clipped_blocks += 1
+
+        # DC
+        xf = self._x[:n]
+        xf[:] = x
+        alpha = 1.0 - np.exp(-n / (self.sample_rate * self.cfg["dc_tau_s"]))
+        self.dc += alpha * (float(xf.mean()) - self.dc)
+        xf -= self.dc
+
+        # Ruído (com atraso fixo de um quadro)
+        self._in[self._in_len:self._in_len + n] = xf
+        self._in_len += n
+        self._denoise()
+        y = self._out[:n]
+        self._agc(y)
+        out = self._pcm[:n]
+        np.clip(y, -32768, 32767, out=y)
+        out[:] = y
+        self._out[:self._out_len - n] = self._out[n:self._out_len]
+        self._out_len -= n
+        self._account(t0)
+        # Sem cópia: devolve o próprio buffer de saída
+        return self._view if n == self.blocksize else self._view[:2 * n]
+
+    def _account(self, t0):
+        elapsed = time.perf_counter() - t0
+        self.proc_s += elapsed
+        if elapsed > self.max_proc_s:
+            self.max_proc_s = elapsed
+
+    def stats(self):
+        mean = self.proc_s / self.blocks if self.blocks else 0.0
+        noise_db = None
+        if self.noise is not None:
+            noise_db = round(float(_db(self.noise.sum() / (FRAME * FRAME / 4) / 32768.0 ** 2)), 1)
+        return {"bypass": self.bypass, "blocos": self.blocks,
+                "us_por_bloco": round(mean * 1e6, 1), "us_max": round(self.max_proc_s * 1e6, 1),
+                "ganho_db": round(20.0 * np.log10(self.gain), 1), "dc": round(self.dc, 1),
+                "ruido_dbfs": noise_db, "blocos_clipados": self.clipped_blocks,
+                "clipping_pct": round(100.0 * self.clipped_samples / self.samples, 3) if self.samples else 0.0}
+
+
+def _transcribe(model, blocks, sample_rate):
+    from vosk import KaldiRecognizer
+    from saida_transcricao import enable_words, parse_result
+    rec = KaldiRecognizer(model, sample_rate)
+    enable_words(rec)
+    texts, confs = [], []
+    t0 = time.perf_counter()
+    for i, block in enumerate(blocks):
+        raw = rec.Result() if rec.AcceptWaveform(block) else None
+        if i == len(blocks) - 1:
+            raw = rec.FinalResult()
+        u = parse_result(raw) if raw else None
+        if u is not None:
+            texts.append(u.text)
+            if u.conf is not None:
+                confs.append(u.conf)
+    return {"texto": " ".join(texts), "conf": round(float(np.mean(confs)), 3) if confs else None,
+            "decodificacao_s": round(time.perf_counter() - t0, 2)}
+
+
+def main():
+    from decodificar_audio import open_audio
+
+    p = argparse.ArgumentParser(description="Pré-processamento (DC, clipping, ruído, AGC) de um arquivo de áudio")
+    p.add_argument("arquivo")
+    p.add_argument("-o", "--saida", help="Grava o áudio tratado neste .wav")
+    p.add_argument("--blocksize", type=int, default=BLOCKSIZE)
+    p.add_argument("--ab", action="store_true", help="Transcreve com e sem pré-processamento e compara")
+    p.add_argument("--modelo", default=SMALL_MODEL_DIR)
+    args = p.parse_args()
+
+    rate, views = open_audio(args.arquivo, chunk_s=args.blocksize / SAMPLE_RATE)
+    raw_blocks = [bytes(v) for v in views]
+    front = FrontEnd(rate, args.blocksize)
+    processed = [bytes(front.process(b)) for b in raw_blocks]
+    print(f"Pré-processamento: {json.dumps(front.stats(), ensure_ascii=False)}")
+
+    if args.saida:
+        with wave.open(args.saida, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(b"".join(processed))
+        print(f"Áudio tratado: {args.saida}")
+
+    if args.ab:
+        if not os.path.isdir(args.modelo):
+            print(f"Modelo não encontrado: {args.modelo}", file=sys.stderr)
+            sys.exit(1)
+        from vosk import Model
+        model = Model(args.modelo)
+        print(f"A (sem):  {json.dumps(_transcribe(model, raw_blocks, rate), ensure_ascii=False)}")
+        print(f"B (com):  {json.dumps(_transcribe(model, processed, rate), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
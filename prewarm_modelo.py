@@ -0,0 +1,274 @@
+# Pré-aquecimento do modelo no page cache (Projeto Athena)
+#
+# Em placas com cartão SD, Model(FULL_MODEL_DIR) é dominado pela leitura a frio
+# do diretório de ~1.6GB. Este script lê os arquivos do modelo em paralelo (com
+# concorrência limitada) para o page cache do kernel, no boot, por uma unit
+# systemd em segundo plano. Assim o carregamento posterior lê da RAM em vez do SD.
+#
+# O Kaldi lê os arquivos com seus próprios streams (não dá para usar mmap no
+# Model), então o ganho vem de deixar as páginas residentes antes do Model().
+#
+# USO:
+#   python prewarm_modelo.py [DIR_MODELO ...] [--workers 4]   # aquece e grava o relatório
+#   python prewarm_modelo.py --report [DIR_MODELO ...]        # só mostra a residência (estilo vmtouch)
+#
+# Sinal de pronto: ~/Athena/prewarm_status.json com "state": "running" | "ready"
+# | "skipped" (nenhum diretório aquecido), o boot_id do kernel, o relatório por
+# arquivo (MB/s) e a residência final. Use wait_ready() antes do Model(). O page
+# cache não sobrevive ao reboot: status gravado em outro boot é ignorado.
+
+import os
+import sys
+import json
+import time
+import mmap
+import ctypes
+import ctypes.util
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajuste conforme seu ambiente
+FULL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+
+STATUS_FILE = os.path.expanduser("~/Athena/prewarm_status.json")
+# Identificador do boot atual (muda a cada reinício)
+BOOT_ID_FILE = "/proc/sys/kernel/random/boot_id"
+
+# Leituras simultâneas (cartões SD pioram com muitas leituras concorrentes)
+PREWARM_WORKERS = 4
+READ_CHUNK = 4 * 1024 * 1024
+# Margem de memória (MB) que deve sobrar depois de aquecer
+PREWARM_MEM_MARGIN_MB = 300
+
+PAGE_SIZE = mmap.PAGESIZE
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    _libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_ubyte)]
+    _HAS_MINCORE = True
+except (OSError, AttributeError):
+    _HAS_MINCORE = False
+
+
+def get_available_memory_mb():
+    """Retorna memória disponível em MB (usa /proc/meminfo)"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except Exception:
+        pass
+    return None
+
+
+def current_boot_id():
+    """boot_id do kernel, ou None fora do Linux."""
+    try:
+        with open(BOOT_ID_FILE) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def list_model_files(model_dir):
+    """Arquivos do modelo, maiores primeiro (os grandes dominam o tempo de carga)."""
+    files = []
+    for root, _, names in os.walk(model_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                files.append((os.path.getsize(path), path))
+            except OSError:
+                pass
+    files.sort(reverse=True)
+    return [(path, size) for size, path in files]
+
+
+def file_residency(path):
+    """Retorna (páginas residentes, páginas totais) via mincore, ou None se indisponível."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0, 0
+    npages = (size + PAGE_SIZE - 1) // PAGE_SIZE
+    if not _HAS_MINCORE:
+        return None
+    with open(path, "rb") as f:
+        # ACCESS_COPY dá um buffer gravável (necessário para obter o endereço) sem alterar o arquivo
+        mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY)
+    try:
+        buf = (ctypes.c_char * size).from_buffer(mm)
+        vec = (ctypes.c_ubyte * npages)()
+        try:
+            if _libc.mincore(ctypes.addressof(buf), size, vec) != 0:
+                return None
+        finally:
+            del buf
+        resident = sum(b & 1 for b in vec)
+    finally:
+        mm.close()
+    return resident, npages
+
+
+def residency_report(model_dir):
+    """Relatório no estilo vmtouch: residência por arquivo e total."""
+    files = []
+    res_total = pages_total = 0
+    for path, size in list_model_files(model_dir):
+        try:
+            r = file_residency(path)
+        except (OSError, ValueError):
+            r = None  # ex: sem espaço de endereçamento para mapear o arquivo (32 bits)
+        if r is None:
+            return None
+        res_total += r[0]
+        pages_total += r[1]
+        files.append({"file": os.path.relpath(path, model_dir), "size_mb": round(size / 2**20, 1),
+                      "resident_pct": round(100.0 * r[0] / r[1], 1) if r[1] else 100.0})
+    return {
+        "dir": model_dir,
+        "files": len(files),
+        "size_mb": round(pages_total * PAGE_SIZE / 2**20, 1),
+        "resident_mb": round(res_total * PAGE_SIZE / 2**20, 1),
+        "resident_pct": round(100.0 * res_total / pages_total, 1) if pages_total else 100.0,
+        "per_file": files,
+    }
+
+
+def _warm_file(path, size):
+    """Lê o arquivo inteiro (WILLNEED + leitura) e retorna o throughput."""
+    t0 = time.perf_counter()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        buf = bytearray(READ_CHUNK)
+        with os.fdopen(fd, "rb", buffering=0) as f:
+            fd = None
+            while f.readinto(buf):
+                pass
+    finally:
+        if fd is not None:
+            os.close(fd)
+    elapsed = time.perf_counter() - t0
+    return {"file": path, "size_mb": round(size / 2**20, 1), "seconds": round(elapsed, 3),
+            "mb_s": round(size / 2**20 / elapsed, 1) if elapsed > 0 else None}
+
+
+def write_status(status, path=STATUS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def prewarm(model_dirs, workers=PREWARM_WORKERS, status_file=STATUS_FILE):
+    """Aquece os diretórios de modelo no page cache e grava o status/relatório."""
+    status = {"state": "running", "pid": os.getpid(), "boot_id": current_boot_id(),
+              "started": time.time(), "dirs": {}}
+    if status_file:
+        write_status(status, status_file)
+    t0 = time.perf_counter()
+    for model_dir in model_dirs:
+        if not os.path.isdir(model_dir):
+            print(f"Aviso: diretório de modelo não encontrado: {model_dir}")
+            continue
+        files = list_model_files(model_dir)
+        size_mb = sum(s for _, s in files) / 2**20
+        avail_mb = get_available_memory_mb()
+        if avail_mb is not None and avail_mb - size_mb < PREWARM_MEM_MARGIN_MB:
+            print(f"Aviso: pouca memória ({avail_mb}MB) para aquecer {model_dir} ({size_mb:.0f}MB), pulando.")
+            status["dirs"][model_dir] = {"skipped": "memória insuficiente"}
+            continue
+        print(f"Aquecendo {model_dir} ({size_mb:.0f}MB, {len(files)} arquivos, {workers} leituras simultâneas)...")
+        td = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            per_file = list(pool.map(lambda fs: _warm_file(*fs), files))
+        elapsed = time.perf_counter() - td
+        report = residency_report(model_dir)
+        status["dirs"][model_dir] = {
+            "seconds": round(elapsed, 2),
+            "mb_s": round(size_mb / elapsed, 1) if elapsed > 0 else None,
+            "per_file": per_file,
+            "resident_pct": report["resident_pct"] if report else None,
+        }
+        print(f"  {size_mb:.0f}MB em {elapsed:.1f} s ({status['dirs'][model_dir]['mb_s']} MB/s), "
+              f"residente: {status['dirs'][model_dir]['resident_pct']}%")
+    # Nada aquecido (diretórios ausentes ou sem memória): não é "pronto"
+    warmed = any("seconds" in d for d in status["dirs"].values())
+    status["state"] = "ready" if warmed else "skipped"
+    status["seconds"] = round(time.perf_counter() - t0, 2)
+    if status_file:
+        write_status(status, status_file)
+    return status
+
+
+def read_status(path=STATUS_FILE):
+    """Status do pré-aquecimento deste boot, ou None (sem arquivo, ilegível ou de um boot anterior)."""
+    try:
+        with open(path) as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if status.get("boot_id") != current_boot_id():
+        return None
+    return status
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+def wait_ready(timeout=120.0, path=STATUS_FILE):
+    """
+    Espera o pré-aquecimento em andamento terminar (se houver um).
+    Retorna o status final ("ready" ou "skipped"), ou None se nenhum
+    pré-aquecimento estiver rodando/concluído neste boot.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status = read_status(path)
+        if status is None or status.get("state") in ("ready", "skipped"):
+            return status
+        if not _pid_alive(status.get("pid")):
+            return None  # processo morreu antes de terminar
+        if time.monotonic() >= deadline:
+            return status
+        time.sleep(0.2)
+
+
+def print_report(report):
+    if report is None:
+        print("mincore indisponível: não foi possível medir a residência.")
+        return
+    for f in report["per_file"]:
+        print(f"  {f['resident_pct']:5.1f}%  {f['size_mb']:8.1f} MB  {f['file']}")
+    print(f"Residente: {report['resident_mb']} / {report['size_mb']} MB ({report['resident_pct']}%) em {report['dir']}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Pré-aquece os modelos Vosk no page cache")
+    p.add_argument("dirs", nargs="*", help="Diretórios de modelo (padrão: completo e leve)")
+    p.add_argument("--workers", type=int, default=PREWARM_WORKERS, help="Leituras simultâneas")
+    p.add_argument("--report", action="store_true", help="Só mostra a residência atual no page cache")
+    args = p.parse_args()
+    dirs = args.dirs or [d for d in (FULL_MODEL_DIR, SMALL_MODEL_DIR) if os.path.isdir(d)]
+    if not dirs:
+        print("Erro: nenhum modelo Vosk encontrado.")
+        sys.exit(1)
+    if args.report:
+        for d in dirs:
+            print_report(residency_report(d))
+    else:
+        prewarm(dirs, workers=max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
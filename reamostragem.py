@@ -0,0 +1,196 @@
+#pip install numpy sounddevice
+
+# Captura na taxa nativa do dispositivo com reamostragem para 16 kHz (Projeto Athena)
+#
+# sd.RawInputStream(samplerate=16000, ...) falha de vez em muitos microfones
+# USB e placas de captura HDMI que só abrem 44,1 ou 48 kHz. Aqui o
+# dispositivo é aberto na taxa que ele aceita e cada bloco é convertido para
+# a taxa do modelo por um filtro polifásico em fluxo contínuo:
+#
+#   - razão racional L/M (48000 -> 16000 = 1/3; 44100 -> 16000 = 160/441) e
+#     um FIR passa-baixas (sinc com janela de Kaiser) dividido em L fases de
+#     TAPS_PER_PHASE coeficientes
+#   - o estado entre blocos são as últimas amostras de entrada e a posição
+#     da próxima saída, então blocos de qualquer tamanho emendam sem clique
+#   - cada saída é um produto escalar de TAPS_PER_PHASE amostras: índices e
+#     coeficientes do bloco ficam em tabelas calculadas uma vez por (tamanho,
+#     fase inicial); com blocos fixos (o caso do callback) o processamento é
+#     take/multiply/sum em buffers já alocados, sem alocar nada por bloco
+#   - aceita PCM intercalado de vários canais (arranjo de microfones)
+#
+# stats() mostra o custo em ms de CPU por segundo de áudio.
+#
+# API:
+#   rate = capture_rate(device)          # 16000 se o dispositivo aceitar, senão a nativa
+#   rs = Resampler(rate, 16000, channels=1)
+#   blocksize_in = rs.input_blocksize(8000)
+#   pcm16k = rs.process(bloco_nativo)   # memoryview do buffer interno, válido até o próximo bloco
+#
+# USO:
+#   python reamostragem.py --dispositivo 2      # mede o custo no microfone
+#   python reamostragem.py --simular 44100       # tom sintético, mede custo e erro
+
+import time
+import argparse
+from math import gcd
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Coeficientes por fase (a cada amostra de saída, na taxa de entrada mais alta)
+TAPS_PER_PHASE = 16
+# Banda passante como fração da frequência de Nyquist da taxa menor
+CUTOFF = 0.9
+KAISER_BETA = 8.0
+# Tabelas guardadas (uma por tamanho de bloco e fase inicial)
+MAX_PLANS = 64
+
+
+def design_filter(up, down, taps_per_phase=TAPS_PER_PHASE):
+    """FIR passa-baixas na taxa interpolada (entrada * up), com up fases de K coeficientes."""
+    k = int(np.ceil(taps_per_phase * max(up, down) / up))
+    n = k * up
+    fc = CUTOFF * 0.5 / max(up, down)
+    t = np.arange(n) - (n - 1) / 2.0
+    h = 2 * fc * np.sinc(2 * fc * t) * np.kaiser(n, KAISER_BETA)
+    # Ganho up compensa os zeros inseridos pela interpolação
+    return (h * up / h.sum()).astype(np.float32), k
+
+
+def capture_rate(device=None, channels=1, sample_rate=SAMPLE_RATE):
+    """Taxa para abrir o dispositivo: sample_rate se ele aceitar, senão a taxa padrão dele."""
+    import sounddevice as sd
+    try:
+        sd.check_input_settings(device=device, samplerate=sample_rate, channels=channels, dtype="int16")
+        return sample_rate
+    except Exception:
+        return int(sd.query_devices(device, "input")["default_samplerate"])
+
+
+class Resampler:
+    """Reamostragem polifásica de PCM 16 bits (intercalado) em fluxo contínuo."""
+
+    def __init__(self, in_rate, out_rate=SAMPLE_RATE, channels=1, taps_per_phase=TAPS_PER_PHASE):
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        self.channels = channels
+        self.h, self.taps = design_filter(self.up, self.down, taps_per_phase)
+        self._hist = self.taps - 1
+        self._buf = np.zeros((self._hist, channels), dtype=np.float32)
+        # Posição da próxima saída em relação ao início do bloco, na taxa interpolada
+        self._pos = 0
+        self._plans = {}
+        # Métricas
+        self.blocks = 0
+        self.audio_s = 0.0
+        self.proc_s = 0.0
+
+    def input_blocksize(self, out_blocksize):
+        """Bloco de captura (na taxa nativa) equivalente a out_blocksize amostras na saída."""
+        return int(round(out_blocksize * self.in_rate / self.out_rate))
+
+    def _plan(self, n):
+        """Tabelas de índices/coeficientes e buffers para um bloco de n amostras na fase atual."""
+        key = (n, self._pos)
+        plan = self._plans.get(key)
+        if plan is None:
+            if len(self._plans) >= MAX_PLANS:
+                # Blocos de tamanho variável: não deixa o cache crescer sem limite
+                self._plans.clear()
+            positions = np.arange(self._pos, n * self.up, self.down)
+            base = positions // self.up
+            phase = positions % self.up
+            k = np.arange(self.taps)
+            idx = base[:, None] + self._hist - k[None, :]
+            coef = self.h[phase[:, None] + k[None, :] * self.up]
+            count = positions.size
+            plan = {
+                "idx": idx, "coef": coef[:, :, None],
+                "next_pos": self._pos + count * self.down - n * self.up,
+                "gathered": np.empty((count, self.taps, self.channels), dtype=np.float32),
+                "acc": np.empty((count, self.channels), dtype=np.float32),
+                "out": np.empty((count, self.channels), dtype=np.int16),
+            }
+            # Bloco curto sem nenhuma amostra de saída: cast() não aceita forma vazia
+            plan["view"] = memoryview(plan["out"]).cast("B") if count else memoryview(b"")
+            if n + self._hist > self._buf.shape[0]:
+                grown = np.zeros((n + self._hist, self.channels), dtype=np.float32)
+                grown[:self._hist] = self._buf[:self._hist]
+                self._buf = grown
+            self._plans[key] = plan
+        return plan
+
+    def process(self, data):
+        t0 = time.perf_counter()
+        x = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+        n = x.shape[0]
+        plan = self._plan(n)
+        buf = self._buf
+        buf[self._hist:self._hist + n] = x
+        np.take(buf, plan["idx"], axis=0, out=plan["gathered"], mode="clip")
+        np.multiply(plan["gathered"], plan["coef"], out=plan["gathered"])
+        np.sum(plan["gathered"], axis=1, out=plan["acc"])
+        np.clip(plan["acc"], -32768, 32767, out=plan["acc"])
+        plan["out"][:] = plan["acc"]
+        # Guarda o fim do bloco como passado do próximo
+        buf[:self._hist] = buf[n:n + self._hist]
+        self._pos = plan["next_pos"]
+        self.blocks += 1
+        self.audio_s += n / self.in_rate
+        self.proc_s += time.perf_counter() - t0
+        # Sem cópia: o buffer é reaproveitado no próximo bloco de mesmo tamanho e fase
+        return plan["view"]
+
+    def stats(self):
+        return {"de_hz": self.in_rate, "para_hz": self.out_rate, "razao": f"{self.up}/{self.down}",
+                "coeficientes": self.h.size, "blocos": self.blocks, "audio_s": round(self.audio_s, 1),
+                # Custo: ms de CPU por segundo de áudio capturado
+                "ms_cpu_por_s": round(1000 * self.proc_s / self.audio_s, 3) if self.audio_s else None}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Reamostragem da captura para 16 kHz: custo e verificação")
+    p.add_argument("--dispositivo", default=None)
+    p.add_argument("--simular", type=int, default=None, metavar="HZ", help="Tom de 1 kHz sintético nesta taxa")
+    p.add_argument("--segundos", type=float, default=10.0)
+    p.add_argument("--blocksize", type=int, default=8000, help="Amostras por bloco na saída (16 kHz)")
+    args = p.parse_args()
+
+    if args.simular:
+        rs = Resampler(args.simular)
+        n_in = rs.input_blocksize(args.blocksize)
+        t = np.arange(int(args.segundos * args.simular)) / args.simular
+        tone = (10000 * np.sin(2 * np.pi * 1000 * t)).astype(np.int16)
+        out = np.concatenate([np.frombuffer(rs.process(tone[i:i + n_in].tobytes()), dtype=np.int16).copy()
+                              for i in range(0, tone.size - n_in + 1, n_in)]).astype(np.float64)
+        # Erro contra o tom ideal em 16 kHz (descontando o atraso do filtro)
+        ts = np.arange(out.size) / SAMPLE_RATE
+        steady = slice(SAMPLE_RATE // 10, None)
+        basis = np.stack((np.sin(2 * np.pi * 1000 * ts), np.cos(2 * np.pi * 1000 * ts)), axis=1)[steady]
+        fit, *_ = np.linalg.lstsq(basis, out[steady], rcond=None)
+        err = out[steady] - basis @ fit
+        print(f"{args.simular} Hz -> {SAMPLE_RATE} Hz: {out.size} amostras, "
+              f"amplitude {np.hypot(*fit):.0f}, SNR {10 * np.log10(np.mean((basis @ fit) ** 2) / np.mean(err ** 2)):.1f} dB")
+        print("Custo:", rs.stats())
+        return
+
+    import queue
+    import sounddevice as sd
+    device = int(args.dispositivo) if args.dispositivo and args.dispositivo.isdigit() else args.dispositivo
+    rate = capture_rate(device)
+    rs = Resampler(rate)
+    q = queue.Queue()
+    print(f"Dispositivo aberto em {rate} Hz")
+    with sd.RawInputStream(samplerate=rate, blocksize=rs.input_blocksize(args.blocksize), device=device,
+                           dtype="int16", channels=1, callback=lambda d, f, t, s: q.put(bytes(d))):
+        t_end = time.monotonic() + args.segundos
+        while time.monotonic() < t_end:
+            rs.process(q.get())
+    print("Custo:", rs.stats())
+
+
+if __name__ == "__main__":
+    main()
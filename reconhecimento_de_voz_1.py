@@ -1,6 +1,15 @@
 import speech_recognition as sr
 import serial
 import time
+import argparse
+
+from voz_local import BACKENDS, SAMPLE_RATE, make_recognizer
+
+# Command line: recognition backend (google needs internet, vosk runs locally)
+p = argparse.ArgumentParser(description="Voice control of the Arduino LED")
+p.add_argument("--backend", choices=BACKENDS, default="google", help="google (online) or vosk (offline, voz_local.py)")
+p.add_argument("--calibrar", type=float, default=1.0, metavar="S", help="Seconds of ambient noise calibration")
+args = p.parse_args()
 
 # Set up serial communication
 arduino = serial.Serial('COM3', 9600)  # Change COM3 to your Arduino port
@@ -8,32 +17,36 @@ time.sleep(2)  # Wait for Arduino to initialize
 
 # Initialize recognizer
 recognizer = sr.Recognizer()
+recognize = make_recognizer(args.backend, recognizer)
+
+# One microphone session for the whole run (reopening it every phrase adds latency)
+with sr.Microphone(sample_rate=SAMPLE_RATE) as source:
+    # Calibrate the energy threshold once, with the room quiet
+    print("Calibrating ambient noise, stay quiet...")
+    recognizer.adjust_for_ambient_noise(source, duration=args.calibrar)
 
-print("Say something...")
+    print("Say something...")
 
-while True:
-    try:
-        with sr.Microphone() as source:
+    while True:
+        try:
             audio = recognizer.listen(source)
-            command = recognizer.recognize_google(audio).lower()
+            command = recognize(audio).lower()
             print("You said:", command)
 
-            # Check for specific commands
-            if "led on" in command:
+            # Check for specific commands (Portuguese phrases for the local pt model)
+            if "led on" in command or ("ligar led" in command and "desligar" not in command):
                 arduino.write(b"ON\n")
-            elif "led off" in command:
+            elif "led off" in command or "desligar led" in command:
                 arduino.write(b"OFF\n")
-            elif "exit" in command:
+            elif "exit" in command or "sair" in command:
                 print("Exiting...")
                 break
             else:
                 print("Unknown command")
 
-    except sr.UnknownValueError:
-        print("Sorry, could not understand audio")
-    except sr.RequestError:
-        print("Could not request results; check your internet connection")
+        except sr.UnknownValueError:
+            print("Sorry, could not understand audio")
+        except sr.RequestError:
+            print("Could not request results; check your internet connection")
 
 arduino.close()
-
-
@@ -0,0 +1,179 @@
+// GERADO AUTOMATICAMENTE por gerar_comandos_firmware.py a partir de comandos.json
+// NÃO EDITE: altere comandos.json e rode  python gerar_comandos_firmware.py
+#ifndef COMANDOS_H
+#define COMANDOS_H
+
+#include <Arduino.h>
+
+enum CommandId : uint8_t {
+  CMD_NONE = 0,
+  CMD_LIGAR_LED,
+  CMD_DESLIGAR_LED,
+  CMD_AVANCAR,
+  CMD_PARAR,
+  CMD_GIRAR_ESQUERDA,
+  CMD_GIRAR_DIREITA,
+  CMD_GIRAR_CABECA,
+  CMD_AJUDA,
+  CMD_COUNT
+};
+
+const char CMD_PHRASE_0[] PROGMEM = "ligar led";
+const char CMD_PHRASE_1[] PROGMEM = "liga";
+const char CMD_PHRASE_2[] PROGMEM = "ligue";
+const char CMD_PHRASE_3[] PROGMEM = "ligar";
+const char CMD_PHRASE_4[] PROGMEM = "ligar luz";
+const char CMD_PHRASE_5[] PROGMEM = "acender luz";
+const char CMD_PHRASE_6[] PROGMEM = "desligar led";
+const char CMD_PHRASE_7[] PROGMEM = "desliga";
+const char CMD_PHRASE_8[] PROGMEM = "desligue";
+const char CMD_PHRASE_9[] PROGMEM = "desligar";
+const char CMD_PHRASE_10[] PROGMEM = "desligar luz";
+const char CMD_PHRASE_11[] PROGMEM = "apagar luz";
+const char CMD_PHRASE_12[] PROGMEM = "avancar";
+const char CMD_PHRASE_13[] PROGMEM = "avançar";
+const char CMD_PHRASE_14[] PROGMEM = "avança";
+const char CMD_PHRASE_15[] PROGMEM = "avance";
+const char CMD_PHRASE_16[] PROGMEM = "andar para frente";
+const char CMD_PHRASE_17[] PROGMEM = "avançar para frente";
+const char CMD_PHRASE_18[] PROGMEM = "parar";
+const char CMD_PHRASE_19[] PROGMEM = "pare";
+const char CMD_PHRASE_20[] PROGMEM = "para";
+const char CMD_PHRASE_21[] PROGMEM = "girar esquerda";
+const char CMD_PHRASE_22[] PROGMEM = "girar para a esquerda";
+const char CMD_PHRASE_23[] PROGMEM = "vire à esquerda";
+const char CMD_PHRASE_24[] PROGMEM = "girar direita";
+const char CMD_PHRASE_25[] PROGMEM = "girar para a direita";
+const char CMD_PHRASE_26[] PROGMEM = "vire à direita";
+const char CMD_PHRASE_27[] PROGMEM = "girar cabeca";
+const char CMD_PHRASE_28[] PROGMEM = "girar cabeça";
+const char CMD_PHRASE_29[] PROGMEM = "gira cabeça";
+const char CMD_PHRASE_30[] PROGMEM = "girar a cabeça";
+const char CMD_PHRASE_31[] PROGMEM = "gira a cabeça";
+const char CMD_PHRASE_32[] PROGMEM = "gire a cabeça";
+const char CMD_PHRASE_33[] PROGMEM = "ajuda";
+const char CMD_PHRASE_34[] PROGMEM = "ajudar";
+const char CMD_PHRASE_35[] PROGMEM = "socorro";
+const char CMD_PHRASE_36[] PROGMEM = "help";
+
+struct CommandEntry {
+  const char* phrase;
+  uint8_t id;
+};
+
+const CommandEntry COMMAND_TABLE[] PROGMEM = {
+  {CMD_PHRASE_0, CMD_LIGAR_LED},
+  {CMD_PHRASE_1, CMD_LIGAR_LED},
+  {CMD_PHRASE_2, CMD_LIGAR_LED},
+  {CMD_PHRASE_3, CMD_LIGAR_LED},
+  {CMD_PHRASE_4, CMD_LIGAR_LED},
+  {CMD_PHRASE_5, CMD_LIGAR_LED},
+  {CMD_PHRASE_6, CMD_DESLIGAR_LED},
+  {CMD_PHRASE_7, CMD_DESLIGAR_LED},
+  {CMD_PHRASE_8, CMD_DESLIGAR_LED},
+  {CMD_PHRASE_9, CMD_DESLIGAR_LED},
+  {CMD_PHRASE_10, CMD_DESLIGAR_LED},
+  {CMD_PHRASE_11, CMD_DESLIGAR_LED},
+  {CMD_PHRASE_12, CMD_AVANCAR},
+  {CMD_PHRASE_13, CMD_AVANCAR},
+  {CMD_PHRASE_14, CMD_AVANCAR},
+  {CMD_PHRASE_15, CMD_AVANCAR},
+  {CMD_PHRASE_16, CMD_AVANCAR},
+  {CMD_PHRASE_17, CMD_AVANCAR},
+  {CMD_PHRASE_18, CMD_PARAR},
+  {CMD_PHRASE_19, CMD_PARAR},
+  {CMD_PHRASE_20, CMD_PARAR},
+  {CMD_PHRASE_21, CMD_GIRAR_ESQUERDA},
+  {CMD_PHRASE_22, CMD_GIRAR_ESQUERDA},
+  {CMD_PHRASE_23, CMD_GIRAR_ESQUERDA},
+  {CMD_PHRASE_24, CMD_GIRAR_DIREITA},
+  {CMD_PHRASE_25, CMD_GIRAR_DIREITA},
+  {CMD_PHRASE_26, CMD_GIRAR_DIREITA},
+  {CMD_PHRASE_27, CMD_GIRAR_CABECA},
+  {CMD_PHRASE_28, CMD_GIRAR_CABECA},
+  {CMD_PHRASE_29, CMD_GIRAR_CABECA},
+  {CMD_PHRASE_30, CMD_GIRAR_CABECA},
+  {CMD_PHRASE_31, CMD_GIRAR_CABECA},
+  {CMD_PHRASE_32, CMD_GIRAR_CABECA},
+  {CMD_PHRASE_33, CMD_AJUDA},
+  {CMD_PHRASE_34, CMD_AJUDA},
+  {CMD_PHRASE_35, CMD_AJUDA},
+  {CMD_PHRASE_36, CMD_AJUDA},
+};
+const uint8_t COMMAND_TABLE_SIZE = 37;
+
+const char CMD_REPLY_NONE[] PROGMEM = "";
+const char CMD_REPLY_LIGAR_LED[] PROGMEM = "LED ligado com sucesso";
+const char CMD_REPLY_DESLIGAR_LED[] PROGMEM = "LED desligado com sucesso";
+const char CMD_REPLY_AVANCAR[] PROGMEM = "Robô avançando";
+const char CMD_REPLY_PARAR[] PROGMEM = "Robô parado";
+const char CMD_REPLY_GIRAR_ESQUERDA[] PROGMEM = "Girando para esquerda";
+const char CMD_REPLY_GIRAR_DIREITA[] PROGMEM = "Girando para direita";
+const char CMD_REPLY_GIRAR_CABECA[] PROGMEM = "Girando a cabeça no giro do exorcista!";
+const char CMD_REPLY_AJUDA[] PROGMEM = "";
+const char* const COMMAND_REPLIES[] PROGMEM = {
+  CMD_REPLY_NONE,
+  CMD_REPLY_LIGAR_LED,
+  CMD_REPLY_DESLIGAR_LED,
+  CMD_REPLY_AVANCAR,
+  CMD_REPLY_PARAR,
+  CMD_REPLY_GIRAR_ESQUERDA,
+  CMD_REPLY_GIRAR_DIREITA,
+  CMD_REPLY_GIRAR_CABECA,
+  CMD_REPLY_AJUDA,
+};
+
+const char CMD_UNIT_NONE[] PROGMEM = "";
+const char CMD_UNIT_AVANCAR[] PROGMEM = "cm";
+const char CMD_UNIT_GIRAR_ESQUERDA[] PROGMEM = "graus";
+const char CMD_UNIT_GIRAR_DIREITA[] PROGMEM = "graus";
+const char CMD_UNIT_GIRAR_CABECA[] PROGMEM = "graus";
+const char* const COMMAND_UNITS[] PROGMEM = {
+  CMD_UNIT_NONE,
+  CMD_UNIT_NONE,
+  CMD_UNIT_NONE,
+  CMD_UNIT_AVANCAR,
+  CMD_UNIT_NONE,
+  CMD_UNIT_GIRAR_ESQUERDA,
+  CMD_UNIT_GIRAR_DIREITA,
+  CMD_UNIT_GIRAR_CABECA,
+  CMD_UNIT_NONE,
+};
+const uint16_t COMMAND_PARAM_MAX[] PROGMEM = {
+  0,
+  0,
+  0,
+  500,
+  0,
+  360,
+  360,
+  360,
+  0,
+};
+
+const char HELP_TEXT[] PROGMEM = "Comandos disponíveis: ligar led, desligar led, avancar, parar, girar esquerda, girar direita, girar cabeca, ajuda";
+
+// Procura a frase recebida na tabela (comparação direto da flash)
+inline uint8_t lookupCommand(const char* s) {
+  for (uint8_t i = 0; i < COMMAND_TABLE_SIZE; i++) {
+    const char* p = (const char*)pgm_read_ptr(&COMMAND_TABLE[i].phrase);
+    if (strcmp_P(s, p) == 0) {
+      return pgm_read_byte(&COMMAND_TABLE[i].id);
+    }
+  }
+  return CMD_NONE;
+}
+
+inline const __FlashStringHelper* commandReply(uint8_t id) {
+  return (const __FlashStringHelper*)pgm_read_ptr(&COMMAND_REPLIES[id]);
+}
+
+inline const __FlashStringHelper* commandUnit(uint8_t id) {
+  return (const __FlashStringHelper*)pgm_read_ptr(&COMMAND_UNITS[id]);
+}
+
+inline uint16_t commandParamMax(uint8_t id) {
+  return pgm_read_word(&COMMAND_PARAM_MAX[id]);
+}
+
+#endif
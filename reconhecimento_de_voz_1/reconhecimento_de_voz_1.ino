@@ -9,9 +9,90 @@
 //LCD_D1  D9
 //LCD_D2  D2 ... LCD_D7 D7
 
+// Tabela de comandos gerada a partir de comandos.json (python gerar_comandos_firmware.py)
+#include "comandos.h"
+
+// O loop() nunca bloqueia: os bytes da serial são lidos um a um por um
+// parser de linhas, os movimentos com valor ("avancar 200") viram ações com
+// fim agendado por millis(), e os que chegam durante uma ação esperam numa
+// fila pequena. "parar", "ping" e os comandos que não movem o robô são
+// atendidos na hora, mesmo com o robô em movimento. "estado_laco" informa o
+// pior tempo entre duas voltas do loop() e o pior tempo de atendimento de
+// uma linha, para medir a latência de entrada a partir do PC.
+
 // Definições de pinos (ajuste conforme sua montagem)
 const int LED_PIN = 13;
 
+// Canal contínuo de setpoints (movimento_continuo.py): quadro binário de 6 bytes
+//   [0xA5][seq][velocidade int8 %][rumo int16 LE, décimos de grau][xor de seq..rumo]
+// Não tem resposta. Se os quadros pararem por SETPOINT_WATCHDOG_MS, os motores param.
+const uint8_t SETPOINT_START = 0xA5;
+const uint8_t SETPOINT_FRAME_LEN = 6;
+const unsigned long SETPOINT_WATCHDOG_MS = 200;
+// Quadro incompleto por mais que isso é descartado
+const unsigned long SETPOINT_FRAME_TIMEOUT_MS = 50;
+
+bool streaming = false;
+unsigned long lastSetpointMs = 0;
+uint8_t lastSeq = 0;
+unsigned long setpointFrames = 0;
+unsigned long setpointLost = 0;
+unsigned long setpointInvalid = 0;
+unsigned long watchdogTrips = 0;
+
+// Telemetria de sensores (telemetria.py): quadro binário de 9 bytes, ligado por "telemetria <hz>"
+//   [0xA6][seq][distância uint16 mm][bateria uint16 mV][corrente int16 mA][xor de seq..corrente]
+// Sai sempre entre duas respostas (nunca no meio de uma linha).
+const uint8_t TELEMETRY_START = 0xA6;
+const uint8_t TELEMETRY_FRAME_LEN = 9;
+const uint8_t TELEMETRY_MAX_HZ = 50;
+// Sensores (ajuste conforme sua montagem; A0-A4 são do display)
+const int DISTANCE_PIN = A8;
+const int BATTERY_PIN = A9;
+const int CURRENT_PIN = A10;
+
+unsigned long telemetryPeriodMs = 0;  // 0 = desligada
+unsigned long lastTelemetryMs = 0;
+uint8_t telemetrySeq = 0;
+unsigned long telemetrySkipped = 0;
+
+// Parser de linhas não bloqueante
+const uint8_t LINE_MAX = 128;
+char lineBuf[LINE_MAX];
+uint8_t lineLen = 0;
+bool lineOverflow = false;
+unsigned long lineStartUs = 0;
+uint8_t frameBuf[SETPOINT_FRAME_LEN];
+uint8_t frameLen = 0;
+unsigned long frameStartMs = 0;
+// Bytes lidos por volta do loop() (o resto fica para a próxima volta)
+const uint8_t MAX_BYTES_PER_LOOP = 64;
+
+// Movimentos com valor: velocidades usadas para calcular a duração (ajuste ao seu robô)
+const int SPEED_CM_S = 20;
+const int TURN_DEG_S = 90;
+const int HEAD_DEG_S = 120;
+const int8_t DRIVE_SPEED_PCT = 60;
+
+// Ação em andamento (fim agendado) e fila de movimentos
+struct Action {
+  uint8_t id;
+  long param;  // -1 = sem valor
+};
+const uint8_t QUEUE_SIZE = 4;
+Action actionQueue[QUEUE_SIZE];
+uint8_t queueHead = 0;
+uint8_t queueCount = 0;
+unsigned long queueDropped = 0;
+Action current;
+bool actionActive = false;
+unsigned long actionEndMs = 0;
+
+// Medidas de latência (µs), zeradas a cada "estado_laco"
+unsigned long lastLoopUs = 0;
+unsigned long loopMaxUs = 0;
+unsigned long intakeMaxUs = 0;
+
 void setup() {
   Serial.begin(9600);
   while (!Serial) {
@@ -19,57 +100,437 @@ void setup() {
   }
   pinMode(LED_PIN, OUTPUT);
   Serial.println("Arduino pronto!");
+  lastLoopUs = micros();
 }
 
-void loop() {
-  if (Serial.available()) {
-    String comando = Serial.readStringUntil('\n');
-    comando.trim();
-    comando.toLowerCase();
-
-    // Verificação inicial de comunicação
-    if (comando == "teste_comunicacao") {
-      Serial.println("Comunicação estabelecida com sucesso");
-      return;
-    }
+// ------------------------------------------------------------ motores
 
-    // Processar outros comandos
-    if (comando == "ligar led" || comando == "liga" || comando == "ligar" || comando == "ligue") {
-      digitalWrite(LED_PIN, HIGH);
-      Serial.println("LED ligado com sucesso");
-    }
-    else if (comando == "desligar led" || comando == "desliga" || comando == "desligar" || comando == "desligue") {
-      digitalWrite(LED_PIN, LOW);
-      Serial.println("LED desligado com sucesso");
-    }
-    else if (comando == "avancar") {
-      // Código para avançar
-      Serial.println("Robô avançando");
+// Aplica velocidade (-100..100 %) e rumo (décimos de grau) aos motores
+void setMotion(int8_t velocidade, int16_t rumo) {
+  // Código dos motores: velocidade e rumo contínuos
+}
+
+void stopMotors() {
+  // Código dos motores: parar
+  streaming = false;
+}
+
+void clearQueue() {
+  queueHead = 0;
+  queueCount = 0;
+}
+
+// Cancela ação, fila e streaming (usado por "parar")
+void stopAll() {
+  actionActive = false;
+  clearQueue();
+  stopMotors();
+}
+
+bool isMotion(uint8_t id) {
+  return id == CMD_AVANCAR || id == CMD_GIRAR_ESQUERDA || id == CMD_GIRAR_DIREITA ||
+         id == CMD_GIRAR_CABECA || id == CMD_PARAR;
+}
+
+// Inicia um movimento; com valor, agenda o fim por millis()
+void startAction(uint8_t id, long param) {
+  unsigned long duracaoMs = 0;
+  switch (id) {
+    case CMD_AVANCAR:
+      // Código para avançar (param em cm; sem param, avança até "parar")
+      setMotion(DRIVE_SPEED_PCT, 0);
+      if (param > 0) duracaoMs = param * 1000L / SPEED_CM_S;
+      break;
+    case CMD_GIRAR_ESQUERDA:
+      // Código para girar (param em graus)
+      if (param > 0) duracaoMs = param * 1000L / TURN_DEG_S;
+      break;
+    case CMD_GIRAR_DIREITA:
+      // Código para girar (param em graus)
+      if (param > 0) duracaoMs = param * 1000L / TURN_DEG_S;
+      break;
+    case CMD_GIRAR_CABECA:
+      // Código para girar a cabeça (param em graus)
+      if (param > 0) duracaoMs = param * 1000L / HEAD_DEG_S;
+      break;
+    case CMD_PARAR:
+      // Parada vinda da fila (em lote, depois dos movimentos anteriores)
+      stopMotors();
+      break;
+  }
+  current.id = id;
+  current.param = param;
+  actionActive = duracaoMs > 0;
+  actionEndMs = millis() + duracaoMs;
+}
+
+// Termina a ação cujo tempo acabou e puxa o próximo movimento da fila
+void runScheduler() {
+  if (actionActive && (long)(millis() - actionEndMs) >= 0) {
+    actionActive = false;
+    stopMotors();
+  }
+  if (!actionActive && queueCount > 0) {
+    Action next = actionQueue[queueHead];
+    queueHead = (queueHead + 1) % QUEUE_SIZE;
+    queueCount--;
+    startAction(next.id, next.param);
+  }
+}
+
+bool enqueueAction(uint8_t id, long param) {
+  if (queueCount >= QUEUE_SIZE) {
+    queueDropped++;
+    return false;
+  }
+  uint8_t tail = (queueHead + queueCount) % QUEUE_SIZE;
+  actionQueue[tail].id = id;
+  actionQueue[tail].param = param;
+  queueCount++;
+  return true;
+}
+
+// ------------------------------------------------------------ canal contínuo
+
+// Trata um quadro de setpoint completo
+void handleSetpointFrame(const uint8_t* buf) {
+  uint8_t x = 0;
+  for (uint8_t i = 1; i < SETPOINT_FRAME_LEN - 1; i++) x ^= buf[i];
+  if (x != buf[SETPOINT_FRAME_LEN - 1]) {
+    setpointInvalid++;
+    return;
+  }
+  uint8_t seq = buf[1];
+  if (streaming) {
+    // Lacunas na sequência = quadros perdidos no caminho
+    setpointLost += (uint8_t)(seq - lastSeq - 1);
+  } else {
+    // Início do streaming: os setpoints assumem o lugar das ações agendadas
+    actionActive = false;
+    clearQueue();
+  }
+  lastSeq = seq;
+  setpointFrames++;
+  lastSetpointMs = millis();
+  streaming = true;
+  setMotion((int8_t)buf[2], (int16_t)(buf[3] | (buf[4] << 8)));
+}
+
+// Watchdog: sem setpoints recentes, para os motores
+void checkSetpointWatchdog() {
+  if (streaming && millis() - lastSetpointMs > SETPOINT_WATCHDOG_MS) {
+    stopMotors();
+    watchdogTrips++;
+  }
+}
+
+void printMotionStatus() {
+  Serial.print("movimento: quadros=");
+  Serial.print(setpointFrames);
+  Serial.print(" perdidos=");
+  Serial.print(setpointLost);
+  Serial.print(" invalidos=");
+  Serial.print(setpointInvalid);
+  Serial.print(" watchdog=");
+  Serial.print(watchdogTrips);
+  Serial.print(" ativo=");
+  Serial.println(streaming ? 1 : 0);
+}
+
+void printLoopStatus() {
+  Serial.print("laco: max_us=");
+  Serial.print(loopMaxUs);
+  Serial.print(" atendimento_max_us=");
+  Serial.print(intakeMaxUs);
+  Serial.print(" fila=");
+  Serial.print(queueCount);
+  Serial.print(" descartados=");
+  Serial.print(queueDropped);
+  Serial.print(" acao=");
+  Serial.print(actionActive ? (long)(actionEndMs - millis()) : 0L);
+  Serial.print(" telemetria_puladas=");
+  Serial.println(telemetrySkipped);
+  loopMaxUs = 0;
+  intakeMaxUs = 0;
+}
+
+// ------------------------------------------------------------ telemetria
+
+// Sensor de distância analógico (tipo Sharp GP2Y0A21): mm aproximado
+uint16_t readDistanceMm() {
+  int raw = analogRead(DISTANCE_PIN);
+  if (raw < 30) return 0;  // fora de alcance
+  return (uint16_t)(48000L / (raw - 20));
+}
+
+// Bateria por divisor resistivo 1:2 na referência de 5 V
+uint16_t readBatteryMv() {
+  return (uint16_t)(analogRead(BATTERY_PIN) * 10000L / 1023);
+}
+
+// Sensor de corrente tipo ACS712-5A (185 mV/A, zero em 2,5 V)
+int16_t readMotorCurrentMa() {
+  return (int16_t)((analogRead(CURRENT_PIN) - 512) * 26L);
+}
+
+void sendTelemetry() {
+  // Sem espaço no buffer de saída, pula o quadro em vez de bloquear o loop()
+  if (Serial.availableForWrite() < TELEMETRY_FRAME_LEN) {
+    telemetrySkipped++;
+    return;
+  }
+  uint8_t buf[TELEMETRY_FRAME_LEN];
+  uint16_t dist = readDistanceMm();
+  uint16_t bat = readBatteryMv();
+  int16_t cur = readMotorCurrentMa();
+  buf[0] = TELEMETRY_START;
+  buf[1] = telemetrySeq++;
+  buf[2] = dist & 0xFF;
+  buf[3] = dist >> 8;
+  buf[4] = bat & 0xFF;
+  buf[5] = bat >> 8;
+  buf[6] = (uint16_t)cur & 0xFF;
+  buf[7] = (uint16_t)cur >> 8;
+  uint8_t x = 0;
+  for (uint8_t i = 1; i < TELEMETRY_FRAME_LEN - 1; i++) x ^= buf[i];
+  buf[TELEMETRY_FRAME_LEN - 1] = x;
+  Serial.write(buf, TELEMETRY_FRAME_LEN);
+}
+
+void checkTelemetry() {
+  if (telemetryPeriodMs && millis() - lastTelemetryMs >= telemetryPeriodMs) {
+    lastTelemetryMs += telemetryPeriodMs;
+    if (millis() - lastTelemetryMs >= telemetryPeriodMs) {
+      lastTelemetryMs = millis();  // atrasou demais: não envia em rajada
     }
-    else if (comando == "parar") {
-      // Código para parar
-      Serial.println("Robô parado");
+    sendTelemetry();
+  }
+}
+
+// ------------------------------------------------------------ comandos
+
+// Separa um valor numérico no fim do comando ("avancar 200" -> "avancar", 200).
+// Retorna -1 se não houver valor.
+long splitParam(char* comando) {
+  char* espaco = strrchr(comando, ' ');
+  if (espaco == NULL || espaco[1] == '\0') return -1;
+  for (char* p = espaco + 1; *p; p++) {
+    if (!isdigit(*p)) return -1;
+  }
+  long valor = atol(espaco + 1);
+  *espaco = '\0';
+  return valor;
+}
+
+// Atende um comando e escreve a resposta (sem quebra de linha).
+// Aceita um valor no fim para os comandos com parâmetro ("avancar 200" = 200 cm,
+// "girar direita 90" = 90 graus). Movimentos que chegam durante outro esperam
+// na fila ("(na fila)" na resposta); "parar" fora de lote para tudo na hora.
+// Retorna false se o comando não foi reconhecido ou não coube na fila.
+bool executeCommand(const char* entrada, bool emLote) {
+  char comando[48];
+  strncpy(comando, entrada, sizeof(comando) - 1);
+  comando[sizeof(comando) - 1] = '\0';
+  long param = splitParam(comando);
+
+  uint8_t id = lookupCommand(comando);
+  if (id != CMD_NONE && param >= 0) {
+    uint16_t maximo = commandParamMax(id);
+    if (maximo == 0) {
+      Serial.print("Comando não aceita valor: ");
+      Serial.print(entrada);
+      return false;
     }
-    else if (comando == "girar esquerda") {
-      // Código para girar
-      Serial.println("Girando para esquerda");
+    if (param < 1 || param > maximo) {
+      Serial.print("Valor fora do limite (1 a ");
+      Serial.print((unsigned int)maximo);
+      Serial.print("): ");
+      Serial.print(entrada);
+      return false;
     }
-    else if (comando == "girar direita") {
-      // Código para girar
-      Serial.println("Girando para direita");
+  }
+
+  bool naFila = false;
+  switch (id) {
+    case CMD_LIGAR_LED:
+      digitalWrite(LED_PIN, HIGH);
+      break;
+    case CMD_DESLIGAR_LED:
+      digitalWrite(LED_PIN, LOW);
+      break;
+    case CMD_PARAR:
+      if (!emLote || !(actionActive || queueCount)) {
+        // Para na hora, mesmo no meio de um movimento
+        stopAll();
+        break;
+      }
+      // Em lote, "parar" vem depois dos movimentos anteriores
+    case CMD_AVANCAR:
+    case CMD_GIRAR_ESQUERDA:
+    case CMD_GIRAR_DIREITA:
+    case CMD_GIRAR_CABECA:
+      if (!actionActive && queueCount == 0) {
+        startAction(id, param);
+      } else if (enqueueAction(id, param)) {
+        naFila = true;
+      } else {
+        Serial.print("Fila cheia, ignorado: ");
+        Serial.print(entrada);
+        return false;
+      }
+      break;
+    case CMD_AJUDA:
+      Serial.print((const __FlashStringHelper*)HELP_TEXT);
+      return true;
+    default:
+      Serial.print("Comando não reconhecido: ");
+      Serial.print(entrada);
+      return false;
+  }
+  Serial.print(commandReply(id));
+  if (param >= 0) {
+    Serial.print(' ');
+    Serial.print(param);
+    Serial.print(' ');
+    Serial.print(commandUnit(id));
+  }
+  if (naFila) {
+    Serial.print(" (na fila)");
+  }
+  return true;
+}
+
+// Lote "lote:cmd1;cmd2;...": atende em ordem e responde numa única linha,
+// com as respostas separadas por "; "
+void executeBatch(char* lista) {
+  bool first = true;
+  char* parte = strtok(lista, ";");
+  while (parte != NULL) {
+    while (*parte == ' ') parte++;
+    if (*parte) {
+      if (!first) Serial.print("; ");
+      executeCommand(parte, true);
+      first = false;
     }
-    else if (comando == "girar cabeca" || comando == "gira cabeça" || comando == "gira a cabeça" || comando == "girar cabeça" || comando == "girar a cabeça" || comando == "gire a cabeça") {
-      Serial.println("Girando a cabeça no giro do exorcista!");
+    parte = strtok(NULL, ";");
+  }
+  Serial.println();
+}
+
+// Trata uma linha completa (já em minúsculas e sem espaços nas pontas)
+void handleLine(char* comando) {
+  // Verificação inicial de comunicação
+  if (strcmp(comando, "teste_comunicacao") == 0) {
+    Serial.println("Comunicação estabelecida com sucesso");
+    return;
+  }
+
+  // Heartbeat do monitor de saúde (saude_serial.py): "ping <n>" -> "pong <n>"
+  if (strcmp(comando, "ping") == 0 || strncmp(comando, "ping ", 5) == 0) {
+    Serial.print("pong");
+    Serial.println(comando + 4);
+    return;
+  }
+
+  // Estatísticas do canal contínuo
+  if (strcmp(comando, "estado_movimento") == 0) {
+    printMotionStatus();
+    return;
+  }
+
+  // Latência do loop() e da fila
+  if (strcmp(comando, "estado_laco") == 0) {
+    printLoopStatus();
+    return;
+  }
+
+  // "telemetria <hz>": liga a telemetria (0 desliga)
+  if (strncmp(comando, "telemetria", 10) == 0) {
+    long hz = atol(comando + 10);
+    if (hz < 0) hz = 0;
+    if (hz > TELEMETRY_MAX_HZ) hz = TELEMETRY_MAX_HZ;
+    telemetryPeriodMs = hz ? 1000 / hz : 0;
+    lastTelemetryMs = millis();
+    Serial.print("telemetria: ");
+    Serial.print(hz);
+    Serial.println(" Hz");
+    return;
+  }
+
+  // Vários comandos numa única transação
+  if (strncmp(comando, "lote:", 5) == 0) {
+    executeBatch(comando + 5);
+    return;
+  }
+
+  // Processar comandos do registro
+  executeCommand(comando, false);
+  Serial.println();
+}
+
+// Linha recebida: tira espaços das pontas e trata
+void finishLine() {
+  lineBuf[lineLen] = '\0';
+  char* comando = lineBuf;
+  while (*comando == ' ' || *comando == '\t') comando++;
+  char* fim = lineBuf + lineLen;
+  while (fim > comando && (fim[-1] == ' ' || fim[-1] == '\t')) *--fim = '\0';
+
+  if (lineOverflow) {
+    Serial.println("Linha longa demais, ignorada");
+  } else if (*comando) {
+    handleLine(comando);
+  }
+  unsigned long atendimento = micros() - lineStartUs;
+  if (atendimento > intakeMaxUs) intakeMaxUs = atendimento;
+  lineLen = 0;
+  lineOverflow = false;
+}
+
+// Lê os bytes disponíveis sem esperar: linhas de texto e quadros de setpoint
+void pollSerial() {
+  if (frameLen && millis() - frameStartMs > SETPOINT_FRAME_TIMEOUT_MS) {
+    frameLen = 0;  // quadro incompleto
+    setpointInvalid++;
+  }
+  uint8_t lidos = 0;
+  while (Serial.available() && lidos++ < MAX_BYTES_PER_LOOP) {
+    uint8_t c = Serial.read();
+    if (frameLen) {
+      frameBuf[frameLen++] = c;
+      if (frameLen == SETPOINT_FRAME_LEN) {
+        handleSetpointFrame(frameBuf);
+        frameLen = 0;
+      }
+      continue;
     }
-    else if (comando == "ajuda" || comando == "ajudar" || 
-             comando == "socorro" || comando == "help") {
-      Serial.println("Comandos disponíveis: ligar led, desligar led, liga, desliga, "
-                    "avançar, parar, girar esquerda, girar direita, girar cabeça, "
-                    "ajuda, socorro, help");
+    // Quadro de setpoint: começa com um byte que nunca inicia uma linha de texto
+    if (lineLen == 0 && !lineOverflow && c == SETPOINT_START) {
+      frameBuf[0] = c;
+      frameLen = 1;
+      frameStartMs = millis();
+      continue;
     }
-    else {
-      Serial.print("Comando não reconhecido: ");
-      Serial.println(comando);
+    if (c == '\n') {
+      finishLine();
+    } else if (c != '\r') {
+      if (lineLen == 0 && !lineOverflow) lineStartUs = micros();
+      if (lineLen < LINE_MAX - 1) {
+        lineBuf[lineLen++] = (c < 0x80) ? tolower(c) : c;
+      } else {
+        lineOverflow = true;
+      }
     }
   }
 }
+
+void loop() {
+  unsigned long agora = micros();
+  if (agora - lastLoopUs > loopMaxUs) loopMaxUs = agora - lastLoopUs;
+  lastLoopUs = agora;
+
+  pollSerial();
+  runScheduler();
+  checkSetpointWatchdog();
+  checkTelemetry();
+}
@@ -1,47 +1,117 @@
 import speech_recognition as sr
 import serial
 import time
+import queue
+import argparse
+import threading
 import pyttsx3  # Para fala
 
+from voz_local import BACKENDS, SAMPLE_RATE, make_recognizer
+
+# Linha de comando: backend de reconhecimento (google precisa de internet, vosk roda local)
+p = argparse.ArgumentParser(description="Controle do LED do Arduino por voz, com resposta falada")
+p.add_argument("--backend", choices=BACKENDS, default="google", help="google (online) ou vosk (offline, voz_local.py)")
+p.add_argument("--calibrar", type=float, default=1.0, metavar="S", help="Segundos de calibração do ruído ambiente")
+args = p.parse_args()
+
 # Configurar comunicação serial com o Arduino
 #arduino = serial.Serial('COM3', 9600)  # Altere para a porta correta do seu Arduino
 arduino = serial.Serial('/dev/ttyUSB0', 9600)  # Altere para a porta correta do seu Arduino
 time.sleep(2)  # Esperar o Arduino iniciar
 
-# Inicializar reconhecimento de voz e motor de fala
+# Inicializar reconhecimento de voz
 recognizer = sr.Recognizer()
-engine = pyttsx3.init()
+recognize = make_recognizer(args.backend, recognizer)
+
+# Fala numa thread própria, dona do motor pyttsx3: speak() só enfileira e
+# volta na hora, então o microfone continua ouvindo e a serial não espera a fala
+speech_queue = queue.Queue()
+# O microfone ouve a própria fala ("VOCE FALOU: ligar led" seria um novo
+# "ligar led"): frases captadas enquanto a fala toca são descartadas
+speaking = threading.Event()
+speech_ended_at = 0.0
+
+
+def speech_worker():
+    global speech_ended_at
+    engine = pyttsx3.init()
+    while True:
+        message = speech_queue.get()
+        if message is None:
+            break
+        speaking.set()
+        engine.say(message)
+        engine.runAndWait()
+        if speech_queue.empty():
+            speech_ended_at = time.monotonic()
+            speaking.clear()
+
 
 def speak(message):
     print(message)
-    engine.say(message)
-    engine.runAndWait()
+    speaking.set()
+    speech_queue.put(message)
 
-speak("FALE ALGUMA COISA...")
 
-while True:
-    try:
-        with sr.Microphone() as source:
-            audio = recognizer.listen(source)
-            command = recognizer.recognize_google(audio).lower()
-            speak("VOCE FALOU: " + command)
-
-            # Comandos reconhecidos
-            if "led on" in command:
-                arduino.write(b"ON\n")
-                speak("Turning LED on")
-            elif "led off" in command:
-                arduino.write(b"OFF\n")
-                speak("Turning LED off")
-            elif "exit" in command:
-                speak("Exiting program")
-                break
-            else:
-                speak("COMANDO NAO RECONHECIDO")
+speech_thread = threading.Thread(target=speech_worker, daemon=True, name="fala")
+speech_thread.start()
 
+# Sinaliza o fim do programa a partir da thread de escuta
+exit_requested = threading.Event()
+
+
+def on_phrase(recognizer, audio):
+    # Roda na thread de escuta do speech_recognition, a cada frase capturada
+    duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    if speaking.is_set() or time.monotonic() - duration < speech_ended_at:
+        print("(frase captada durante a fala, ignorada)")
+        return
+    try:
+        command = recognize(audio).lower()
     except sr.UnknownValueError:
         speak("Sorry, I could not understand the audio.")
+        return
     except sr.RequestError:
         speak("Could not connect to the internet. Please check your connection.")
+        return
+
+    # Comandos reconhecidos (frases em português para o modelo local).
+    # O Arduino recebe o comando antes do eco falado, sem esperar a fala.
+    if "led on" in command or ("ligar led" in command and "desligar" not in command):
+        arduino.write(b"ON\n")
+        reply = "Turning LED on"
+    elif "led off" in command or "desligar led" in command:
+        arduino.write(b"OFF\n")
+        reply = "Turning LED off"
+    elif "exit" in command or "sair" in command:
+        reply = "Exiting program"
+        exit_requested.set()
+    else:
+        reply = "COMANDO NAO RECONHECIDO"
+    speak("VOCE FALOU: " + command)
+    speak(reply)
+
+
+# Uma única sessão do microfone, calibrada uma vez com o ambiente em silêncio
+microphone = sr.Microphone(sample_rate=SAMPLE_RATE)
+with microphone as source:
+    print("Calibrando o ruído ambiente, fique em silêncio...")
+    recognizer.adjust_for_ambient_noise(source, duration=args.calibrar)
+
+# Captura em segundo plano: o microfone fica aberto enquanto a fala toca
+stop_listening = recognizer.listen_in_background(microphone, on_phrase)
+speak("FALE ALGUMA COISA...")
 
-arduino.close()
+try:
+    while not exit_requested.wait(0.5):
+        pass
+except KeyboardInterrupt:
+    print("Interrompido pelo usuário")
+finally:
+    # Espera a thread de escuta sair: on_phrase pode estar escrevendo na serial
+    # ou enfileirando fala, e a porta só pode fechar depois disso
+    stop_listening(wait_for_stop=True)
+    # Deixa a fala pendente terminar antes de sair
+    speech_queue.put(None)
+    speech_thread.join(timeout=10)
+    arduino.close()
@@ -0,0 +1,216 @@
+# Saída estruturada das transcrições (Projeto Athena)
+#
+# Os scripts imprimiam o JSON cru de rec.Result() no console, e quem queria
+# montar um dataset precisava reprocessar o log. Aqui cada resultado final
+# vira um registro tipado, com o instante e a confiança de cada palavra
+# (SetWords do Vosk):
+#
+#   Utterance(start, end, text, conf, words, source)
+#   Word(word, start, end, conf)
+#
+# e os escritores gravam os registros conforme chegam, em JSONL, SRT ou
+# WebVTT. O buffer é limitado: descarrega a cada `max_pending` registros ou
+# `flush_s` segundos, então uma sessão longa não acumula tudo na memória e
+# uma interrupção perde no máximo o último lote.
+#
+# API:
+#   enable_words(rec)
+#   u = parse_result(rec.Result(), offset_s=inicio_do_trecho)
+#   with open_writer("sessao.srt") as out:     # .jsonl, .srt, .vtt ou "-" (console)
+#       out.write(u)
+#   read_jsonl("sessao.jsonl")                 # -> Utterances
+
+import sys
+import json
+import time
+from collections import namedtuple
+
+Word = namedtuple("Word", "word start end conf")
+Utterance = namedtuple("Utterance", "start end text conf words source")
+
+FORMATS = ("jsonl", "srt", "vtt")
+# Legendas: uma frase longa é quebrada em blocos de no máximo isto
+MAX_CUE_S = 6.0
+MAX_CUE_CHARS = 84
+
+
+def enable_words(rec):
+    """Liga instantes/confiança por palavra, se o reconhecedor suportar. Retorna True se ligou."""
+    if not hasattr(rec, "SetWords"):
+        return False
+    rec.SetWords(True)
+    return True
+
+
+def parse_result(result, offset_s=0.0, source=None, start_s=None, end_s=None):
+    """
+    Resultado do Vosk (JSON ou dict) -> Utterance, ou None se o texto for vazio.
+    offset_s soma-se aos instantes das palavras (início do trecho na gravação);
+    start_s/end_s valem quando o resultado não traz palavras.
+    """
+    j = json.loads(result) if isinstance(result, (str, bytes)) else result
+    text = j.get("text", "").strip()
+    if not text:
+        return None
+    words = tuple(Word(w["word"], round(offset_s + w["start"], 3), round(offset_s + w["end"], 3),
+                       round(w.get("conf", 1.0), 3))
+                  for w in j.get("result", ()))
+    if words:
+        start, end = words[0].start, words[-1].end
+        conf = round(sum(w.conf for w in words) / len(words), 3)
+    else:
+        start = round(start_s if start_s is not None else offset_s, 3)
+        end = round(end_s if end_s is not None else start, 3)
+        conf = None
+    return Utterance(start, end, text, conf, words, source)
+
+
+def utterance_to_dict(u):
+    d = {"inicio": u.start, "fim": u.end, "texto": u.text, "conf": u.conf,
+         "palavras": [{"palavra": w.word, "inicio": w.start, "fim": w.end, "conf": w.conf} for w in u.words]}
+    if u.source is not None:
+        d["fonte"] = u.source
+    return d
+
+
+def utterance_from_dict(d):
+    words = tuple(Word(w["palavra"], w["inicio"], w["fim"], w.get("conf")) for w in d.get("palavras", ()))
+    return Utterance(d["inicio"], d["fim"], d["texto"], d.get("conf"), words, d.get("fonte"))
+
+
+def read_jsonl(path):
+    """Lê um JSONL escrito por JsonlWriter (linha final cortada é ignorada)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield utterance_from_dict(json.loads(line))
+            except (json.JSONDecodeError, KeyError):
+                continue
+
+
+def split_cues(u, max_s=MAX_CUE_S, max_chars=MAX_CUE_CHARS):
+    """Blocos (início, fim, texto) de legenda, quebrando a frase entre palavras."""
+    if not u.words:
+        return [(u.start, u.end, u.text)]
+    cues = []
+    group = []
+    for w in u.words:
+        if group and (w.end - group[0].start > max_s
+                      or sum(len(g.word) + 1 for g in group) + len(w.word) > max_chars):
+            cues.append((group[0].start, group[-1].end, " ".join(g.word for g in group)))
+            group = []
+        group.append(w)
+    cues.append((group[0].start, group[-1].end, " ".join(g.word for g in group)))
+    return cues
+
+
+def _timestamp(seconds, sep):
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+class TranscriptWriter:
+    """
+    Escritor incremental com buffer limitado. `target` é um caminho, "-"
+    (saída padrão) ou um arquivo já aberto.
+    """
+
+    def __init__(self, target, max_pending=32, flush_s=2.0):
+        if hasattr(target, "write"):
+            self.file, self._owns = target, False
+        elif target == "-":
+            self.file, self._owns = sys.stdout, False
+        else:
+            self.file, self._owns = open(target, "w", encoding="utf-8"), True
+        self.max_pending = max_pending
+        self.flush_s = flush_s
+        self.count = 0
+        self._pending = []
+        self._last_flush = time.monotonic()
+        header = self.header()
+        if header:
+            self._pending.append(header)
+
+    def header(self):
+        return ""
+
+    def format(self, u):
+        raise NotImplementedError
+
+    def write(self, u):
+        if u is None:
+            return
+        self.count += 1
+        self._pending.append(self.format(u))
+        if len(self._pending) >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_s:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.file.write("".join(self._pending))
+            self._pending.clear()
+        self.file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        if self._owns:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlWriter(TranscriptWriter):
+    def format(self, u):
+        return json.dumps(utterance_to_dict(u), ensure_ascii=False) + "\n"
+
+
+class SrtWriter(TranscriptWriter):
+    TIME_SEP = ","
+
+    def __init__(self, target, max_pending=32, flush_s=2.0, max_cue_s=MAX_CUE_S, max_cue_chars=MAX_CUE_CHARS):
+        self.max_cue_s = max_cue_s
+        self.max_cue_chars = max_cue_chars
+        self.cues = 0
+        super().__init__(target, max_pending, flush_s)
+
+    def _cue_id(self):
+        return f"{self.cues}\n"
+
+    def format(self, u):
+        out = []
+        for start, end, text in split_cues(u, self.max_cue_s, self.max_cue_chars):
+            self.cues += 1
+            out.append(f"{self._cue_id()}{_timestamp(start, self.TIME_SEP)} --> "
+                       f"{_timestamp(end, self.TIME_SEP)}\n{text}\n\n")
+        return "".join(out)
+
+
+class VttWriter(SrtWriter):
+    TIME_SEP = "."
+
+    def header(self):
+        return "WEBVTT\n\n"
+
+    def _cue_id(self):
+        return ""
+
+
+_WRITERS = {"jsonl": JsonlWriter, "srt": SrtWriter, "vtt": VttWriter}
+
+
+def open_writer(target, fmt=None, **kwargs):
+    """Escritor pelo formato ou pela extensão do arquivo (padrão: jsonl)."""
+    if fmt is None:
+        ext = target.rsplit(".", 1)[-1].lower() if isinstance(target, str) and "." in target else "jsonl"
+        fmt = {"json": "jsonl", "webvtt": "vtt"}.get(ext, ext)
+    if fmt not in _WRITERS:
+        raise ValueError(f"formato de saída desconhecido: {fmt} (use {', '.join(FORMATS)})")
+    return _WRITERS[fmt](target, **kwargs)
@@ -0,0 +1,230 @@
+#pip install pyserial numpy
+
+# Monitor de saúde do enlace serial (Projeto Athena)
+#
+# check_arduino_communication() só roda uma vez, na inicialização; depois,
+# um Arduino travado só aparece quando cada comando espera o
+# SERIAL_RESPONSE_TIMEOUT inteiro. Este monitor manda um heartbeat barato
+# ("ping <n>", o firmware responde "pong <n>") em segundo plano pelo enlace
+# (enlace_serial.py) e mede continuamente:
+#
+#   - RTT da serial (ida e volta do ping) e jitter (variação entre RTTs seguidos)
+#   - pings sem resposta
+#   - estado do enlace: "up", "degraded" (RTT alto ou pongs faltando) e
+#     "down" (nenhum pong dentro da janela stall_s)
+#
+# O despachante consulta is_up() antes de enviar e request() desiste assim
+# que o enlace cai, em vez de esperar o timeout. Os limites ficam na seção
+# [ENLACE_SERIAL] de ~/Athena/config.ini.
+#
+# O RTT do ping mede também a latência de entrada do firmware: o loop() não
+# bloqueia, então um "ping" é atendido mesmo com o robô em movimento.
+# firmware_loop_stats() lê "estado_laco" (pior volta do loop() e pior
+# atendimento de uma linha, em µs, zerados a cada leitura).
+#
+# USO (medição com o robô em movimento):
+#   python saude_serial.py --porta /dev/ttyUSB0 --segundos 20 --carga
+
+import os
+import time
+import argparse
+import threading
+import configparser
+from collections import deque
+
+import numpy as np
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+
+LINK_UP = "up"
+LINK_DEGRADED = "degraded"
+LINK_DOWN = "down"
+
+# Padrões (sobrescritos pela seção [ENLACE_SERIAL] do config.ini)
+DEFAULT_MONITOR = {
+    "interval_s": 1.0,        # período do heartbeat
+    "stall_s": 3.0,           # sem pong por esse tempo: enlace caído
+    "rtt_high_ms": 150.0,     # RTT acima disso: degradado
+    "history": 120,           # RTTs guardados para as estatísticas
+}
+
+
+def load_monitor_config():
+    """Lê a seção [ENLACE_SERIAL] do config.ini, mantendo os padrões para chaves ausentes."""
+    cfg = dict(DEFAULT_MONITOR)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("ENLACE_SERIAL"):
+        for key, default in DEFAULT_MONITOR.items():
+            if key in config["ENLACE_SERIAL"]:
+                try:
+                    cfg[key] = type(default)(config["ENLACE_SERIAL"][key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [ENLACE_SERIAL], usando {default}")
+    return cfg
+
+
+class LinkMonitor:
+    """Heartbeat em segundo plano com RTT, jitter e estado do enlace."""
+
+    def __init__(self, link, cfg=None, on_state=None):
+        self.link = link
+        self.cfg = cfg or load_monitor_config()
+        self.on_state = on_state
+        self.state = LINK_UP
+        self.state_since = time.monotonic()
+        self.sent = 0
+        self.received = 0
+        self._seq = 0
+        self._pending = {}  # seq -> instante do envio
+        self._rtts = deque(maxlen=int(self.cfg["history"]))
+        self._last_pong = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        link.add_line_handler("pong", self._on_pong)
+
+    def start(self):
+        self._last_pong = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="enlace-saude")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _on_pong(self, line, t):
+        parts = line.split()
+        try:
+            seq = int(parts[1])
+        except (IndexError, ValueError):
+            return
+        with self._lock:
+            sent_at = self._pending.pop(seq, None)
+            if sent_at is None:
+                return
+            # Pings mais antigos que este não vão mais ser respondidos
+            for old in [s for s in self._pending if s < seq]:
+                del self._pending[old]
+            self._rtts.append((t - sent_at) * 1000.0)
+            self._last_pong = t
+            self.received += 1
+        self._update_state()
+
+    def _run(self):
+        while not self._stop.wait(self.cfg["interval_s"]):
+            with self._lock:
+                self._seq += 1
+                seq = self._seq
+                self._pending[seq] = time.monotonic()
+                self.sent += 1
+            try:
+                self.link.send_line(f"ping {seq}")
+            except Exception:
+                pass  # porta com erro: o estado cai pela falta de pong
+            self._update_state()
+
+    def _update_state(self):
+        now = time.monotonic()
+        with self._lock:
+            silent_s = now - self._last_pong
+            last_rtt = self._rtts[-1] if self._rtts else None
+            missing = sum(1 for s, t0 in self._pending.items() if now - t0 > self.cfg["interval_s"])
+        if silent_s >= self.cfg["stall_s"]:
+            state = LINK_DOWN
+        elif missing or (last_rtt is not None and last_rtt > self.cfg["rtt_high_ms"]):
+            state = LINK_DEGRADED
+        else:
+            state = LINK_UP
+        if state != self.state:
+            previous, self.state, self.state_since = self.state, state, now
+            if self.on_state is not None:
+                self.on_state(previous, state, self.stats())
+
+    def is_up(self):
+        """False só quando o enlace está caído (degradado ainda aceita comandos)."""
+        self._update_state()
+        return self.state != LINK_DOWN
+
+    def stats(self):
+        with self._lock:
+            rtts = np.array(self._rtts)
+            silent_s = time.monotonic() - self._last_pong
+            sent, received = self.sent, self.received
+        out = {"state": self.state, "sent": sent, "received": received,
+               "lost": max(0, sent - received - len(self._pending)),
+               "last_pong_s": round(silent_s, 2)}
+        if rtts.size:
+            out["rtt_ms"] = {
+                "last": round(float(rtts[-1]), 1),
+                "mean": round(float(rtts.mean()), 1),
+                "p95": round(float(np.percentile(rtts, 95)), 1),
+                "max": round(float(rtts.max()), 1),
+            }
+            # Jitter: média da variação entre RTTs consecutivos
+            out["jitter_ms"] = round(float(np.abs(np.diff(rtts)).mean()), 1) if rtts.size > 1 else 0.0
+        return out
+
+
+def firmware_loop_stats(link, timeout=1.0):
+    """
+    Contadores do loop() do firmware ("estado_laco"): max_us, atendimento_max_us,
+    fila, descartados, acao (ms restantes), telemetria_puladas. None sem resposta.
+    """
+    line = link.request("estado_laco", timeout)
+    if not line or not line.startswith("laco:"):
+        return None
+    stats = {}
+    for item in line.split(":", 1)[1].split():
+        key, _, value = item.partition("=")
+        try:
+            stats[key] = int(value)
+        except ValueError:
+            stats[key] = value
+    return stats
+
+
+def main():
+    import serial
+    from enlace_serial import SerialLink
+
+    p = argparse.ArgumentParser(description="Mede RTT e latência de entrada do firmware")
+    p.add_argument("--porta", default="/dev/ttyUSB0")
+    p.add_argument("--segundos", type=float, default=20.0)
+    p.add_argument("--intervalo", type=float, default=0.25, help="Período do ping (s)")
+    p.add_argument("--carga", action="store_true",
+                   help="Mantém o robô em movimentos agendados durante a medição")
+    args = p.parse_args()
+
+    ser = serial.Serial(args.porta, 9600, timeout=0.2)
+    time.sleep(2.0)  # Tempo para Arduino reiniciar
+    link = SerialLink(ser).start()
+    cfg = load_monitor_config()
+    cfg["interval_s"] = args.intervalo
+    firmware_loop_stats(link)  # zera os máximos do firmware
+    monitor = LinkMonitor(link, cfg, on_state=lambda old, new, st: print(f"Enlace: {old} -> {new}")).start()
+    t0 = time.monotonic()
+    try:
+        while time.monotonic() - t0 < args.segundos:
+            if args.carga:
+                # ~4,5 s de movimentos agendados no firmware
+                print("Firmware:", link.request("lote:girar direita 90;girar esquerda 90;avancar 50", 2.0))
+            time.sleep(5.0)
+    except KeyboardInterrupt:
+        pass
+    monitor.stop()
+    if args.carga:
+        print("Firmware:", link.request("parar", 2.0))
+    print("Enlace:", monitor.stats())
+    print("Firmware:", firmware_loop_stats(link))
+    link.close()
+    ser.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+#pip install vosk sounddevice numpy
+
+# Serviço residente de reconhecimento de voz (Projeto Athena)
+#
+# Carrega os modelos Vosk UMA vez e atende vários clientes por um socket Unix.
+# Cada cliente tem sua própria sessão (KaldiRecognizer) sobre o Model
+# compartilhado, então scripts e ferramentas conectam instantaneamente em vez
+# de recarregar ~1.6GB do modelo completo a cada execução.
+#
+# USO:
+#   python servico_vosk.py serve [--models small,full] [--socket /tmp/athena_vosk.sock]
+#   python servico_vosk.py serve --progressive   # atende com o leve enquanto o completo carrega
+#   python servico_vosk.py serve --governor      # progressivo + troca de tier por RTF/memória/temperatura
+#   python servico_vosk.py status
+#   python servico_vosk.py mic          # transcreve o microfone pelo serviço
+#
+# PROTOCOLO (cliente -> serviço): quadros  [tipo:1 byte][tamanho:uint32 BE][payload]
+#   b"C"  configuração JSON: {"sample_rate": 16000, "model": "small"|"full"|null,
+#                             "grammar": [...]|null, "words": bool, "backlog": bool}
+#   b"A"  áudio PCM int16 mono; com "backlog": true, precedido de uint32 BE com os
+#         ms de áudio ainda na fila do cliente (o governador usa o maior atraso)
+#   b"F"  finaliza a frase atual (FinalResult)
+#   b"R"  reinicia o reconhecedor
+#   b"S"  status do serviço (não precisa de "C" antes)
+# PROTOCOLO (serviço -> cliente): uma linha JSON por quadro recebido
+#   {"type": "ready", ...} | {"type": "partial", "partial": ...}
+#   {"type": "result", "text": ...} | {"type": "final", "text": ...}
+#   {"type": "status", ...} | {"type": "error", "message": ...}
+
+import sys
+import os
+import json
+import time
+import socket
+import struct
+import threading
+import socketserver
+import argparse
+
+# Ajuste conforme seu ambiente
+FULL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+MODEL_DIRS = {
+    "small": SMALL_MODEL_DIR,
+    "full": FULL_MODEL_DIR,
+}
+SAMPLE_RATE = 16000
+
+# Caminho do socket (pode ser sobrescrito pela variável de ambiente)
+SOCKET_PATH = os.environ.get("ATHENA_VOSK_SOCKET", "/tmp/athena_vosk.sock")
+
+# Tempo máximo esperando resposta do serviço (segundos)
+CLIENT_TIMEOUT = 30.0
+
+_HEADER = struct.Struct(">cI")
+_BACKLOG = struct.Struct(">I")
+
+
+def send_frame(sock, kind: bytes, payload: bytes = b""):
+    """Envia um quadro [tipo][tamanho][payload] sem copiar o payload."""
+    sock.sendmsg([_HEADER.pack(kind, len(payload)), payload])
+
+
+def read_frame(rfile):
+    """Lê um quadro do arquivo de leitura. Retorna (tipo, payload) ou (None, None) no EOF."""
+    header = rfile.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None, None
+    kind, size = _HEADER.unpack(header)
+    payload = rfile.read(size) if size else b""
+    if len(payload) < size:
+        return None, None
+    return kind, payload
+
+
+# ---------------------------------------------------------------------------
+# Serviço
+# ---------------------------------------------------------------------------
+
+class ModelRegistry:
+    """Guarda os modelos carregados (um por nome) e estatísticas do serviço."""
+
+    def __init__(self):
+        self.models = {}
+        self.load_times = {}
+        self.started = time.time()
+        self.sessions = 0
+        self.active = 0
+        self.progressive = None
+        self.governor = None
+        self._lock = threading.Lock()
+        # Sessões abertas: handler -> segundos de áudio na fila do cliente (último informado)
+        self._backlogs = {}
+
+    def load(self, name, path):
+        from vosk import Model
+        print(f"Carregando modelo '{name}' de {path} ...")
+        t0 = time.perf_counter()
+        self.models[name] = Model(path)
+        self.load_times[name] = round(time.perf_counter() - t0, 2)
+        print(f"Modelo '{name}' carregado em {self.load_times[name]} s")
+
+    def load_progressive(self, governor=False):
+        """Modo progressivo: leve primeiro, completo em segundo plano (modelos_vosk.py)."""
+        from modelos_vosk import ProgressiveModel
+        self.progressive = ProgressiveModel().start()
+        if governor:
+            from governador_modelos import ModelGovernor
+            from comandos import COMMAND_INDEX
+            from intencoes import grammar_words
+            # Tier "grammar": modelo leve restrito aos comandos válidos
+            self.progressive.grammar = COMMAND_INDEX.phrases + grammar_words()
+            self.governor = ModelGovernor(self.progressive, backlog_fn=self.backlog_s).start()
+        # Compartilha os dicionários: o modelo completo aparece aqui quando terminar de carregar
+        self.models = self.progressive.models
+        self.load_times = self.progressive.load_times
+
+    def get(self, name=None):
+        """Retorna (nome, Model). Sem nome, prefere o modelo completo."""
+        if name is None:
+            for candidate in ("full", "small"):
+                if candidate in self.models:
+                    return candidate, self.models[candidate]
+            name = next(iter(self.models))
+        if name not in self.models:
+            raise KeyError(f"modelo '{name}' não carregado (disponíveis: {', '.join(self.models)})")
+        return name, self.models[name]
+
+    def session_opened(self, handler=None):
+        with self._lock:
+            self.sessions += 1
+            self.active += 1
+            if handler is not None:
+                self._backlogs[handler] = 0.0
+
+    def session_closed(self, handler=None):
+        with self._lock:
+            self.active -= 1
+            self._backlogs.pop(handler, None)
+
+    def session_backlog(self, handler, seconds):
+        with self._lock:
+            if handler in self._backlogs:
+                self._backlogs[handler] = seconds
+
+    def backlog_s(self):
+        """
+        Maior atraso entre as sessões: segundos de áudio na fila do cliente,
+        informados a cada bloco (o protocolo é um bloco por ida e volta, o
+        atraso real fica do lado do cliente).
+        """
+        with self._lock:
+            return max(self._backlogs.values(), default=0.0)
+
+    def status(self):
+        return {
+            "type": "status",
+            "models": sorted(self.models),
+            "load_s": self.load_times,
+            "uptime_s": round(time.time() - self.started, 1),
+            "sessions_total": self.sessions,
+            "sessions_active": self.active,
+            "tier": self.progressive.tier if self.progressive else None,
+            "tier_events": self.progressive.events if self.progressive else [],
+            "governor": self.governor.last_sample if self.governor else None,
+            "backlog_s": round(self.backlog_s(), 2),
+        }
+
+
+class RecognitionHandler(socketserver.StreamRequestHandler):
+    """Uma sessão de reconhecimento por conexão."""
+
+    def _reply(self, msg):
+        self.wfile.write((json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def _configure(self, registry, cfg, sample_rate):
+        """Reconhecedor da sessão para a configuração "C". Retorna (rec, resposta "ready")."""
+        from vosk import KaldiRecognizer
+        grammar = cfg.get("grammar")
+        if registry.progressive is not None and cfg.get("model") is None and not grammar:
+            # Sessão acompanha o tier atual e troca de modelo na fronteira de frase
+            rec = registry.progressive.recognizer(sample_rate)
+            if cfg.get("words"):
+                rec.SetWords(True)
+            return rec, {"type": "ready", "model": rec.tier, "sample_rate": sample_rate, "progressive": True}
+        model_name, model = registry.get(cfg.get("model"))
+        if grammar:
+            rec = KaldiRecognizer(model, sample_rate, json.dumps(grammar, ensure_ascii=False))
+        else:
+            rec = KaldiRecognizer(model, sample_rate)
+        if cfg.get("words"):
+            rec.SetWords(True)
+        return rec, {"type": "ready", "model": model_name, "sample_rate": sample_rate}
+
+    def handle(self):
+        from decodificar_audio import as_waveform
+        registry = self.server.registry
+        registry.session_opened(self)
+        rec = None
+        model_name = None
+        sample_rate = SAMPLE_RATE
+        reports_backlog = False
+        audio_bytes = 0
+        decode_s = 0.0
+        try:
+            while True:
+                kind, payload = read_frame(self.rfile)
+                if kind is None:
+                    break
+
+                if kind == b"S":
+                    self._reply(registry.status())
+                elif kind == b"C":
+                    try:
+                        cfg = json.loads(payload or b"{}")
+                        sample_rate = int(cfg.get("sample_rate", SAMPLE_RATE))
+                        rec, ready = self._configure(registry, cfg, sample_rate)
+                    except KeyError as e:
+                        self._reply({"type": "error", "message": str(e)})
+                        continue
+                    except Exception as e:
+                        # JSON inválido, taxa inválida, gramática ou modelo recusados pelo vosk
+                        self._reply({"type": "error", "message": f"configuração inválida: {e}"})
+                        break
+                    reports_backlog = bool(cfg.get("backlog"))
+                    model_name = ready["model"]
+                    self._reply(ready)
+                elif rec is None:
+                    self._reply({"type": "error", "message": "sessão não configurada (envie 'C' primeiro)"})
+                elif kind == b"A":
+                    if reports_backlog:
+                        registry.session_backlog(self, _BACKLOG.unpack_from(payload)[0] / 1000.0)
+                        # O vosk não aceita memoryview: buffer cffi do resto, sem cópia
+                        payload = as_waveform(memoryview(payload)[_BACKLOG.size:])
+                    t0 = time.perf_counter()
+                    if rec.AcceptWaveform(payload):
+                        msg = json.loads(rec.Result())
+                        msg["type"] = "result"
+                    else:
+                        msg = json.loads(rec.PartialResult())
+                        msg["type"] = "partial"
+                    decode_s += time.perf_counter() - t0
+                    audio_bytes += len(payload)
+                    self._reply(msg)
+                elif kind == b"F":
+                    msg = json.loads(rec.FinalResult())
+                    msg["type"] = "final"
+                    self._reply(msg)
+                elif kind == b"R":
+                    rec.Reset()
+                    self._reply({"type": "reset"})
+                else:
+                    self._reply({"type": "error", "message": f"quadro desconhecido: {kind!r}"})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            registry.session_closed(self)
+            audio_s = audio_bytes / (2.0 * sample_rate)
+            if audio_s > 0:
+                print(f"Sessão encerrada ({model_name}): {audio_s:.1f} s de áudio, "
+                      f"RTF {decode_s / audio_s:.3f}")
+
+
+class RecognitionServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, registry):
+        self.registry = registry
+        super().__init__(path, RecognitionHandler)
+
+
+def serve(socket_path=SOCKET_PATH, model_names=None, progressive=False, governor=False):
+    """Carrega os modelos e atende clientes até Ctrl+C / SIGTERM."""
+    registry = ModelRegistry()
+    if progressive or governor:
+        try:
+            registry.load_progressive(governor)
+        except Exception as e:
+            print(f"Erro: Não foi possível carregar os modelos: {e}")
+    else:
+        names = model_names or [n for n, p in MODEL_DIRS.items() if os.path.isdir(p)]
+        for name in names:
+            path = MODEL_DIRS.get(name)
+            if path is None or not os.path.isdir(path):
+                print(f"Aviso: modelo '{name}' não encontrado em {path}")
+                continue
+            try:
+                registry.load(name, path)
+            except Exception as e:
+                print(f"Erro: Não foi possível carregar o modelo '{name}': {e}")
+    if not registry.models:
+        print("Erro: nenhum modelo Vosk carregado.")
+        print(f"Coloque um dos modelos em:\n  - Leve: {SMALL_MODEL_DIR}\n  - Completo: {FULL_MODEL_DIR}")
+        sys.exit(1)
+
+    # Remove socket antigo de uma execução anterior
+    if os.path.exists(socket_path):
+        if service_available(socket_path):
+            print(f"Erro: já existe um serviço ativo em {socket_path}")
+            sys.exit(1)
+        os.remove(socket_path)
+
+    server = RecognitionServer(socket_path, registry)
+    os.chmod(socket_path, 0o660)
+    print(f"Serviço de reconhecimento pronto em {socket_path} (modelos: {', '.join(registry.models)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nInterrompido pelo usuário")
+    finally:
+        server.server_close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Cliente
+# ---------------------------------------------------------------------------
+
+def service_available(socket_path=SOCKET_PATH):
+    """True se houver um serviço respondendo no socket."""
+    if not os.path.exists(socket_path):
+        return False
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(1.0)
+        s.connect(socket_path)
+        s.close()
+        return True
+    except OSError:
+        return False
+
+
+class VoskClient:
+    """Sessão de reconhecimento no serviço residente."""
+
+    def __init__(self, socket_path=SOCKET_PATH, sample_rate=SAMPLE_RATE, model=None,
+                 grammar=None, words=False, timeout=CLIENT_TIMEOUT):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self._rfile = self.sock.makefile("rb")
+        self.info = None
+        self.cfg = {"sample_rate": sample_rate, "model": model,
+                    "grammar": grammar, "words": words, "backlog": True}
+        if sample_rate is not None:
+            self.configure()
+
+    def configure(self, **changes):
+        """(Re)configura a sessão; o serviço cria um reconhecedor novo com a configuração."""
+        self.cfg.update(changes)
+        self.info = self._request(b"C", json.dumps(self.cfg).encode("utf-8"))
+        return self.info
+
+    def _request(self, kind, payload=b""):
+        send_frame(self.sock, kind, payload)
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("serviço de reconhecimento encerrou a conexão")
+        msg = json.loads(line)
+        if msg.get("type") == "error":
+            raise RuntimeError(msg.get("message"))
+        return msg
+
+    def accept_waveform(self, data, backlog_s=0.0):
+        """
+        Envia um bloco de áudio e quantos segundos ainda esperam na fila do
+        cliente; retorna o resultado ('partial' ou 'result').
+        """
+        backlog_ms = min(int(backlog_s * 1000), 0xFFFFFFFF)
+        return self._request(b"A", _BACKLOG.pack(backlog_ms) + bytes(data))
+
+    def final(self):
+        return self._request(b"F")
+
+    def reset(self):
+        return self._request(b"R")
+
+    def status(self):
+        return self._request(b"S")
+
+    def close(self):
+        try:
+            self._rfile.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RemoteRecognizer:
+    """
+    Substituto do KaldiRecognizer que usa o serviço residente.
+    Mantém a mesma interface (AcceptWaveform/Result/PartialResult/FinalResult/Reset)
+    para que os scripts troquem apenas a construção do reconhecedor.
+    backlog_fn() -> segundos de áudio esperando na fila do script, enviados
+    com cada bloco para o governador do serviço.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, socket_path=SOCKET_PATH, model=None, grammar=None,
+                 words=False, backlog_fn=None):
+        self.client = VoskClient(socket_path, sample_rate, model=model, grammar=grammar, words=words)
+        self.backlog_fn = backlog_fn
+        self.model_name = self.client.info.get("model")
+        self._last = {"partial": ""}
+
+    def SetWords(self, enable):
+        """Instantes/confiança por palavra nos resultados (reconfigura a sessão; chame entre frases)."""
+        enable = bool(enable)
+        if self.client.cfg.get("words") != enable:
+            self.model_name = self.client.configure(words=enable).get("model")
+
+    @staticmethod
+    def _dump(msg):
+        msg = dict(msg)
+        msg.pop("type", None)
+        return json.dumps(msg, ensure_ascii=False)
+
+    def AcceptWaveform(self, data):
+        backlog_s = self.backlog_fn() if self.backlog_fn is not None else 0.0
+        self._last = self.client.accept_waveform(data, backlog_s)
+        return self._last.get("type") == "result"
+
+    def Result(self):
+        return self._dump(self._last)
+
+    def PartialResult(self):
+        return self._dump(self._last)
+
+    def FinalResult(self):
+        return self._dump(self.client.final())
+
+    def Reset(self):
+        self.client.reset()
+
+
+def _mic(socket_path, model):
+    """Transcreve o microfone pelo serviço (equivalente a test_vosk_sem_arquivo_wav.py)."""
+    import queue
+    import sounddevice as sd
+
+    q = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        if status:
+            print(status, file=sys.stderr)
+        q.put(bytes(indata))
+
+    rec = RemoteRecognizer(SAMPLE_RATE, socket_path, model=model,
+                           backlog_fn=lambda: q.qsize() * 8000 / SAMPLE_RATE)
+    print(f"Conectado ao serviço (modelo: {rec.model_name})")
+    try:
+        with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=8000, dtype='int16',
+                               channels=1, callback=callback):
+            print("Gravando do microfone. Pressione Ctrl+C para sair.")
+            while True:
+                if rec.AcceptWaveform(q.get()):
+                    print(rec.Result())
+                else:
+                    print(rec.PartialResult())
+    except KeyboardInterrupt:
+        print("\nInterrompido pelo usuário")
+        print(rec.FinalResult())
+
+
+def parse_cli_args():
+    p = argparse.ArgumentParser(description="Serviço residente de reconhecimento Vosk")
+    p.add_argument("command", choices=("serve", "status", "mic"), help="serve: inicia o serviço | status: consulta | mic: transcreve o microfone")
+    p.add_argument("--socket", default=SOCKET_PATH, help="Caminho do socket Unix")
+    p.add_argument("--models", help="Modelos a carregar, ex: small,full (padrão: todos encontrados)")
+    p.add_argument("--model", choices=("small", "full"), help="Modelo usado pelo cliente 'mic'")
+    p.add_argument("--progressive", action="store_true", help="Atende com o modelo leve enquanto o completo carrega em segundo plano")
+    p.add_argument("--governor", action="store_true", help="Progressivo + troca automática de tier por RTF, memória e temperatura")
+    return p.parse_args()
+
+
+def main():
+    args = parse_cli_args()
+    if args.command == "serve":
+        names = [n.strip() for n in args.models.split(",")] if args.models else None
+        serve(args.socket, names, progressive=args.progressive, governor=args.governor)
+    elif args.command == "status":
+        if not service_available(args.socket):
+            print(f"Nenhum serviço ativo em {args.socket}")
+            sys.exit(1)
+        with VoskClient(args.socket, sample_rate=None) as c:
+            print(json.dumps(c.status(), indent=2, ensure_ascii=False))
+    else:
+        _mic(args.socket, args.model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#pip install pyserial numpy
+
+# Telemetria de sensores do Arduino (Projeto Athena)
+#
+# O firmware pode enviar quadros periódicos de sensores (distância, bateria,
+# corrente dos motores), ligados com a linha "telemetria <hz>" (0 desliga):
+#
+#   [0xA6][seq][distância uint16 mm][bateria uint16 mV][corrente int16 mA][xor de seq..corrente]
+#
+# A thread leitora do enlace (enlace_serial.py) só enfileira os bytes do
+# quadro; a decodificação é feita em lote numa thread própria, com
+# np.frombuffer, e os valores vão para um buffer circular de tamanho fixo
+# por canal. Respostas de comandos e o reconhecimento de voz não esperam a
+# telemetria.
+#
+# API:
+#   tel = Telemetry().attach(link)
+#   tel.enable(link, 20)                      # 20 Hz
+#   tel.subscribe(callback, ["distancia_mm"], every=5)
+#   tel.view("bateria_mv", seconds=60, max_points=100)   # média por blocos
+#   tel.latest(), tel.stats()
+#
+# USO (demonstração):
+#   python telemetria.py --porta /dev/ttyUSB0 --hz 20
+
+import time
+import queue
+import argparse
+import threading
+
+import numpy as np
+
+TELEMETRY_START = 0xA6
+FRAME_DTYPE = np.dtype([
+    ("start", "u1"), ("seq", "u1"),
+    ("distancia_mm", "<u2"), ("bateria_mv", "<u2"), ("corrente_ma", "<i2"),
+    ("check", "u1"),
+])
+CHANNELS = ("distancia_mm", "bateria_mv", "corrente_ma")
+# Amostras guardadas por canal (a 50 Hz, ~5 min)
+TELEMETRY_CAPACITY = 16384
+# Taxa máxima aceita pelo firmware
+TELEMETRY_MAX_HZ = 50
+
+
+class RingBuffer:
+    """Buffer circular de tamanho fixo (valores e instantes), pré-alocado."""
+
+    def __init__(self, capacity=TELEMETRY_CAPACITY, dtype=np.float32):
+        self.capacity = capacity
+        self.values = np.zeros(capacity, dtype=dtype)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.count = 0  # total já escrito
+        self.lock = threading.Lock()
+
+    def extend(self, times, values):
+        n = len(values)
+        if n > self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+        with self.lock:
+            start = self.count % self.capacity
+            first = min(n, self.capacity - start)
+            self.values[start:start + first] = values[:first]
+            self.times[start:start + first] = times[:first]
+            if first < n:
+                self.values[:n - first] = values[first:]
+                self.times[:n - first] = times[first:]
+            self.count += n
+
+    def snapshot(self, n=None):
+        """Cópia (instantes, valores) das últimas n amostras, em ordem cronológica."""
+        with self.lock:
+            size = min(self.count, self.capacity)
+            n = size if n is None else min(n, size)
+            end = self.count % self.capacity
+            idx = (np.arange(end - n, end)) % self.capacity
+            return self.times[idx], self.values[idx]
+
+    def view(self, seconds=None, max_points=None):
+        """Últimos `seconds` segundos, reduzidos a no máximo max_points (média por blocos)."""
+        times, values = self.snapshot()
+        if seconds is not None and times.size:
+            keep = times >= times[-1] - seconds
+            times, values = times[keep], values[keep]
+        if max_points and values.size > max_points:
+            k = -(-values.size // max_points)
+            m = values.size // k * k
+            # Descarta as amostras mais antigas que não completam um bloco
+            times = times[-m:].reshape(-1, k)[:, -1]
+            values = values[-m:].reshape(-1, k).mean(axis=1)
+        return times, values
+
+
+class Telemetry:
+    """Decodifica quadros de telemetria em lote e mantém um RingBuffer por canal."""
+
+    def __init__(self, capacity=TELEMETRY_CAPACITY):
+        self.rings = {ch: RingBuffer(capacity) for ch in CHANNELS}
+        self.frames = 0
+        self.invalid = 0
+        self.lost = 0
+        self.subscriber_errors = 0
+        self._last_seq = None
+        self._queue = queue.SimpleQueue()
+        self._subscribers = {}
+        self._next_token = 0
+        self._sub_lock = threading.Lock()
+        self._thread = None
+
+    def attach(self, link):
+        """Registra o quadro no enlace e inicia a thread de decodificação."""
+        link.add_frame_handler(TELEMETRY_START, FRAME_DTYPE.itemsize, self._on_frame)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="telemetria")
+            self._thread.start()
+        return self
+
+    @staticmethod
+    def enable(link, hz, timeout=2.0):
+        """Liga (hz > 0) ou desliga (0) a telemetria no firmware. Retorna a resposta."""
+        hz = max(0, min(TELEMETRY_MAX_HZ, int(hz)))
+        return link.request(f"telemetria {hz}", timeout)
+
+    def _on_frame(self, frame, t):
+        # Thread leitora: só enfileira
+        self._queue.put((t, frame))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._decode(batch)
+
+    def _decode(self, batch):
+        times = np.fromiter((t for t, _ in batch), dtype=np.float64, count=len(batch))
+        raw = np.frombuffer(b"".join(f for _, f in batch), dtype=np.uint8).reshape(len(batch), FRAME_DTYPE.itemsize)
+        ok = np.bitwise_xor.reduce(raw[:, 1:-1], axis=1) == raw[:, -1]
+        self.invalid += int(np.count_nonzero(~ok))
+        if not ok.any():
+            return
+        frames = raw[ok].copy().view(FRAME_DTYPE).reshape(-1)
+        times = times[ok]
+
+        seq = frames["seq"].astype(np.int16)
+        if self._last_seq is not None:
+            seq = np.concatenate(([self._last_seq], seq))
+        self.lost += int(((np.diff(seq) - 1) % 256).sum())
+        self._last_seq = int(frames["seq"][-1])
+        self.frames += len(frames)
+
+        data = {}
+        for ch in CHANNELS:
+            values = frames[ch].astype(np.float32)
+            self.rings[ch].extend(times, values)
+            data[ch] = values
+        self._notify(times, data)
+
+    # ------------------------------------------------------------ assinaturas
+    def subscribe(self, callback, channels=None, every=1):
+        """
+        callback(times, {canal: valores}) a cada lote decodificado, com uma
+        amostra a cada `every` (subamostragem). Roda na thread de telemetria:
+        deve ser rápido. Retorna um token para unsubscribe().
+        """
+        with self._sub_lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = [callback, tuple(channels or CHANNELS), max(1, int(every)), 0]
+        return token
+
+    def unsubscribe(self, token):
+        with self._sub_lock:
+            self._subscribers.pop(token, None)
+
+    def _notify(self, times, data):
+        with self._sub_lock:
+            subscribers = list(self._subscribers.values())
+        for sub in subscribers:
+            callback, channels, every, phase = sub
+            pick = np.nonzero((phase + np.arange(times.size)) % every == 0)[0]
+            sub[3] = (phase + times.size) % every
+            if not pick.size:
+                continue
+            try:
+                callback(times[pick], {ch: data[ch][pick] for ch in channels})
+            except Exception:
+                self.subscriber_errors += 1
+
+    # ------------------------------------------------------------ leitura
+    def view(self, channel, seconds=None, max_points=None):
+        return self.rings[channel].view(seconds, max_points)
+
+    def latest(self):
+        out = {}
+        for ch, ring in self.rings.items():
+            _, values = ring.snapshot(1)
+            out[ch] = float(values[-1]) if values.size else None
+        return out
+
+    def stats(self):
+        times, _ = self.rings[CHANNELS[0]].snapshot(256)
+        rate = (times.size - 1) / (times[-1] - times[0]) if times.size > 1 and times[-1] > times[0] else None
+        return {"frames": self.frames, "invalid": self.invalid, "lost": self.lost,
+                "rate_hz": round(float(rate), 1) if rate else None,
+                "subscriber_errors": self.subscriber_errors}
+
+
+def main():
+    import serial
+    from enlace_serial import SerialLink
+
+    p = argparse.ArgumentParser(description="Demonstração da telemetria de sensores do Arduino")
+    p.add_argument("--porta", default="/dev/ttyUSB0")
+    p.add_argument("--hz", type=int, default=20)
+    p.add_argument("--segundos", type=float, default=10.0)
+    args = p.parse_args()
+
+    ser = serial.Serial(args.porta, 9600, timeout=0.2)
+    time.sleep(2.0)  # Tempo para Arduino reiniciar
+    link = SerialLink(ser).start()
+    tel = Telemetry().attach(link)
+    print("Firmware:", Telemetry.enable(link, args.hz))
+    tel.subscribe(lambda t, d: print(f"distância {d['distancia_mm'][-1]:.0f} mm"), ["distancia_mm"], every=args.hz)
+    try:
+        time.sleep(args.segundos)
+    except KeyboardInterrupt:
+        pass
+    print("Firmware:", Telemetry.enable(link, 0))
+    print("Estatísticas:", tel.stats())
+    _, bat = tel.view("bateria_mv", max_points=10)
+    print("Bateria (média por blocos):", np.round(bat).tolist())
+    link.close()
+    ser.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,7 @@ import time
 from vosk import Model, KaldiRecognizer
 import sounddevice as sd
 import serial
+from comandos import valid_phrases
 
 class TtsMode(Enum):
     OFFLINE = auto()  # espeak/espeak-ng
@@ -66,35 +67,8 @@ COMMAND_RECOGNITION_DELAY = 2.0  # segundos
 # Tempo máximo para esperar o TTS terminar (segundos)
 TTS_WAIT_TIMEOUT = 5.0
 
-# Lista de comandos válidos (tudo em minúsculas)
-VALID_COMMANDS = [
-    "liga",
-    "desliga",
-    "ligue",
-    "desligue",
-    "ligar",
-    "desligar",
-    "teste",
-    "ligar led",
-    "desligar led",
-    "ligar luz",
-    "desligar luz",
-    "avancar",
-    "parar",
-    "girar esquerda",
-    "girar direita",
-    "girar cabeca",
-    "girar cabeça",
-    "gira cabeça",
-    "girar a cabeça",
-    "gira a cabeça",
-    "gire a cabeça",
-    "ajuda",
-    "ajudar",
-    "socorro",
-    "help",
-    "ajuda do cliente", "ajuda do enviador", "ajuda do python"
-]
+# Lista de comandos válidos (tudo em minúsculas), gerada do registro único comandos.json
+VALID_COMMANDS = valid_phrases()
 
 q = queue.Queue()
 
@@ -41,6 +41,8 @@ import time
 from vosk import Model, KaldiRecognizer
 import sounddevice as sd
 import serial
+from servico_vosk import service_available, RemoteRecognizer
+from comandos import valid_phrases
 
 class TtsMode(Enum):
     OFFLINE = auto()  # espeak/espeak-ng
@@ -61,22 +63,8 @@ SERIAL_TIMEOUT = 1.0  # segundos
 # Tempo máximo para esperar resposta do Arduino (segundos)
 SERIAL_RESPONSE_TIMEOUT = 5.0
 
-# Lista de comandos válidos (tudo em minúsculas)
-VALID_COMMANDS = [
-    "liga",
-    "desliga",
-    "ligar",
-    "desligar",
-    "teste",
-    "ligar led",
-    "desligar led",
-    "ligar luz",
-    "desligar luz",
-    "avancar",
-    "parar",
-    "girar esquerda",
-    "girar direita",
-]
+# Lista de comandos válidos (tudo em minúsculas), gerada do registro único comandos.json
+VALID_COMMANDS = valid_phrases()
 
 q = queue.Queue()
 
@@ -495,17 +483,22 @@ def try_send_serial(ser, text):
         speak("Erro ao comunicar com o Arduino.")
 
 def main():
-    # Escolher modelo conforme existência e RAM
-    selected_model_path = choose_model()
-    print(f"Modelo selecionado: {selected_model_path}")
+    # Se o serviço residente (servico_vosk.py) estiver ativo, usa o modelo já carregado nele
+    model = None
+    if service_available():
+        print("Serviço de reconhecimento ativo: usando modelo já carregado.")
+    else:
+        # Escolher modelo conforme existência e RAM
+        selected_model_path = choose_model()
+        print(f"Modelo selecionado: {selected_model_path}")
 
-    # Verificar e carregar modelo (carrega e mede RAM)
-    model = load_model_and_measure(selected_model_path)
+        # Verificar e carregar modelo (carrega e mede RAM)
+        model = load_model_and_measure(selected_model_path)
     
     # Verificar conexão Arduino
     ser = open_serial()
     
-    rec = KaldiRecognizer(model, SAMPLE_RATE)
+    rec = KaldiRecognizer(model, SAMPLE_RATE) if model is not None else RemoteRecognizer(SAMPLE_RATE)
 
     try:
         with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=8000, dtype='int16',
@@ -7,11 +7,39 @@ import tempfile
 import shutil
 import socket
 import configparser
+import argparse
 from enum import Enum, auto
 
 # Limite de uso de RAM pelo modelo (MB) — altere conforme necessário
 MODEL_RAM_THRESHOLD_MB = 700  # 700 MB
 
+# Modo progressivo: começa com o modelo leve e troca para o completo quando carregar (--progressive)
+CLI_PROGRESSIVE = False
+# Governador: troca de modelo conforme RTF, fila, memória e temperatura (--governor)
+CLI_GOVERNOR = False
+# Sem perguntas: modelo, blocksize e TTS vêm do perfil de hardware (--auto, ou stdin sem terminal)
+CLI_AUTO = False
+# Modo TTS forçado (sobrescreve o config.ini), None = usa o arquivo
+CLI_TTS_MODE = None
+# Aquece o reconhecedor com uma amostra antes de "Sistema pronto!" (--warmup)
+CLI_WARMUP = False
+# Modo comando: blocos menores e final antecipado pelo silêncio depois da fala (--endpoint)
+CLI_ENDPOINT = False
+# Telemetria de sensores do Arduino em Hz, 0 = desligada (--telemetria)
+CLI_TELEMETRY_HZ = 0
+# Monitor de saúde da serial: heartbeat, RTT/jitter e falha rápida com o Arduino travado (--monitor)
+CLI_MONITOR = False
+# Grava as frases reconhecidas (com instantes por palavra) em .jsonl, .srt ou .vtt (--transcricao)
+CLI_TRANSCRIPT = None
+# Vários microfones sobre um único modelo, com arbitragem (--microfones "2,3")
+CLI_MICS = None
+# Arranjo de N canais: direção de chegada e beamforming antes do reconhecedor (--canais N)
+CLI_ARRAY_CHANNELS = 0
+# Pré-processamento: DC, clipping, supressão de ruído e AGC antes do reconhecedor (--pre-processamento)
+CLI_FRONTEND = False
+# Taxa de abertura do microfone, 0 = 16 kHz se ele aceitar, senão a nativa com reamostragem (--taxa-captura)
+CLI_CAPTURE_RATE = 0
+
 # Verificar dependências obrigatórias
 REQUIRED_MODULES = {
     'vosk': 'vosk',
@@ -41,6 +69,23 @@ import time
 from vosk import Model, KaldiRecognizer
 import sounddevice as sd
 import serial
+from servico_vosk import service_available, RemoteRecognizer
+from modelos_vosk import load_progressive, warm_up
+from governador_modelos import ModelGovernor
+from perfil_hardware import get_profile
+import prewarm_modelo
+from comandos import CommandIndex, LOCAL_COMMANDS, PARAMETERS, split_commands
+from intencoes import parse_sequence, grammar_words
+from fim_de_fala import Endpointer, load_endpoint_config
+from enlace_serial import SerialLink
+from telemetria import Telemetry
+from saude_serial import LinkMonitor
+from saida_transcricao import enable_words, parse_result, open_writer
+from multi_microfone import MicStream, MultiMic, parse_devices
+from arranjo_microfones import Beamformer
+from pre_processamento import FrontEnd
+from reamostragem import Resampler, capture_rate
+from decodificar_audio import waveform_feeder
 
 class TtsMode(Enum):
     OFFLINE = auto()  # espeak/espeak-ng
@@ -52,6 +97,7 @@ FULL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-202
 SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
 SAMPLE_RATE = 16000
 CHANNELS = 1
+BLOCKSIZE = 8000  # amostras por bloco de captura
 
 # Porta serial do Arduino (ex: /dev/ttyACM0, /dev/ttyUSB0) e baudrate
 SERIAL_PORT = "/dev/ttyUSB0"
@@ -61,35 +107,13 @@ SERIAL_TIMEOUT = 1.0  # segundos
 # Tempo máximo para esperar resposta do Arduino (segundos)
 SERIAL_RESPONSE_TIMEOUT = 5.0
 
-# Lista de comandos válidos (tudo em minúsculas)
-VALID_COMMANDS = [
-    "liga",
-    "desliga",
-    "ligue",
-    "desligue",
-    "ligar",
-    "desligar",
-    "teste",
-    "ligar led",
-    "desligar led",
-    "ligar luz",
-    "desligar luz",
-    "avancar",
-    "parar",
-    "girar esquerda",
-    "girar direita",
-    "girar cabeca",
-    "girar cabeça",
-    "gira cabeça",
-    "girar a cabeça",
-    "gira a cabeça",
-    "gire a cabeça",
-    "ajuda",
-    "ajudar",
-    "socorro",
-    "help",
-    "ajuda do cliente", "ajuda do enviador", "ajuda do python"
-]
+# Índice de comandos compilado (comandos.py): normalização, busca exata e aproximada
+COMMAND_INDEX = CommandIndex()
+
+# Enlace com thread leitora (usado com telemetria/monitor); None = leitura direta da porta
+SERIAL_LINK = None
+TELEMETRY = None
+LINK_MONITOR = None
 
 q = queue.Queue()
 
@@ -98,10 +122,6 @@ def callback(indata, frames, time_info, status):
         print(status, file=sys.stderr)
     q.put(bytes(indata))
 
-def normalize_text(s: str) -> str:
-    # Normalização simples: minusculas e strip
-    return s.strip().lower()
-
 def get_available_memory_mb():
     """Retorna memória disponível em MB (usa /proc/meminfo)"""
     try:
@@ -283,6 +303,17 @@ def load_model_and_measure(model_path):
     else:
         print("Não foi possível determinar RSS antes do carregamento.")
 
+    # Se a unit de pré-aquecimento estiver rodando, espera: o Model() lerá da RAM e não do SD
+    status = prewarm_modelo.wait_ready()
+    if status is not None and status.get("state") == "running":
+        print("Pré-aquecimento do modelo ainda em andamento; carregando mesmo assim.")
+    elif status is not None and status.get("state") == "skipped":
+        print("Pré-aquecimento não aqueceu nenhum modelo neste boot.")
+    report = prewarm_modelo.residency_report(model_path)
+    if report is not None:
+        print(f"Modelo no page cache: {report['resident_mb']} / {report['size_mb']} MB ({report['resident_pct']}%)")
+
+    t0 = time.perf_counter()
     try:
         model = Model(model_path)
     except Exception as e:
@@ -290,6 +321,8 @@ def load_model_and_measure(model_path):
         print(f"Detalhes: {e}")
         sys.exit(1)
 
+    print(f"Modelo carregado em {time.perf_counter() - t0:.2f} s")
+
     rss_after = get_process_rss_mb()
     if rss_after is not None:
         print(f"RSS após carregamento do modelo: {rss_after} MB")
@@ -304,7 +337,9 @@ def load_model_and_measure(model_path):
 
     if delta is not None and delta > MODEL_RAM_THRESHOLD_MB:
         print(f"Atenção: o modelo parece usar ~{delta} MB, acima do limite definido ({MODEL_RAM_THRESHOLD_MB} MB).")
-        if not prompt_yes_no("Deseja prosseguir mesmo assim?", default_no=True):
+        if CLI_AUTO:
+            print("Modo automático: prosseguindo sem confirmação.")
+        elif not prompt_yes_no("Deseja prosseguir mesmo assim?", default_no=True):
             print("Abortando por solicitação do usuário devido ao uso de memória.")
             sys.exit(1)
 
@@ -363,7 +398,11 @@ CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
 DEFAULT_TTS_MODE = TtsMode.AUTO
 
 def load_tts_config():
-    """Load TTS configuration from file or create with defaults"""
+    """Load TTS configuration from file or create with defaults
+       If CLI_TTS_MODE is set, return that mode (override)."""
+    if CLI_TTS_MODE is not None:
+        return CLI_TTS_MODE
+
     config = configparser.ConfigParser()
     
     if os.path.exists(CONFIG_FILE):
@@ -469,13 +508,42 @@ def configure_tts():
     save_tts_config(mode)
     return mode
 
+def send_and_read_reply(ser, text):
+    """Envia a linha e lê a resposta direto da porta (sem thread leitora)."""
+    #limpar buffer antes de enviar
+    ser.reset_input_buffer()
+
+    print(f"Enviado para serial: '{text}'")
+    ser.write((text + "\n").encode("utf-8"))
+    ser.flush()
+
+    # esperar resposta até timeout
+    start = time.time()
+    resp = b""
+    while time.time() - start < SERIAL_RESPONSE_TIMEOUT:
+        if ser.in_waiting:
+
+           line = ser.readline()
+           #if not line:
+                # readline respeita timeout; se vazio, continuar tentanto até timeout
+                #continue
+           if line:
+               resp += line
+
+
+               # se linha termina com newline, assumir fim
+               if resp.endswith(b"\n") or resp.endswith(b"\r\n"):
+                break
+        time.sleep(0.1) #pequena pausa para evitar busy wait    para não sobrecarregar CPU   
+    return resp
+
 def try_send_serial(ser, text):
     """
     Envia comando para Arduino, espera resposta e fala resultado.
     Retorna True quando completar todo o ciclo.
     """
-    if text in ("ajuda do cliente", "ajuda do enviador", "ajuda do python"):
-        help_text = "Os comandos disponíveis no enviador são: " + ", ".join(sorted(set(VALID_COMMANDS)))
+    if text in LOCAL_COMMANDS:
+        help_text = "Os comandos disponíveis no enviador são: " + ", ".join(sorted(COMMAND_INDEX.canonical))
         print(help_text)
         speak(help_text)
         return True
@@ -486,32 +554,20 @@ def try_send_serial(ser, text):
         speak(sim_msg)
         time.sleep(1)  # simula tempo de execução
         return True
+    if LINK_MONITOR is not None and not LINK_MONITOR.is_up():
+        # Falha rápida: não espera o timeout com o Arduino travado
+        print(f"Enlace serial caído ({LINK_MONITOR.stats()['last_pong_s']} s sem resposta): '{text}' não enviado")
+        speak("Arduino não está respondendo")
+        return False
     try:
-        #limpar buffer antes de enviar
-        ser.reset_input_buffer()
-
-        print(f"Enviado para serial: '{text}'")
-        ser.write((text + "\n").encode("utf-8"))
-        ser.flush()
-
-        # esperar resposta até timeout
-        start = time.time()
-        resp = b""
-        while time.time() - start < SERIAL_RESPONSE_TIMEOUT:
-            if ser.in_waiting:
-
-               line = ser.readline()
-               #if not line:
-                    # readline respeita timeout; se vazio, continuar tentanto até timeout
-                    #continue
-               if line:
-                   resp += line
-
-
-                   # se linha termina com newline, assumir fim
-                   if resp.endswith(b"\n") or resp.endswith(b"\r\n"):
-                    break
-            time.sleep(0.1) #pequena pausa para evitar busy wait    para não sobrecarregar CPU   
+        if SERIAL_LINK is not None:
+            # A thread leitora separa a resposta dos quadros de telemetria e do heartbeat
+            print(f"Enviado para serial: '{text}'")
+            alive = LINK_MONITOR.is_up if LINK_MONITOR is not None else None
+            line = SERIAL_LINK.request(text, SERIAL_RESPONSE_TIMEOUT, alive=alive)
+            resp = (line + "\n").encode("utf-8") if line else b""
+        else:
+            resp = send_and_read_reply(ser, text)
         # 3. processa resposta  
 
         if resp:
@@ -546,6 +602,20 @@ def try_send_serial(ser, text):
         speak("Erro ao comunicar com o Arduino.")
     return False
 
+
+def send_commands(ser, commands):
+    """
+    Envia os comandos de uma frase: os do Arduino numa única linha (lote) e,
+    depois, os locais (ajuda), que não vão para a serial.
+    """
+    local, line = split_commands(commands)
+    ok = True
+    if line is not None:
+        ok = try_send_serial(ser, line)
+    for command in dict.fromkeys(local):
+        ok = try_send_serial(ser, command) and ok
+    return ok
+
 def check_arduino_communication(ser):
     """Verifica comunicação inicial com Arduino"""
     if ser is None:
@@ -580,41 +650,229 @@ def check_arduino_communication(ser):
         print(f"Erro ao verificar comunicação: {e}")
         return False
 
+def apply_hardware_profile():
+    """Aplica blocksize e TTS do perfil de hardware (mede só na primeira vez). Retorna o perfil."""
+    global BLOCKSIZE, CLI_TTS_MODE
+    profile = get_profile()
+    choice = profile["choice"]
+    BLOCKSIZE = choice["blocksize"]
+    if CLI_TTS_MODE is None:
+        CLI_TTS_MODE = TtsMode[choice["tts_mode"]]
+    print(f"Perfil de hardware: modelo={choice['model']} blocksize={BLOCKSIZE} TTS={CLI_TTS_MODE.name}")
+    return profile
+
+def _on_link_state(previous, state, stats):
+    print(f"\n[enlace {time.strftime('%H:%M:%S')}] {previous} -> {state} {stats}", flush=True)
+
+
+def start_serial_link(ser, telemetry_hz=0, monitor=False):
+    """Passa a leitura da serial para a thread do enlace; liga telemetria e/ou monitor de saúde."""
+    global SERIAL_LINK, TELEMETRY, LINK_MONITOR
+    SERIAL_LINK = SerialLink(ser).start()
+    if monitor:
+        LINK_MONITOR = LinkMonitor(SERIAL_LINK, on_state=_on_link_state).start()
+        print(f"Monitor do enlace ativo (heartbeat a cada {LINK_MONITOR.cfg['interval_s']} s, "
+              f"caído após {LINK_MONITOR.cfg['stall_s']} s sem resposta)")
+    if telemetry_hz:
+        TELEMETRY = Telemetry().attach(SERIAL_LINK)
+        reply = Telemetry.enable(SERIAL_LINK, telemetry_hz)
+        print(f"Telemetria: {reply or 'sem resposta do firmware'}")
+
+
+def apply_endpoint_mode():
+    """Aplica o blocksize do modo comando ([FIM_DE_FALA] do config.ini). Retorna a configuração."""
+    global BLOCKSIZE
+    cfg = load_endpoint_config()
+    BLOCKSIZE = cfg["blocksize"]
+    print(f"Modo comando: blocksize={BLOCKSIZE} ({1000 * BLOCKSIZE // SAMPLE_RATE} ms), "
+          f"final após {cfg['trailing_silence_ms']} ms de silêncio")
+    return cfg
+
+
+def run_multi_mic(new_recognizer, ser, transcript=None):
+    """
+    Um stream e um reconhecedor por microfone, todos sobre o mesmo modelo
+    (multi_microfone.py). O comando ouvido por mais de um microfone é
+    despachado uma vez, pelo de maior confiança. As frases de todos os
+    microfones vão para a transcrição, com o nome do microfone como origem.
+    """
+    streams = [MicStream(name, dev, new_recognizer(), SAMPLE_RATE, BLOCKSIZE)
+               for name, dev in parse_devices(CLI_MICS)]
+
+    def key_fn(text):
+        intents = parse_sequence(text, COMMAND_INDEX)
+        return tuple(i.serial for i in intents) if intents else None
+
+    def on_dispatch(key, text, winner, candidates):
+        heard = ", ".join(f"{s.name} {c:.2f}" for c, s, _ in candidates)
+        print(f"\nFinal ({winner.name}): {text}  [ouvido por: {heard}]")
+        if send_commands(ser, list(key)):
+            print("\nPronto para novo comando ...")
+        else:
+            print("\nErro no último comando. Pronto para tentar novamente...")
+
+    def on_text(text, stream):
+        print(f"Final ({stream.name}): {text}")
+        print("Comando não reconhecido como válido.")
+
+    on_utterance = (lambda u, stream: transcript.write(u)) if transcript is not None else None
+    multi = MultiMic(streams, key_fn, on_dispatch, on_text, on_utterance=on_utterance).start()
+    print(f"\nSistema pronto! {len(streams)} microfones ({', '.join(s.name for s in streams)}), "
+          f"{multi.workers} thread(s) de decodificação. Pressione Ctrl+C para sair.")
+    try:
+        while True:
+            time.sleep(30)
+            print(f"Microfones -> {multi.stats()}")
+    finally:
+        multi.close()
+        print(f"Microfones -> {multi.stats()}")
+
+
 def main():
-    # Escolher modelo conforme existência e RAM
-    selected_model_path = choose_model()
-    print(f"Modelo selecionado: {selected_model_path}")
+    profile = apply_hardware_profile() if CLI_AUTO else None
+    endpoint_cfg = apply_endpoint_mode() if CLI_ENDPOINT else None
+
+    # Se o serviço residente (servico_vosk.py) estiver ativo, usa o modelo já carregado nele
+    model = None
+    progressive = None
+    if service_available():
+        print("Serviço de reconhecimento ativo: usando modelo já carregado.")
+    elif CLI_PROGRESSIVE or CLI_GOVERNOR:
+        # Sem perguntas: atende com o leve e carrega o completo em segundo plano
+        progressive = load_progressive(SMALL_MODEL_DIR, FULL_MODEL_DIR)
+        print(f"Modo progressivo: iniciando com o modelo '{progressive.tier}'")
+        if CLI_GOVERNOR:
+            # Tier "grammar": modelo leve restrito aos comandos válidos
+            progressive.grammar = COMMAND_INDEX.phrases + grammar_words()
+            ModelGovernor(progressive, backlog_fn=lambda: q.qsize() * BLOCKSIZE / SAMPLE_RATE).start()
+            print("Governador de modelos ativo")
+    elif profile is not None:
+        selected_model_path = profile["choice"]["model_dir"]
+        if selected_model_path is None:
+            print("Erro: nenhum modelo Vosk utilizável no perfil de hardware.")
+            sys.exit(1)
+        print(f"Modelo selecionado (perfil): {selected_model_path}")
+        model = load_model_and_measure(selected_model_path)
+    else:
+        # Escolher modelo conforme existência e RAM
+        selected_model_path = choose_model()
+        print(f"Modelo selecionado: {selected_model_path}")
 
-    # Verificar e carregar modelo (carrega e mede RAM)
-    model = load_model_and_measure(selected_model_path)
+        # Verificar e carregar modelo (carrega e mede RAM)
+        model = load_model_and_measure(selected_model_path)
     
     # Verificar conexão Arduino
     ser = open_serial()
     if not check_arduino_communication(ser):
         print("Abortando devido a falha na comunicação")
         sys.exit(1)
+    if (CLI_TELEMETRY_HZ or CLI_MONITOR) and ser is not None:
+        start_serial_link(ser, CLI_TELEMETRY_HZ, CLI_MONITOR)
     
-    # Continua com reconhecimento de voz
-    rec = KaldiRecognizer(model, SAMPLE_RATE)
+    # Continua com reconhecimento de voz (com vários microfones, um reconhecedor
+    # por microfone sobre o mesmo modelo)
+    def new_recognizer():
+        if progressive is not None:
+            return progressive.recognizer(SAMPLE_RATE)
+        if model is None:
+            # A fila de blocos fica aqui: o governador do serviço a recebe a cada bloco
+            return RemoteRecognizer(SAMPLE_RATE, backlog_fn=lambda: q.qsize() * BLOCKSIZE / SAMPLE_RATE)
+        return KaldiRecognizer(model, SAMPLE_RATE)
+
+    rec = new_recognizer()
+    if model is None and progressive is None:
+        print(f"Modelo do serviço: {rec.model_name}")
+
+    # Aquecimento: a primeira frase real não paga a inicialização preguiçosa do decodificador
+    warmup = None
+    if CLI_WARMUP:
+        print("Aquecendo o reconhecedor...")
+        try:
+            warmup = warm_up(rec, SAMPLE_RATE, BLOCKSIZE)
+        except Exception as e:
+            print(f"Aviso: aquecimento falhou: {e}")
+
+    # Frases tipadas com instantes por palavra, gravadas conforme chegam
+    transcript = None
+    if CLI_TRANSCRIPT:
+        if not enable_words(rec):
+            print("Aviso: reconhecedor sem SetWords; a transcrição não terá instantes por palavra")
+        transcript = open_writer(CLI_TRANSCRIPT)
+        print(f"Transcrição: {CLI_TRANSCRIPT}")
+
+    # Modo comando: o VAD chama FinalResult() assim que a fala termina
+    endpointer = None
+    if endpoint_cfg is not None:
+        endpointer = Endpointer(rec, endpoint_cfg, SAMPLE_RATE, feed=waveform_feeder(rec))
+        if endpointer.vosk_tuned:
+            print("Endpointer do Vosk ajustado para frases curtas")
+
+    # Arranjo: captura os N canais e entrega ao reconhecedor o sinal já direcionado
+    beam = None
+    if CLI_ARRAY_CHANNELS > 1:
+        beam = Beamformer(CLI_ARRAY_CHANNELS, SAMPLE_RATE, BLOCKSIZE)
+        print(f"Arranjo de {beam.n_channels} canais: direção de chegada e beamforming ativos")
+    frontend = None
+    if CLI_FRONTEND:
+        frontend = FrontEnd(SAMPLE_RATE, BLOCKSIZE)
+        print("Pré-processamento: " + ("em bypass (comparação A/B)" if frontend.bypass
+                                       else "DC, clipping, supressão de ruído e AGC"))
+    resampler = None
+    # Os estágios devolvem memoryviews dos seus buffers; o vosk local recebe um buffer cffi, sem cópia
+    feed = waveform_feeder(rec)
 
     try:
-        with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=8000, dtype='int16',
-                             channels=CHANNELS, callback=callback):
+        if CLI_MICS:
+            return run_multi_mic(new_recognizer, ser, transcript)
+        # Dispositivos que só abrem 44,1/48 kHz: captura na taxa nativa e reamostra para o modelo
+        channels = beam.n_channels if beam else CHANNELS
+        capture_hz = CLI_CAPTURE_RATE or capture_rate(None, channels, SAMPLE_RATE)
+        capture_block = BLOCKSIZE
+        if capture_hz != SAMPLE_RATE:
+            resampler = Resampler(capture_hz, SAMPLE_RATE, channels)
+            capture_block = resampler.input_blocksize(BLOCKSIZE)
+            print(f"Microfone aberto em {capture_hz} Hz, reamostrado para {SAMPLE_RATE} Hz "
+                  f"(razão {resampler.up}/{resampler.down})")
+        with sd.RawInputStream(samplerate=capture_hz, blocksize=capture_block, dtype='int16',
+                             channels=channels, callback=callback):
             print("\nSistema pronto!")
+            if warmup is not None:
+                print(f"Aquecimento: 1ª frase a frio {warmup['cold_ms']} ms, aquecida {warmup['warm_ms']} ms "
+                      f"(amostra de {warmup['audio_ms']} ms)")
             print("Gravando do microfone. Pressione Ctrl+C para sair.")
             print("\nComandos reconhecidos:")
-            for cmd in VALID_COMMANDS:
-                print(f"  - {cmd}")
+            for cmd, variants in COMMAND_INDEX.commands.items():
+                print(f"  - {cmd}  ({', '.join(variants)})")
+            if PARAMETERS:
+                print("Com valor (ex: 'avançar dois metros', 'girar noventa graus à direita'): "
+                      + ", ".join(f"{cmd} [{p['unit']}, até {p['max']}]" for cmd, p in PARAMETERS.items()))
             print("")
 
             while True:
                 data = q.get()
-                if rec.AcceptWaveform(data):
+                if resampler is not None:
+                    data = resampler.process(data)
+                if beam is not None:
+                    data = beam.process(data)
+                if frontend is not None:
+                    data = frontend.process(data)
+                raw = None
+                if endpointer is not None:
+                    final = endpointer.accept(data)
+                    raw = endpointer.last_result
+                elif rec.AcceptWaveform(feed(data)):
+                    raw = rec.Result()
+                    final = json.loads(raw).get("text", "")
+                else:
+                    final = None
+                if final is not None:
                     # Resultado final parcial (por bloco)
-                    j = json.loads(rec.Result())
-                    text = normalize_text(j.get("text", ""))
+                    text = final.strip()
+                    direction = beam.take_direction() if beam is not None else None
                     if not text:
                         continue
+                    if transcript is not None:
+                        transcript.write(parse_result(raw, source="microfone"))
 
                     # obter uso do sistema / mostrar antes de enviar ao Arduino
                     usage = get_system_usage(interval_cpu=0.05)
@@ -627,12 +885,27 @@ def main():
                     rss_str = f"{usage['rss_mb']} MB" if usage['rss_mb'] is not None else "N/A"
 
                     print(f"Final (bloco): {text}")
+                    if direction is not None:
+                        print(f"Direção da fala: {direction:+.1f}° | Arranjo -> {beam.stats()}")
                     print(f"Uso sistema -> CPU: {cpu_str} | Mem disponível: {avail_str} | Livre: {free_str} | Percentual: {percent_str} | Usado: {used_str} | Total: {total_str} | RSS processo: {rss_str}")
+                    if TELEMETRY is not None:
+                        print(f"Telemetria -> {TELEMETRY.latest()} | {TELEMETRY.stats()}")
+                    if LINK_MONITOR is not None:
+                        print(f"Enlace -> {LINK_MONITOR.stats()}")
+                    if frontend is not None:
+                        print(f"Pré-processamento -> {frontend.stats()}")
+                    if resampler is not None:
+                        print(f"Reamostragem -> {resampler.stats()}")
 
                     
-                    if text in VALID_COMMANDS:
+                    intents = parse_sequence(text, COMMAND_INDEX)
+                    if intents:
+                        for intent in intents:
+                            if intent.method != "exact" or intent.value is not None:
+                                print(f"Interpretado como '{intent.serial}' (confiança {intent.confidence}, {intent.method})")
+                        # Vários comandos vão num único lote, com uma única resposta falada
                         # Aguarda ciclo completo antes de continuar
-                        if try_send_serial(ser, text):
+                        if send_commands(ser, [i.serial for i in intents]):
                             print("\nPronto para novo comando (linha 602) ...")
                         else:
                             print("\nErro no último comando. (linha 604) Pronto para tentar novamente...")
@@ -641,7 +914,7 @@ def main():
                 else:
                     # Exibe parcial (opcional)
                     j = json.loads(rec.PartialResult())
-                    partial = normalize_text(j.get("partial", ""))
+                    partial = j.get("partial", "").strip()
                     if partial:
                         print("Parcial:", partial, end="\r")
     except KeyboardInterrupt:
@@ -650,36 +923,105 @@ def main():
         print("Erro de áudio:", e, file=sys.stderr)
     finally:
         # Ao finalizar, envie o resultado final restante
-        try:
-            j = json.loads(rec.FinalResult())
-            text = normalize_text(j.get("text", ""))
-            if text:
-                # mostrar uso do sistema na última sentença
-                usage = get_system_usage(interval_cpu=0.05)
-                cpu_str = f"{usage['cpu_percent']}%" if usage['cpu_percent'] is not None else "N/A"
-                avail_str = f"{usage['avail_mb']} MB" if usage['avail_mb'] is not None else "N/A"
-                total_str = f"{usage['total_mb']} MB" if usage['total_mb'] is not None else "N/A"
-                rss_str = f"{usage['rss_mb']} MB" if usage['rss_mb'] is not None else "N/A"
-
-                print("Final (final):", text)
-                print(f"Uso sistema -> CPU: {cpu_str} | Mem disponível: {avail_str} / {total_str} | RSS processo: {rss_str}")
-
-                if text in VALID_COMMANDS:
-                    # Aguarda ciclo completo antes de continuar
-                    if try_send_serial(ser, text):
-                        print("\nPronto para novo comando (linha 636) ...")
+        # (com --microfones, rec não recebe áudio: MultiMic.close() já descarregou cada microfone)
+        if not CLI_MICS:
+            try:
+                raw = rec.FinalResult()
+                j = json.loads(raw)
+                text = j.get("text", "").strip()
+                if transcript is not None:
+                    transcript.write(parse_result(raw, source="microfone"))
+                    transcript.close()
+                    transcript = None
+                if text:
+                    # mostrar uso do sistema na última sentença
+                    usage = get_system_usage(interval_cpu=0.05)
+                    cpu_str = f"{usage['cpu_percent']}%" if usage['cpu_percent'] is not None else "N/A"
+                    avail_str = f"{usage['avail_mb']} MB" if usage['avail_mb'] is not None else "N/A"
+                    total_str = f"{usage['total_mb']} MB" if usage['total_mb'] is not None else "N/A"
+                    rss_str = f"{usage['rss_mb']} MB" if usage['rss_mb'] is not None else "N/A"
+
+                    print("Final (final):", text)
+                    print(f"Uso sistema -> CPU: {cpu_str} | Mem disponível: {avail_str} / {total_str} | RSS processo: {rss_str}")
+
+                    intents = parse_sequence(text, COMMAND_INDEX)
+                    if intents:
+                        # Aguarda ciclo completo antes de continuar
+                        if send_commands(ser, [i.serial for i in intents]):
+                            print("\nPronto para novo comando (linha 636) ...")
+                        else:
+                            print("\nErro no último comando. (linha 638) Pronto para tentar novamente...")
                     else:
-                        print("\nErro no último comando. (linha 638) Pronto para tentar novamente...")
-                else:
-                    print("Comando não reconhecido como válido.")
+                        print("Comando não reconhecido como válido.")
 
-        except Exception:
-            pass
+            except Exception:
+                pass
+        if transcript is not None:
+            transcript.close()
+        if beam is not None:
+            print(f"Arranjo -> {beam.stats()}")
+        if frontend is not None:
+            print(f"Pré-processamento -> {frontend.stats()}")
+        if resampler is not None:
+            print(f"Reamostragem -> {resampler.stats()}")
+        if LINK_MONITOR is not None:
+            LINK_MONITOR.stop()
+        if SERIAL_LINK is not None:
+            SERIAL_LINK.close()
         if ser is not None:
             try:
                 ser.close()
             except Exception:
                 pass
 
+def parse_cli_args():
+    """Parse CLI args"""
+    global CLI_PROGRESSIVE, CLI_GOVERNOR, CLI_AUTO, CLI_TTS_MODE, CLI_WARMUP, CLI_ENDPOINT, CLI_TELEMETRY_HZ, CLI_MONITOR, CLI_TRANSCRIPT, CLI_MICS, CLI_ARRAY_CHANNELS, CLI_FRONTEND, CLI_CAPTURE_RATE
+
+    p = argparse.ArgumentParser(description="test_vosk_microfone_serial_talkback6")
+    p.add_argument("--progressive", action="store_true", help="Começa com o modelo leve e troca para o completo quando terminar de carregar")
+    p.add_argument("--governor", action="store_true", help="Troca de modelo automaticamente conforme RTF, fila, memória e temperatura (implica --progressive)")
+    p.add_argument("--auto", action="store_true", help="Sem perguntas: usa o perfil de hardware (perfil_hardware.py) para modelo, blocksize e TTS")
+    p.add_argument("--tts-mode", choices=("auto", "online", "offline"), help="Modo TTS: auto|online|offline (override config file)")
+    p.add_argument("--warmup", action="store_true", help="Aquece o reconhecedor com uma amostra e mostra latência fria x aquecida")
+    p.add_argument("--endpoint", action="store_true", help="Modo comando: blocos menores e final assim que a fala termina (fim_de_fala.py)")
+    p.add_argument("--telemetria", type=int, default=0, metavar="HZ", help="Liga a telemetria de sensores do Arduino nessa taxa (telemetria.py)")
+    p.add_argument("--monitor", action="store_true", help="Heartbeat com o Arduino: mede RTT/jitter e falha rápido se ele travar (saude_serial.py)")
+    p.add_argument("--transcricao", metavar="ARQUIVO", help="Grava as frases com instantes por palavra em .jsonl, .srt ou .vtt (saida_transcricao.py)")
+    p.add_argument("--microfones", metavar="LISTA", help='Vários microfones sobre um único modelo, ex: "2,3" ou "frente=2,tras=3" (multi_microfone.py)')
+    p.add_argument("--canais", type=int, default=0, metavar="N", help="Arranjo de N microfones: direção de chegada e beamforming (arranjo_microfones.py)")
+    p.add_argument("--pre-processamento", action="store_true", help="DC, clipping, supressão de ruído e AGC antes do reconhecedor (pre_processamento.py)")
+    p.add_argument("--taxa-captura", type=int, default=0, metavar="HZ", help="Abre o microfone nesta taxa e reamostra para 16 kHz (reamostragem.py); padrão: automático")
+    args = p.parse_args()
+
+    if args.taxa_captura:
+        CLI_CAPTURE_RATE = args.taxa_captura
+    if args.pre_processamento:
+        CLI_FRONTEND = True
+    if args.canais:
+        CLI_ARRAY_CHANNELS = args.canais
+    if args.microfones:
+        CLI_MICS = args.microfones
+    if args.transcricao:
+        CLI_TRANSCRIPT = args.transcricao
+    if args.monitor:
+        CLI_MONITOR = True
+    if args.telemetria:
+        CLI_TELEMETRY_HZ = args.telemetria
+    if args.endpoint:
+        CLI_ENDPOINT = True
+    if args.warmup:
+        CLI_WARMUP = True
+    if args.tts_mode:
+        CLI_TTS_MODE = TtsMode[args.tts_mode.upper()]
+    # Iniciado pelo systemd (sem terminal): input() travaria, então usa o perfil
+    if args.auto or not sys.stdin.isatty():
+        CLI_AUTO = True
+    if args.progressive:
+        CLI_PROGRESSIVE = True
+    if args.governor:
+        CLI_GOVERNOR = True
+
 if __name__ == "__main__":
+    parse_cli_args()
     main()
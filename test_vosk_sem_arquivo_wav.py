@@ -17,6 +17,7 @@ import queue
 import sys
 from vosk import Model, KaldiRecognizer
 import sounddevice as sd
+from servico_vosk import service_available, RemoteRecognizer
 
 MODEL_PATH = "/home/big/Área de Trabalho/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113/"  # ajuste o caminho do modelo
 SAMPLE_RATE = 16000
@@ -31,13 +32,18 @@ def callback(indata, frames, time, status):
     q.put(bytes(indata))
 
 def main():
-    try:
-        model = Model(MODEL_PATH)
-    except Exception as e:
-        print("Erro ao carregar o modelo:", e, file=sys.stderr)
-        sys.exit(1)
+    # Se o serviço residente estiver ativo, conecta nele em vez de recarregar o modelo
+    if service_available():
+        rec = RemoteRecognizer(SAMPLE_RATE)
+        print(f"Usando serviço de reconhecimento (modelo: {rec.model_name})")
+    else:
+        try:
+            model = Model(MODEL_PATH)
+        except Exception as e:
+            print("Erro ao carregar o modelo:", e, file=sys.stderr)
+            sys.exit(1)
 
-    rec = KaldiRecognizer(model, SAMPLE_RATE)
+        rec = KaldiRecognizer(model, SAMPLE_RATE)
 
     try:
         with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=8000, dtype='int16',
@@ -1,23 +1,48 @@
 import sys
 from vosk import Model, KaldiRecognizer
-import wave
+from servico_vosk import service_available, RemoteRecognizer
+from decodificar_audio import open_audio, as_waveform
+from saida_transcricao import enable_words, parse_result, open_writer
 
-wf = wave.open("seuarquivo.wav", "rb")
-if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() not in (16000, 8000):
-    print("Arquivo deve ser mono PCM 16-bits, 1 canal, taxa 16000Hz (ou compatível).")
+# Qualquer formato que o ffmpeg leia (mp3, ogg, WAV estéreo/44,1 kHz...) é
+# convertido em fluxo para 16 kHz mono; WAV mono 16 bits é lido direto
+# Segundo argumento opcional: salva as frases em .jsonl, .srt ou .vtt
+path = sys.argv[1] if len(sys.argv) > 1 else "seuarquivo.wav"
+out = open_writer(sys.argv[2]) if len(sys.argv) > 2 else None
+try:
+    rate, blocks = open_audio(path, chunk_s=0.25)
+except (OSError, RuntimeError) as e:
+    print(f"Não foi possível abrir {path}: {e}")
     sys.exit(1)
 
-model = Model("/home/big/Área de Trabalho/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113/")  # ex: ~/vosk-model-pt-br
-rec = KaldiRecognizer(model, wf.getframerate())
+# Usa o serviço residente se estiver ativo (evita recarregar o modelo)
+if service_available():
+    rec = RemoteRecognizer(rate)
+    feed = bytes
+else:
+    model = Model("/home/big/Área de Trabalho/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113/")  # ex: ~/vosk-model-pt-br
+    rec = KaldiRecognizer(model, rate)
+    feed = as_waveform
+# Instantes e confiança por palavra
+enable_words(rec)
 
-while True:
-    data = wf.readframes(4000)
-    if len(data) == 0:
-        break
-    if rec.AcceptWaveform(data):
-        print(rec.Result())
+
+def show(result):
+    u = parse_result(result)
+    if u is None:
+        return
+    print(f"[{u.start:7.2f} - {u.end:7.2f}] {u.text}" + (f"  (conf {u.conf})" if u.conf is not None else ""))
+    if out is not None:
+        out.write(u)
+
+
+for data in blocks:
+    if rec.AcceptWaveform(feed(data)):
+        show(rec.Result())
     else:
         print(rec.PartialResult())
 
-print(rec.FinalResult())
+show(rec.FinalResult())
+if out is not None:
+    out.close()
 
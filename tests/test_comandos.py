@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comandos import BATCH_PREFIX, COMMAND_INDEX, LOCAL_COMMANDS, split_commands  # noqa: E402
+
+
+@pytest.mark.parametrize("text", [
+    "pare direita", "parar direita", "para direita", "para a esquerda", "pare esquerda",
+])
+def test_parada_nunca_vira_movimento(text):
+    match = COMMAND_INDEX.match(text)
+    assert match is None or match.command == "parar"
+    for m in COMMAND_INDEX.match_sequence(text) or []:
+        assert m.command == "parar"
+
+
+@pytest.mark.parametrize("text", ["desligado", "ligado", "paro"])
+def test_verbo_aproximado_rejeitado(text):
+    assert COMMAND_INDEX.match(text) is None
+
+
+@pytest.mark.parametrize("text, command", [
+    ("pare", "parar"),
+    ("para", "parar"),
+    ("parrar", "parar"),
+    ("gire a esquerda", "girar esquerda"),
+    ("girar esquerdo", "girar esquerda"),
+    ("girar cabesa", "girar cabeca"),
+    ("avansar", "avancar"),
+    ("avanssar", "avancar"),
+    ("vire à direita", "girar direita"),
+])
+def test_casamentos_aceitos(text, command):
+    assert COMMAND_INDEX.match(text).command == command
+
+
+def test_comando_local_separado_do_lote():
+    local = LOCAL_COMMANDS[0]
+    assert split_commands(["avancar", local, "parar"]) == ([local], BATCH_PREFIX + "avancar;parar")
+    assert split_commands([local]) == ([local], None)
+    assert split_commands(["parar"]) == ([], "parar")
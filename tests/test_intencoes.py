@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intencoes import grammar_words, parse_intent, parse_sequence  # noqa: E402
+
+
+@pytest.mark.parametrize("text, serial", [
+    ("avançar dois metros", "avancar 200"),
+    ("avançar 30 centímetros", "avancar 30"),
+    ("girar noventa graus à direita", "girar direita 90"),
+    ("girar noventa à direita", "girar direita 90"),
+    ("gire meia volta para a esquerda", "girar esquerda 180"),
+])
+def test_valor_com_unidade(text, serial):
+    assert parse_intent(text).serial == serial
+
+
+@pytest.mark.parametrize("text", ["avançar dois", "avançar 2", "avançar noventa graus"])
+def test_distancia_sem_unidade_rejeitada(text):
+    assert parse_intent(text) is None
+
+
+def test_sequencia_com_valor():
+    assert [i.serial for i in parse_sequence("avançar um metro e meio e parar")] == ["avancar 150", "parar"]
+
+
+def test_gramatica_com_acentos():
+    words = grammar_words()
+    assert "três" in words and "tres" not in words
+    assert parse_intent("avançar três metros").serial == "avancar 300"
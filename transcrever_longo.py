@@ -0,0 +1,354 @@
+#pip install vosk numpy
+#sudo apt install ffmpeg   (para formatos além de WAV mono 16 bits)
+
+# Transcrição de gravações longas em paralelo (Projeto Athena)
+#
+# Uma sessão de uma hora, decodificada em série, leva o RTF do reconhecedor
+# vezes uma hora num único núcleo. Aqui a gravação é dividida nos trechos de
+# fala antes de decodificar:
+#
+#   1. o áudio é mapeado em memória (np.memmap): WAV mono 16 bits direto do
+#      arquivo; outros formatos são decodificados UMA vez pelo ffmpeg
+#      (decodificar_audio.py) para um PCM temporário, apagado no fim
+#   2. um VAD de energia vetorizado (NumPy, quadros de 30 ms, em blocos de
+#      60 s para a memória ficar limitada) acha os trechos de fala; pausas
+#      curtas não cortam a frase e trechos longos demais são divididos no
+#      quadro mais silencioso
+#   3. os trechos são decodificados em paralelo, um reconhecedor
+#      independente por trecho, num pool de processos que carregam o modelo
+#      uma vez (transcrever_lote.py); os maiores vão primeiro
+#   4. os resultados voltam em ordem, com os instantes das palavras somados
+#      ao início do trecho (instantes globais na gravação), como frases
+#      tipadas gravadas em JSONL, SRT ou WebVTT (saida_transcricao.py)
+#
+# O tempo de relógio cai com o número de núcleos; o resumo mostra o ganho
+# (soma do tempo de decodificação / tempo de relógio). Os limites do VAD
+# ficam na seção [SEGMENTACAO] de ~/Athena/config.ini.
+#
+# USO:
+#   python transcrever_longo.py sessao.wav -o sessao.jsonl
+#   python transcrever_longo.py sessao.wav -o sessao.srt       # legendas
+#   python transcrever_longo.py reuniao.m4a --modelo full --processos 4
+#   python transcrever_longo.py sessao.wav --so-segmentar    # só mostra os trechos
+
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+import tempfile
+import configparser
+import multiprocessing
+
+import numpy as np
+from vosk import KaldiRecognizer, SetLogLevel
+
+import transcrever_lote
+from decodificar_audio import SAMPLE_RATE, NATIVE_RATES, DecoderPipe, as_waveform
+from saida_transcricao import FORMATS, enable_words, parse_result, open_writer
+
+CONFIG_FILE = os.path.expanduser("~/Athena/config.ini")
+
+# Padrões (sobrescritos pela seção [SEGMENTACAO] do config.ini)
+DEFAULT_SEGMENT = {
+    "frame_ms": 30,           # quadro do VAD
+    "margin_db": 12.0,        # fala = energia acima do piso de ruído + margem
+    "floor_percentile": 10.0, # piso de ruído = este percentil da energia dos quadros
+    "min_silence_s": 0.5,     # pausa mais curta que isso não separa trechos
+    "min_speech_s": 0.3,      # trecho mais curto que isso é ruído
+    "pad_s": 0.2,             # margem acrescentada antes e depois de cada trecho
+    "max_segment_s": 30.0,    # trecho maior que isso é dividido no quadro mais silencioso
+    "block_s": 60.0,          # áudio lido por vez no cálculo da energia
+}
+
+# Segundos de áudio por chamada a AcceptWaveform
+FEED_S = 4.0
+
+# Áudio mapeado do processo (reaberto uma vez por arquivo em cada processo)
+_AUDIO = {}
+
+
+def load_segment_config():
+    """Lê a seção [SEGMENTACAO] do config.ini, mantendo os padrões para chaves ausentes."""
+    cfg = dict(DEFAULT_SEGMENT)
+    config = configparser.ConfigParser()
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if config.has_section("SEGMENTACAO"):
+        for key, default in DEFAULT_SEGMENT.items():
+            if key in config["SEGMENTACAO"]:
+                try:
+                    cfg[key] = type(default)(config["SEGMENTACAO"][key])
+                except ValueError:
+                    print(f"Aviso: valor inválido para {key} em [SEGMENTACAO], usando {default}")
+    return cfg
+
+
+# ------------------------------------------------------------ áudio mapeado
+def wav_data_chunk(path):
+    """(offset, bytes, taxa) do PCM de um WAV mono 16 bits, ou None se o arquivo não for um."""
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            cid, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if cid == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif cid == b"data":
+                if fmt is None:
+                    return None
+                tag, channels, rate, _, _, bits = fmt
+                if tag != 1 or channels != 1 or bits != 16 or rate not in NATIVE_RATES:
+                    return None
+                # Gravação interrompida pode ter o tamanho do bloco errado
+                size = min(size, os.path.getsize(path) - f.tell())
+                return f.tell(), size - (size & 1), rate
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class MappedAudio:
+    """
+    PCM 16 bits mono mapeado em memória. Formatos que não dão para mapear
+    direto são decodificados uma vez para um arquivo temporário (close() apaga).
+    """
+
+    def __init__(self, path, sample_rate=SAMPLE_RATE):
+        self.source = path
+        self._tmp = None
+        info = wav_data_chunk(path)
+        if info is None:
+            fd, self._tmp = tempfile.mkstemp(suffix=".pcm", prefix="athena_")
+            with os.fdopen(fd, "wb") as out, DecoderPipe(path, sample_rate) as pipe:
+                for view in pipe:
+                    out.write(view)
+            info = (0, os.path.getsize(self._tmp), sample_rate)
+        self.offset, size, self.rate = info
+        self.raw_path = self._tmp or path
+        self.samples = np.memmap(self.raw_path, dtype="<i2", mode="r",
+                                 offset=self.offset, shape=(size // 2,)) if size else np.zeros(0, "<i2")
+
+    @property
+    def duration_s(self):
+        return self.samples.size / self.rate
+
+    def close(self):
+        self.samples = None
+        if self._tmp is not None:
+            try:
+                os.unlink(self._tmp)
+            except OSError:
+                pass
+            self._tmp = None
+
+
+# ------------------------------------------------------------ VAD
+def frame_energy_db(samples, frame_len, block_frames):
+    """Energia (dBFS) por quadro, calculada em blocos sobre o memmap."""
+    n_frames = samples.size // frame_len
+    out = np.empty(n_frames, dtype=np.float32)
+    for a in range(0, n_frames, block_frames):
+        b = min(n_frames, a + block_frames)
+        x = samples[a * frame_len:b * frame_len].astype(np.float32).reshape(-1, frame_len)
+        power = np.einsum("ij,ij->i", x, x) / (frame_len * 32768.0 ** 2)
+        out[a:b] = 10.0 * np.log10(power + 1e-12)
+    return out
+
+
+def _runs(mask):
+    """Início e fim (exclusivo) de cada sequência de True."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _close_gaps(starts, ends, min_gap):
+    if starts.size < 2:
+        return starts, ends
+    keep = (starts[1:] - ends[:-1]) >= min_gap
+    return starts[np.concatenate(([True], keep))], ends[np.concatenate((keep, [True]))]
+
+
+def find_segments(samples, rate, cfg=None):
+    """
+    Trechos de fala como array (n, 2) de amostras [início, fim), em ordem.
+    Retorna também o limiar usado (dBFS).
+    """
+    cfg = cfg or load_segment_config()
+    frame_len = int(rate * cfg["frame_ms"] / 1000)
+    frame_s = frame_len / rate
+    energy = frame_energy_db(samples, frame_len, max(1, int(cfg["block_s"] / frame_s)))
+    if not energy.size:
+        return np.zeros((0, 2), dtype=np.int64), None
+    threshold = float(np.percentile(energy, cfg["floor_percentile"])) + cfg["margin_db"]
+
+    starts, ends = _runs(energy > threshold)
+    starts, ends = _close_gaps(starts, ends, int(cfg["min_silence_s"] / frame_s))
+    long_enough = (ends - starts) >= int(cfg["min_speech_s"] / frame_s)
+    starts, ends = starts[long_enough], ends[long_enough]
+    pad = int(cfg["pad_s"] / frame_s)
+    starts = np.maximum(starts - pad, 0)
+    ends = np.minimum(ends + pad, energy.size)
+    starts, ends = _close_gaps(starts, ends, 1)
+
+    # Trechos longos demais: corta no quadro mais silencioso da segunda metade da janela
+    max_frames = max(2, int(cfg["max_segment_s"] / frame_s))
+    segments = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        while e - s > max_frames:
+            lo = s + max_frames // 2
+            cut = lo + int(np.argmin(energy[lo:s + max_frames]))
+            segments.append((s, cut))
+            s = cut
+        segments.append((s, e))
+    out = np.array(segments, dtype=np.int64).reshape(-1, 2) * frame_len
+    # O último trecho vai até o fim real (sobra menor que um quadro)
+    if out.size and out[-1, 1] == energy.size * frame_len:
+        out[-1, 1] = samples.size
+    return out, threshold
+
+
+# ------------------------------------------------------------ decodificação
+def _decode_segment(job):
+    """
+    Decodifica um trecho no modelo do processo.
+    job = (índice, arquivo pcm, offset, amostras, taxa, início, fim).
+    """
+    index, raw_path, offset, count, rate, start, end = job
+    key = (raw_path, offset)
+    if key not in _AUDIO:
+        _AUDIO.clear()
+        # Mesma forma do MappedAudio: o byte solto de um WAV truncado fica de fora
+        _AUDIO[key] = np.memmap(raw_path, dtype="<i2", mode="r", offset=offset, shape=(count,))
+    samples = _AUDIO[key]
+    t0 = time.perf_counter()
+    rec = KaldiRecognizer(transcrever_lote._MODEL, rate)
+    enable_words(rec)
+    results = []
+    step = int(FEED_S * rate)
+    for a in range(start, end, step):
+        if rec.AcceptWaveform(as_waveform(memoryview(samples[a:min(end, a + step)]).cast("B"))):
+            results.append(json.loads(rec.Result()))
+    results.append(json.loads(rec.FinalResult()))
+    return index, results, time.perf_counter() - t0
+
+
+def segment_utterances(start_s, end_s, results):
+    """Frases de um trecho, com os instantes das palavras somados ao início do trecho."""
+    out = []
+    for r in results:
+        u = parse_result(r, offset_s=start_s, start_s=start_s, end_s=end_s)
+        if u is not None:
+            out.append(u)
+    return out
+
+
+def transcribe_long(audio, segments, model_dir, processes=None, on_record=None):
+    """
+    Decodifica os trechos em paralelo e entrega as frases (Utterance) em
+    ordem: on_record(frase) assim que todos os trechos anteriores chegaram.
+    Retorna (frases, soma do tempo de decodificação).
+    """
+    processes = processes or os.cpu_count() or 1
+    rate = audio.rate
+    count = audio.samples.size
+    jobs = [(i, audio.raw_path, audio.offset, count, rate, int(s), int(e)) for i, (s, e) in enumerate(segments)]
+    # Maiores primeiro: o último trecho a terminar não é um longo começando tarde
+    jobs.sort(key=lambda j: j[5] - j[6])
+
+    records = []
+    pending = {}
+    next_index = 0
+    decode_s = 0.0
+    with multiprocessing.Pool(processes, initializer=transcrever_lote._init_worker, initargs=(model_dir,)) as pool:
+        for index, results, seconds in pool.imap_unordered(_decode_segment, jobs, chunksize=1):
+            decode_s += seconds
+            s, e = segments[index]
+            pending[index] = segment_utterances(s / rate, e / rate, results)
+            # Reordena: entrega só quando a sequência está completa até aqui
+            while next_index in pending:
+                for u in pending.pop(next_index):
+                    records.append(u)
+                    if on_record is not None:
+                        on_record(u)
+                next_index += 1
+    return records, decode_s
+
+
+def parse_cli_args():
+    p = argparse.ArgumentParser(description="Transcreve uma gravação longa em trechos paralelos")
+    p.add_argument("arquivo")
+    p.add_argument("-o", "--saida", default=None,
+                   help="Arquivo .jsonl, .srt ou .vtt, escrito conforme os trechos terminam (padrão: só imprime)")
+    p.add_argument("--formato", choices=FORMATS, default=None, help="Formato da saída (padrão: pela extensão)")
+    p.add_argument("--modelo", default="small", help='"small", "full" ou caminho do modelo')
+    p.add_argument("--processos", type=int, default=None, help="Padrão: número de núcleos")
+    p.add_argument("--so-segmentar", action="store_true", help="Só mostra os trechos de fala")
+    return p.parse_args()
+
+
+def main():
+    args = parse_cli_args()
+    SetLogLevel(-1)
+    t0 = time.perf_counter()
+    try:
+        audio = MappedAudio(args.arquivo)
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    t_map = time.perf_counter() - t0
+    try:
+        t0 = time.perf_counter()
+        segments, threshold = find_segments(audio.samples, audio.rate)
+        t_vad = time.perf_counter() - t0
+        speech_s = float((segments[:, 1] - segments[:, 0]).sum()) / audio.rate if segments.size else 0.0
+        print(f"{audio.duration_s:.1f} s de áudio ({t_map:.2f} s para mapear), "
+              f"{len(segments)} trechos com {speech_s:.1f} s de fala; VAD em {t_vad:.2f} s"
+              + (f" (limiar {threshold:.1f} dBFS)" if threshold is not None else ""))
+        if args.so_segmentar:
+            for s, e in segments / audio.rate:
+                print(f"  {s:8.2f} - {e:8.2f}")
+            return
+        if not len(segments):
+            return
+
+        model_dir = transcrever_lote.resolve_model_dir(args.modelo)
+        if not os.path.isdir(model_dir):
+            print(f"Erro: modelo não encontrado em {model_dir}")
+            sys.exit(1)
+        processes = max(1, min(args.processos or os.cpu_count() or 1, len(segments)))
+        out = open_writer(args.saida, args.formato) if args.saida else None
+
+        def emit(u):
+            print(f"[{u.start:8.2f} - {u.end:8.2f}] {u.text}")
+            if out is not None:
+                out.write(u)
+
+        t0 = time.perf_counter()
+        try:
+            _, decode_s = transcribe_long(audio, segments, model_dir, processes, emit)
+        finally:
+            if out is not None:
+                out.close()
+        wall_s = time.perf_counter() - t0
+        print("Resumo:", json.dumps({
+            "audio_s": round(audio.duration_s, 1),
+            "processos": processes,
+            "parede_s": round(wall_s, 2),
+            "decodificacao_s": round(decode_s, 2),
+            # Ganho do paralelismo: perto do número de processos quando escala bem
+            "ganho": round(decode_s / wall_s, 2) if wall_s else None,
+            "vazao_x_tempo_real": round(audio.duration_s / wall_s, 2) if wall_s else None,
+        }, ensure_ascii=False))
+    finally:
+        audio.close()
+
+
+if __name__ == "__main__":
+    main()
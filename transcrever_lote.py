@@ -0,0 +1,234 @@
+#pip install vosk
+#sudo apt install ffmpeg   (para formatos além de WAV mono 16 bits)
+
+# Transcrição em lote de gravações (Projeto Athena)
+#
+# teste_arquivo_wav.py decodifica um único WAV fixo, em série, e imprime cada
+# parcial. Para montar o corpus de comandos a partir de milhares de gravações
+# de campo, este script:
+#
+#   - aceita arquivos, diretórios (recursivo) e globs; qualquer formato que o
+#     ffmpeg leia é decodificado em fluxo (decodificar_audio.py)
+#   - distribui os arquivos num pool de processos; cada processo carrega o
+#     modelo UMA vez (no initializer). Com --carregar-antes o modelo é
+#     carregado no processo principal e herdado pelos processos via fork
+#     (cópia sob escrita: a memória do modelo é compartilhada)
+#   - escreve um JSON por linha (JSONL) assim que cada arquivo termina, com
+#     o texto e as frases com instantes por palavra (saida_transcricao.py); o
+#     arquivo de saída é a própria lista de concluídos: rodando de novo, os
+#     arquivos já transcritos (sem erro) são pulados
+#   - no fim, informa o real-time factor agregado: tempo de decodificação
+#     por segundo de áudio em cada núcleo, e a vazão total do pool
+#
+# USO:
+#   python transcrever_lote.py gravacoes/ -o transcricoes.jsonl
+#   python transcrever_lote.py "campo/**/*.wav" extra.wav --modelo full --processos 4
+#   python transcrever_lote.py gravacoes/ -o transcricoes.jsonl   # retoma de onde parou
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+
+from vosk import Model, KaldiRecognizer, SetLogLevel
+
+from decodificar_audio import AUDIO_EXTENSIONS, open_audio, as_waveform
+from saida_transcricao import enable_words, parse_result, utterance_to_dict
+
+# Ajuste conforme seu ambiente
+FULL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-pt-fb-v0.1.1-20220516_2113")
+SMALL_MODEL_DIR = os.path.expanduser("~/Athena/_VOZES/vosk-model-small-pt-0.3")
+MODEL_DIRS = {
+    "small": SMALL_MODEL_DIR,
+    "full": FULL_MODEL_DIR,
+}
+
+OUTPUT_FILE = "transcricoes.jsonl"
+
+# Modelo do processo (carregado no initializer, ou herdado pelo fork)
+_MODEL = None
+
+
+def resolve_model_dir(name):
+    """"small"/"full" ou um caminho de diretório de modelo."""
+    return MODEL_DIRS.get(name, os.path.expanduser(name))
+
+
+def expand_inputs(inputs, extensions=AUDIO_EXTENSIONS):
+    """Arquivos, diretórios (recursivo) e globs -> caminhos absolutos únicos, em ordem."""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                found += [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(extensions)]
+        elif os.path.isfile(item):
+            found.append(item)
+        else:
+            found += [p for p in sorted(glob.glob(item, recursive=True))
+                      if os.path.isfile(p) and p.lower().endswith(extensions)]
+    seen = set()
+    out = []
+    for path in found:
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            out.append(path)
+    return out
+
+
+def load_done(output_file):
+    """Arquivos já transcritos sem erro no JSONL (linha final cortada é ignorada)."""
+    done = set()
+    if not os.path.exists(output_file):
+        return done
+    with open(output_file, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "erro" not in record:
+                done.add(record["arquivo"])
+    return done
+
+
+def _init_worker(model_dir):
+    global _MODEL
+    SetLogLevel(-1)
+    if _MODEL is None:
+        _MODEL = Model(model_dir)
+
+
+def transcribe_file(path):
+    """Transcreve um arquivo no modelo do processo. Retorna o registro do JSONL."""
+    record = {"arquivo": path}
+    t0 = time.perf_counter()
+    try:
+        rate, blocks = open_audio(path)
+        rec = KaldiRecognizer(_MODEL, rate)
+        enable_words(rec)
+        utterances = []
+        n_bytes = 0
+        for data in blocks:
+            n_bytes += len(data)
+            if rec.AcceptWaveform(as_waveform(data)):
+                utterances.append(parse_result(rec.Result()))
+        utterances.append(parse_result(rec.FinalResult()))
+        utterances = [u for u in utterances if u is not None]
+    except Exception as e:
+        record["erro"] = f"{type(e).__name__}: {e}"
+        return record
+    decode_s = time.perf_counter() - t0
+    audio_s = n_bytes / (2.0 * rate)
+    record.update({
+        "texto": " ".join(u.text for u in utterances),
+        "audio_s": round(audio_s, 3),
+        "decodificacao_s": round(decode_s, 3),
+        "rtf": round(decode_s / audio_s, 4) if audio_s else None,
+        "pid": os.getpid(),
+        # Frases com instantes e confiança por palavra (saida_transcricao.py)
+        "frases": [utterance_to_dict(u) for u in utterances],
+    })
+    return record
+
+
+def run_batch(paths, output_file, model_dir, processes=None, preload=False):
+    """
+    Transcreve `paths` no pool e acrescenta os registros em output_file
+    conforme terminam. Retorna o resumo (contagens e real-time factor).
+    """
+    global _MODEL
+    processes = processes or os.cpu_count() or 1
+    method = "fork" if preload and "fork" in multiprocessing.get_all_start_methods() else None
+    if preload and method is None:
+        print("Aviso: fork indisponível, cada processo carrega o modelo")
+    ctx = multiprocessing.get_context(method)
+    if method == "fork":
+        SetLogLevel(-1)
+        t0 = time.perf_counter()
+        _MODEL = Model(model_dir)
+        print(f"Modelo carregado no processo principal em {time.perf_counter() - t0:.1f} s")
+
+    summary = {"arquivos": 0, "erros": 0, "audio_s": 0.0, "decodificacao_s": 0.0, "processos": processes}
+    t_start = time.perf_counter()
+    # Linha final cortada por uma interrupção anterior: começa numa linha nova
+    needs_newline = False
+    if os.path.exists(output_file) and os.path.getsize(output_file):
+        with open(output_file, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    with open(output_file, "a", encoding="utf-8") as out, \
+            ctx.Pool(processes, initializer=_init_worker, initargs=(model_dir,)) as pool:
+        if needs_newline:
+            out.write("\n")
+        # chunksize 1: arquivos de tamanhos muito diferentes se equilibram entre os processos
+        for record in pool.imap_unordered(transcribe_file, paths, chunksize=1):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            summary["arquivos"] += 1
+            if "erro" in record:
+                summary["erros"] += 1
+                print(f"[{summary['arquivos']}/{len(paths)}] ERRO {record['arquivo']}: {record['erro']}")
+                continue
+            summary["audio_s"] += record["audio_s"]
+            summary["decodificacao_s"] += record["decodificacao_s"]
+            print(f"[{summary['arquivos']}/{len(paths)}] {os.path.basename(record['arquivo'])}: "
+                  f"{record['texto']!r} (RTF {record['rtf']})")
+    wall_s = time.perf_counter() - t_start
+    summary["parede_s"] = round(wall_s, 2)
+    if summary["audio_s"]:
+        # RTF por núcleo: segundos de CPU de decodificação por segundo de áudio
+        summary["rtf_por_nucleo"] = round(summary["decodificacao_s"] / summary["audio_s"], 4)
+        # Vazão: segundos de áudio por segundo de relógio, no total e por processo
+        summary["vazao_x_tempo_real"] = round(summary["audio_s"] / wall_s, 2)
+        summary["vazao_por_processo"] = round(summary["audio_s"] / wall_s / processes, 2)
+    summary["audio_s"] = round(summary["audio_s"], 1)
+    summary["decodificacao_s"] = round(summary["decodificacao_s"], 1)
+    return summary
+
+
+def parse_cli_args():
+    p = argparse.ArgumentParser(description="Transcrição em lote com um pool de processos Vosk")
+    p.add_argument("entradas", nargs="+", help="Arquivos, diretórios ou globs (entre aspas)")
+    p.add_argument("-o", "--saida", default=OUTPUT_FILE, help="Arquivo JSONL (também usado para retomar)")
+    p.add_argument("--modelo", default="small", help='"small", "full" ou caminho do modelo')
+    p.add_argument("--processos", type=int, default=None, help="Padrão: número de núcleos")
+    p.add_argument("--carregar-antes", action="store_true",
+                   help="Carrega o modelo antes do fork (memória compartilhada entre processos)")
+    p.add_argument("--refazer", action="store_true", help="Não pula arquivos já transcritos")
+    return p.parse_args()
+
+
+def main():
+    args = parse_cli_args()
+    model_dir = resolve_model_dir(args.modelo)
+    if not os.path.isdir(model_dir):
+        print(f"Erro: modelo não encontrado em {model_dir}")
+        sys.exit(1)
+
+    paths = expand_inputs(args.entradas)
+    if not args.refazer:
+        done = load_done(args.saida)
+        skipped = sum(1 for p in paths if p in done)
+        paths = [p for p in paths if p not in done]
+        if skipped:
+            print(f"Retomando: {skipped} arquivo(s) já transcrito(s) em {args.saida}")
+    if not paths:
+        print("Nada a transcrever.")
+        return
+
+    processes = max(1, min(args.processos or os.cpu_count() or 1, len(paths)))
+    print(f"Transcrevendo {len(paths)} arquivo(s) com {processes} processo(s)...")
+    try:
+        summary = run_batch(paths, args.saida, model_dir, processes, args.carregar_antes)
+    except KeyboardInterrupt:
+        print(f"\nInterrompido. Os concluídos estão em {args.saida}; rode de novo para continuar.")
+        sys.exit(130)
+    print("Resumo:", json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
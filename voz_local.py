@@ -0,0 +1,65 @@
+#pip install SpeechRecognition vosk
+
+# Reconhecimento local (Vosk) para os scripts com speech_recognition (Projeto Athena)
+#
+# reconhecimento_de_voz_1.py e reconhecimento_de_voz_2_COM_fala.py mandavam
+# cada frase para recognize_google: centenas de ms de ida e volta pela rede,
+# e nada funciona sem internet. Aqui a frase capturada pelo speech_recognition
+# (sr.AudioData) é decodificada no Vosk, com o mesmo tratamento de modelo dos
+# scripts talkback:
+#
+#   - serviço residente ativo (servico_vosk.py): usa o modelo já carregado nele
+#   - senão, carregamento progressivo (modelos_vosk.py): começa ouvindo com o
+#     modelo leve e troca para o completo quando ele termina de carregar
+#
+# API:
+#   recognize = make_recognizer("vosk", recognizer)   # ou "google"
+#   texto = recognize(audio)   # levanta sr.UnknownValueError se não entendeu
+
+import json
+
+import speech_recognition as sr
+
+from servico_vosk import service_available, RemoteRecognizer
+from modelos_vosk import load_progressive
+
+SAMPLE_RATE = 16000
+BACKENDS = ("google", "vosk")
+# Bytes por chamada a AcceptWaveform (0,5 s)
+FEED_BYTES = 16000
+
+
+class VoskBackend:
+    """Decodifica frases inteiras (sr.AudioData) num reconhecedor Vosk reaproveitado."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.progressive = None
+        if service_available():
+            self.rec = RemoteRecognizer(sample_rate)
+            self.description = f"serviço residente ({self.rec.model_name})"
+        else:
+            self.progressive = load_progressive()
+            self.rec = self.progressive.recognizer(sample_rate)
+            self.description = f"modelo local '{self.progressive.tier}' (carregamento progressivo)"
+
+    def recognize(self, audio):
+        data = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        for i in range(0, len(data), FEED_BYTES):
+            self.rec.AcceptWaveform(data[i:i + FEED_BYTES])
+        # Cada AudioData é uma frase completa: FinalResult fecha e prepara a próxima
+        text = json.loads(self.rec.FinalResult()).get("text", "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def make_recognizer(backend, recognizer):
+    """Função audio -> texto para o backend escolhido ("google" ou "vosk")."""
+    if backend == "google":
+        return recognizer.recognize_google
+    if backend == "vosk":
+        vosk = VoskBackend()
+        print(f"Reconhecimento local: {vosk.description}")
+        return vosk.recognize
+    raise ValueError(f"backend desconhecido: {backend} (use {', '.join(BACKENDS)})")